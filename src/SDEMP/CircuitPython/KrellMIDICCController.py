@@ -24,6 +24,9 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIThru.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import time
 import board
 import neopixel
@@ -31,14 +34,8 @@ from analogio import AnalogIn
 import busio
 import usb_midi
 import adafruit_midi
-from adafruit_midi.note_off import NoteOff
-from adafruit_midi.note_on import NoteOn
-from adafruit_midi.polyphonic_key_pressure import PolyphonicKeyPressure
 from adafruit_midi.control_change import ControlChange
-from adafruit_midi.program_change import ProgramChange
-from adafruit_midi.channel_pressure import ChannelPressure
-from adafruit_midi.pitch_bend import PitchBend
-from adafruit_midi.midi_message import MIDIUnknownEvent
+import SimpleMIDIThru
 
 midicc1 = 1  # Modulation
 midicc2 = 7  # Channel volume
@@ -56,6 +53,10 @@ pixels2 = neopixel.NeoPixel(pixel_pin2, num_pixels, brightness=0.3, auto_write=F
 midiusb = adafruit_midi.MIDI(midi_out=usb_midi.ports[1])
 uart = busio.UART(tx=board.GP0, rx=board.GP1, baudrate=31250, timeout=0.001)
 midiuart = adafruit_midi.MIDI(midi_in=uart, midi_out=uart)
+# MIDI THRU is passed straight through as bytes, without making a
+# MIDI message object for each one.  As before, only channel messages
+# are passed on, so Active Sensing, SysEx, clock and so on are not.
+serthru = SimpleMIDIThru.SimpleMIDIThru(uart)
 
 col = (80, 35, 0)
 
@@ -100,13 +101,7 @@ while True:
         midiusb.send(ControlChange(midicc2,alg2))
         midiuart.send(ControlChange(midicc2,alg2))
             
-    # Perform MIDI THRU funcionality on the serial interface
-    # Unfortunately, this doesn't work particularly well...
-    msg = midiuart.receive()
-    while (msg is not None):
-        if (not isinstance(msg, MIDIUnknownEvent)):
-            # Ignore unknown MIDI events
-            # This filters out the ActiveSensing from my UMT-ONE for example!
-            midiuart.send(msg)
-    
-        msg = midiuart.receive()
+    # Perform MIDI THRU funcionality on the serial interface,
+    # passing on everything that has arrived.
+    while serthru.poll(uart.write):
+        pass
@@ -25,19 +25,17 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIThru.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import board
 import digitalio
 import usb_midi
 import busio
 import adafruit_midi
-from adafruit_midi.note_off import NoteOff
-from adafruit_midi.note_on import NoteOn
-from adafruit_midi.polyphonic_key_pressure import PolyphonicKeyPressure
 from adafruit_midi.control_change import ControlChange
 from adafruit_midi.program_change import ProgramChange
-from adafruit_midi.channel_pressure import ChannelPressure
-from adafruit_midi.pitch_bend import PitchBend
-from adafruit_midi.midi_message import MIDIUnknownEvent
+import SimpleMIDIThru
 
 # Need to state where the PC/CC messages from the buttons will go
 # Set to 1 to enable PC/CC over this interface
@@ -86,6 +84,12 @@ uart = busio.UART(board.GP0, board.GP1, baudrate=31250, timeout=0.001)
 sermidi = adafruit_midi.MIDI(midi_in=uart, midi_out=uart)
 usbmidi = adafruit_midi.MIDI(midi_in=usb_midi.ports[0], midi_out=usb_midi.ports[1])
 
+# MIDI THRU is passed straight through as bytes, without making a
+# MIDI message object for each one.  As before, only channel messages
+# are passed on, so Active Sensing, SysEx, clock and so on are not.
+usbthru = SimpleMIDIThru.SimpleMIDIThru(usb_midi.ports[0])
+serthru = SimpleMIDIThru.SimpleMIDIThru(uart)
+
 led = digitalio.DigitalInOut(board.GP25)
 led.direction = digitalio.Direction.OUTPUT
 
@@ -198,27 +202,10 @@ while True:
         b = b+1
 
     # Now handle the MIDI THRU/Routing between USB and serial MIDI
-    msg = usbmidi.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        # This filters out the ActiveSensing from my UMT-ONE for example!
-        pass
-    elif msg is not None:
+    if usbthru.poll(uart.write):
         ledOn()
-        sermidi.send(msg)
-    else:
-       # Ignore "None"
-       pass
-
-    msg = sermidi.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        pass
-    elif msg is not None:
+
+    if serthru.poll(usb_midi.ports[1].write):
         ledOn()
-        usbmidi.send(msg)
-    else:
-       # Ignore "None"
-       pass
 
     ledOff()
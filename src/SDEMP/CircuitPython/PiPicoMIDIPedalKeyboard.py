@@ -25,15 +25,20 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import board
 import digitalio
 import usb_midi
 import busio
+import SimpleMIDIEncoder
 import adafruit_midi
 from adafruit_midi.note_off import NoteOff
 from adafruit_midi.note_on import NoteOn
 
 uart = busio.UART(board.GP0, board.GP1, baudrate=31250)
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 led = digitalio.DigitalInOut(board.GP25)
 led.direction = digitalio.Direction.OUTPUT
@@ -56,11 +61,11 @@ lastnote = []
 def noteOn(x):
     ledOn()
     usb_midi.send(NoteOn(x,127))
-    uart.write(bytes([0x90,x,127]))
+    midiOut.noteOn(1,x,127)
 
 def noteOff(x):
     usb_midi.send(NoteOff(x,0))
-    uart.write(bytes([0x80,x,0]))
+    midiOut.noteOff(1,x,0)
     ledOff()
 
 ledOn()
@@ -26,6 +26,9 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import array
 import math
 import time
@@ -33,6 +36,7 @@ import board
 import digitalio
 import usb_midi
 import busio
+import SimpleMIDIEncoder
 import audiopwmio
 import audiocore
 import adafruit_midi
@@ -45,6 +49,7 @@ sample_wave = 0
 octave = 1
 
 uart = busio.UART(board.GP0, board.GP1, baudrate=31250)
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 dac = audiopwmio.PWMAudioOut(board.GP2)
 
 wavsw = digitalio.DigitalInOut(board.GP3)
@@ -180,12 +185,12 @@ def noteOn(x):
     ledOn()
     dacNoteOn(x, 127)
     usb_midi.send(NoteOn(x,127))
-    uart.write(bytes([0x90,x,127]))
+    midiOut.noteOn(1,x,127)
 
 def noteOff(x):
     dacNoteOff(x, 0)
     usb_midi.send(NoteOff(x,0))
-    uart.write(bytes([0x80,x,0]))
+    midiOut.noteOff(1,x,0)
     ledOff()
 
 while True:
@@ -24,8 +24,12 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import board
 import busio
+import SimpleMIDIEncoder
 import digitalio
 import adafruit_requests as requests
 import adafruit_esp32spi.adafruit_esp32spi_socket as socket
@@ -36,12 +40,13 @@ import time
 led = digitalio.DigitalInOut(board.GP25)
 led.direction = digitalio.Direction.OUTPUT
 uart = busio.UART(board.GP0, board.GP1, baudrate=31250)
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 def noteOn (x):
-    uart.write(bytes([0x90, x, 127]))
+    midiOut.noteOn(1,x,127)
 
 def noteOff (x):
-    uart.write(bytes([0x80, x, 0]))
+    midiOut.noteOff(1,x,0)
 
 # Get wifi details and more from a secrets.py file
 try:
@@ -24,6 +24,9 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDILog.py, SimpleMIDIScheduler.py, SimpleMIDIThru.py
+# and SimpleMIDIDecoder.py modules from the Micropython area too.
+#
 import board
 import busio
 import displayio
@@ -34,22 +37,43 @@ from adafruit_display_text import label
 from adafruit_display_shapes.rect import Rect
 import rotaryio
 import usb_midi
-import adafruit_midi
-
-from adafruit_midi.note_off import NoteOff
-from adafruit_midi.note_on import NoteOn
-from adafruit_midi.polyphonic_key_pressure import PolyphonicKeyPressure
-from adafruit_midi.control_change import ControlChange
-from adafruit_midi.program_change import ProgramChange
-from adafruit_midi.channel_pressure import ChannelPressure
-from adafruit_midi.pitch_bend import PitchBend
-from adafruit_midi.midi_message import MIDIUnknownEvent
+import SimpleMIDILog
+import SimpleMIDIScheduler
+import SimpleMIDIThru
 
 uart1 = busio.UART(tx=board.GP0, rx=board.GP1, baudrate=31250, timeout=0.001)
-sermidi1 = adafruit_midi.MIDI(midi_in=uart1, midi_out=uart1)
 uart2 = busio.UART(tx=board.GP4, rx=board.GP5, baudrate=31250, timeout=0.001)
-sermidi2 = adafruit_midi.MIDI(midi_in=uart2, midi_out=uart2)
-usbmidi = adafruit_midi.MIDI(midi_in=usb_midi.ports[0], midi_out=usb_midi.ports[1])
+
+# MIDI is routed as bytes, without making a MIDI message object for
+# each one, as the status byte is all that is needed to route it.
+# Channel messages, clock, start, continue and stop are passed on;
+# anything else (e.g. Active Sensing or SysEx) is ignored.
+#   0 = USB, 1,2 = UART0,1
+thrus = [SimpleMIDIThru.SimpleMIDIThru(usb_midi.ports[0], realtime=True),
+         SimpleMIDIThru.SimpleMIDIThru(uart1, realtime=True),
+         SimpleMIDIThru.SimpleMIDIThru(uart2, realtime=True)]
+
+# Each output port has its own queue, emptied a few messages at a
+# time from the main loop, so that one busy port doesn't hold up the
+# others.  MIDI clock and other realtime messages jump the queue.
+# Use sched.dump() from the REPL to see how full they get.
+#   0 = USB, 1,2 = UART0,1
+# NB: The display update makes each time round the loop quite long,
+#     so write up to 12 bytes to each port each time (four
+#     three-byte messages).
+OUT_CHUNK = 12
+sched = SimpleMIDIScheduler.SimpleMIDIScheduler()
+sched.addPort(usb_midi.ports[1].write, chunk=OUT_CHUNK)
+sched.addPort(uart1.write, chunk=OUT_CHUNK)
+sched.addPort(uart2.write, chunk=OUT_CHUNK)
+
+# Routed messages are counted rather than printed as printing to
+# the REPL is too slow to keep up.  Set the level to LOG_TRACE to also
+# keep the most recent messages, which can be seen using log.dump()
+# from the REPL.
+EV_ROUTE = 0
+EV_NOROUTE = 1
+log = SimpleMIDILog.SimpleMIDILog(["ROUTE", "NOROUTE"], SimpleMIDILog.LOG_COUNT)
 
 led = digitalio.DigitalInOut(board.LED)
 led.direction = digitalio.Direction.OUTPUT
@@ -123,6 +147,64 @@ for i in range(INPORTS):
         else:
             MIDIRT[i].append(False)
 
+# Types of message that can be filtered, from the status byte:
+# (status >> 4) - 8 for channel messages, and MT_SYSTEM for anything
+# without a channel (clock, start, stop and so on).
+MT_NOTEOFF   = 0
+MT_NOTEON    = 1
+MT_POLYPRESS = 2
+MT_CC        = 3
+MT_PC        = 4
+MT_CHANPRESS = 5
+MT_PITCHBEND = 6
+MT_SYSTEM    = 7
+MT_ALL       = 0xFF
+
+# Filters for each input: the channels passed on, one bit each
+# (bit 0 for channel 1), and the message types passed on, one bit
+# for each MT_ type.  The channels can be changed from the display.
+# For example, to stop clock coming in from UART0 going anywhere:
+#    MIDITYPE[1] = MT_ALL & ~(1<<MT_SYSTEM)
+MIDICH = []
+MIDITYPE = []
+for i in range(INPORTS):
+    MIDICH.append(0xFFFF)
+    MIDITYPE.append(MT_ALL)
+
+# The routes and filters are compiled into a bitfield of destination
+# ports for each input, channel and message type, so finding where
+# a message goes is a single lookup.  ROUTEBITS[src*16 + ch-1] has
+# OUTPORTS bits for each message type, one after the other, and
+# SYSBITS[src] the destinations for messages without a channel.
+#
+# If MIDIRT, MIDICH or MIDITYPE are changed, call routesCompile().
+#
+OUTMASK = (1<<OUTPORTS)-1
+ROUTEBITS = [0]*(INPORTS*16)
+SYSBITS = [0]*INPORTS
+
+def routesCompile():
+    for s in range(INPORTS):
+        dst = 0
+        for o in range(OUTPORTS):
+            if MIDIRT[s][o]:
+                dst |= 1<<o
+        typebits = 0
+        for mt in range(MT_SYSTEM):
+            if MIDITYPE[s] & (1<<mt):
+                typebits |= dst << (mt*OUTPORTS)
+        for ch in range(16):
+            if MIDICH[s] & (1<<ch):
+                ROUTEBITS[s*16 + ch] = typebits
+            else:
+                ROUTEBITS[s*16 + ch] = 0
+        if MIDITYPE[s] & (1<<MT_SYSTEM):
+            SYSBITS[s] = dst
+        else:
+            SYSBITS[s] = 0
+
+routesCompile()
+
 PORTS = INPORTS+OUTPORTS
 # Take anindex into the combined INPORT/OUTPORT list
 # and return the port number in either the INPORT or OUTPORT lists
@@ -175,6 +257,15 @@ def portToggle (pidx):
             else:
                 screen[OUTS][idx2port(pidx)] = True
 
+# The channel filter for the selected input is edited from one more
+# position after the OUT ports.  Clicking on it goes into channel
+# mode, where the encoder steps through the channels, clicking turns
+# a channel on or off, and clicking on "OK" goes back.
+CHPOS = PORTS
+CH_OK = 16
+ch_mode = False
+ch_cursor = 0
+
 FONT = terminalio.FONT
 TEXTCOL = 0xFFFFFF
 BACKCOL = 0x000000
@@ -184,6 +275,7 @@ TXT_Y_OUT = 22
 LAB_X_START = 5
 TXT_X_START = 40
 TXT_X_GAP   = 10
+TXT_X_CH    = 80
 
 INlab = label.Label(FONT, text="IN", color=TEXTCOL, background_color=BACKCOL, scale=SCALE)
 INlab.x = LAB_X_START
@@ -213,6 +305,16 @@ for l in range(OUTPORTS):
     panel.append(portlab)
     portOn(outport2idx(l))
 
+chlab = label.Label(FONT, text="", color=TEXTCOL, background_color=BACKCOL, scale=SCALE)
+chlab.x = TXT_X_CH
+chlab.y = TXT_Y_IN
+panel.append(chlab)
+
+chval = label.Label(FONT, text="", color=TEXTCOL, background_color=BACKCOL, scale=SCALE)
+chval.x = TXT_X_CH
+chval.y = TXT_Y_OUT
+panel.append(chval)
+
 display.show(panel)
 
 def displayReset ():
@@ -280,9 +382,61 @@ def displayUpdate (inports, outports):
             else:
                 displayPortOff(outport2idx(p))
 
+# Only change the text if it is different, as each
+# change means redrawing the label.
+def setText (lab, text):
+    if lab.text != text:
+        lab.text = text
+
+def chSummary (chmask):
+    if chmask == 0xFFFF:
+        return "All"
+    elif chmask == 0:
+        return "None"
+    for ch in range(16):
+        if chmask == 1<<ch:
+            return str(ch+1)
+    return "Some"
+
+def displayChannels ():
+    # Only IN ports have a channel filter
+    if not select_mode or selected == None or not isInPort(selected):
+        setText(chlab, "")
+        setText(chval, "")
+        return
+    if ch_mode:
+        if ch_cursor == CH_OK:
+            setText(chlab, "OK")
+            setText(chval, "")
+        else:
+            setText(chlab, "CH" + str(ch_cursor+1))
+            if MIDICH[selected] & (1<<ch_cursor):
+                setText(chval, "On")
+            else:
+                setText(chval, "Off")
+    else:
+        setText(chlab, "CH")
+        setText(chval, chSummary(MIDICH[selected]))
+    if ch_mode or cursor == CHPOS:
+        chlab.color=BACKCOL
+        chlab.background_color=TEXTCOL
+    else:
+        chlab.color=TEXTCOL
+        chlab.background_color=BACKCOL
+
 def cursorUpdate (inc: bool):
-    global cursor, selected, select_mode
-    if not select_mode:
+    global cursor, selected, select_mode, ch_cursor
+    if ch_mode:
+        # Channel mode, move through the channels and "OK"
+        if inc:
+            ch_cursor += 1
+            if ch_cursor > CH_OK:
+                ch_cursor = 0
+        else:
+            ch_cursor -= 1
+            if ch_cursor < 0:
+                ch_cursor = CH_OK
+    elif not select_mode:
         if inc:
             cursor += 1
             # NB: Allow one extra position for a "blank"
@@ -293,18 +447,18 @@ def cursorUpdate (inc: bool):
             if cursor < 0:
                 cursor = PORTS
     else:
-        # Select mode, only move cursor among the OUTPORTS and
-        # the one selected INPORT
+        # Select mode, only move cursor among the OUTPORTS, the
+        # channels and the one selected INPORT
         if inc:
             if cursor == selected:
                 cursor = INPORTS
             else:
                 cursor += 1
-                if cursor >= PORTS:
+                if cursor > CHPOS:
                     cursor = selected
         else:
             if cursor == selected:
-                cursor = PORTS-1
+                cursor = CHPOS
             else:
                 cursor -= 1
                 if cursor < INPORTS:
@@ -328,33 +482,44 @@ displayUpdate(screen[INS], screen[OUTS])
 display.show(panel)
 
 
-def midiRouter(s_src, s_ch):
-    d_dst = []
-    
-    # Simple routing, just return the list of destinations
-    # from the routing table (we don't do anything with channel yet)
-    for o in range(OUTPORTS):
-        if MIDIRT[s_src][o]:
-            d_dst.append(o)
-
-    # Return the destinations found, eliminating duplicates
-    return set(d_dst)
-
-def routeMidi (src, msg):
-    # NB: Adafruit MIDI channels go 0 to 15, convert to 1 to 16
-    dst = midiRouter(src, msg.channel + 1)
-    print (src, " -> ", dst)
-    if dst:
-        # The adafruit MIDI library will update the channel
-        # in the message if you don't tell it what channel to use...
-        channel = msg.channel
-        for d in dst:
-            if d == 2:
-                sermidi2.send(msg, channel=channel)
-            elif d == 1:
-                sermidi1.send(msg, channel=channel)
-            else:
-                usbmidi.send(msg, channel=channel)
+# Returns the destination ports as a bitfield (bit 0 for port 0).
+# Channel 0 is used for messages without a channel.
+def midiRouter(s_src, s_ch, s_mt):
+    if s_ch == 0:
+        return SYSBITS[s_src]
+    return (ROUTEBITS[s_src*16 + s_ch-1] >> (s_mt*OUTPORTS)) & OUTMASK
+
+# data is a complete message as bytes.  The scheduler copies it
+# into the port's queue, so it can be reused straight away.
+def routeMidi (src, data):
+    mb = data[0]
+    if mb >= 0xF0:
+        # Realtime messages have no channel
+        dst = midiRouter(src, 0, MT_SYSTEM)
+        for d in range(OUTPORTS):
+            if dst & (1<<d):
+                sched.realtime(d, mb)
+        return
+
+    ch = (mb & 0x0F) + 1
+    dst = midiRouter(src, ch, (mb >> 4) - 8)
+    if not dst:
+        log.event(EV_NOROUTE, src, ch)
+    else:
+        log.event(EV_ROUTE, src, ch, dst)
+        for d in range(OUTPORTS):
+            if dst & (1<<d):
+                sched.send(d, data)
+
+# A function for each input to pass to its SimpleMIDIThru
+def inputRouter (src):
+    def route (data):
+        routeMidi(src, data)
+    return route
+
+routers = []
+for i in range(INPORTS):
+    routers.append(inputRouter(i))
 
 def ledOn():
     led.value = True
@@ -363,54 +528,36 @@ def ledOff():
     led.value = False
 
 while True:
-    msg = usbmidi.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        # This filters out the ActiveSensing from my UMT-ONE for example!
-        pass
-    elif msg is not None:
-        ledOn()
-        routeMidi(0, msg)
-    else:
-       # Ignore "None"
-       pass
-
-    msg = sermidi1.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        pass
-    elif msg is not None:
-        ledOn()
-        routeMidi(1, msg)
-    else:
-       # Ignore "None"
-       pass
-
-    msg = sermidi2.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        pass
-    elif msg is not None:
-        ledOn()
-        routeMidi(2, msg)
-    else:
-       # Ignore "None"
-       pass
+    for i in range(INPORTS):
+        if thrus[i].poll(routers[i]):
+            ledOn()
 
     ledOff()
 
+    sched.service()
+
     button_value = button.value
     if not button_value and button_state:
-        if select_mode:
+        if ch_mode:
+            if ch_cursor == CH_OK:
+                ch_mode = False
+            else:
+                MIDICH[selected] ^= 1<<ch_cursor
+        elif select_mode:
             if (cursor < INPORTS):
                 display2routes(selected)
+                routesCompile()
                 select_mode = False
                 selected = None
                 displayReset()
+            elif (cursor == CHPOS):
+                ch_mode = True
+                ch_cursor = 0
             else:
                 portToggle(cursor)        
         else:
-            if cursor >= 0 and cursor < PORTS:
+            # Only IN ports can be selected to set their routing
+            if cursor >= 0 and isInPort(cursor):
                 select_mode = True
                 selected = cursor
                 cursor = INPORTS
@@ -428,3 +575,4 @@ while True:
     re_position = position
 
     displayUpdate(screen[INS], screen[OUTS])
+    displayChannels()
@@ -24,24 +24,23 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIThru.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.  Copy them over from the Micropython area.
+#
 import board
 import busio
 import digitalio
 import usb_midi
-import adafruit_midi
-
-from adafruit_midi.note_off import NoteOff
-from adafruit_midi.note_on import NoteOn
-from adafruit_midi.polyphonic_key_pressure import PolyphonicKeyPressure
-from adafruit_midi.control_change import ControlChange
-from adafruit_midi.program_change import ProgramChange
-from adafruit_midi.channel_pressure import ChannelPressure
-from adafruit_midi.pitch_bend import PitchBend
-from adafruit_midi.midi_message import MIDIUnknownEvent
+import SimpleMIDIThru
 
 uart = busio.UART(tx=board.TX, rx=board.RX, baudrate=31250, timeout=0.001)
-sermidi = adafruit_midi.MIDI(midi_in=uart, midi_out=uart)
-usbmidi = adafruit_midi.MIDI(midi_in=usb_midi.ports[0], midi_out=usb_midi.ports[1])
+usbout = usb_midi.ports[1]
+
+# MIDI is passed straight through as bytes, without making a MIDI
+# message object for each one.  As before, only channel messages
+# are passed on, so Active Sensing, SysEx, clock and so on are not.
+usbthru = SimpleMIDIThru.SimpleMIDIThru(usb_midi.ports[0])
+serthru = SimpleMIDIThru.SimpleMIDIThru(uart)
 
 # If one of these doesn't work or causes the board to hang, try the other!
 #led = digitalio.DigitalInOut(board.LED)
@@ -59,27 +58,10 @@ def ledOff():
 #    led.value = False
 
 while True:
-    msg = usbmidi.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        # This filters out the ActiveSensing from my UMT-ONE for example!
-        pass
-    elif msg is not None:
+    if usbthru.poll(uart.write):
         ledOn()
-        sermidi.send(msg)
-    else:
-       # Ignore "None"
-       pass
 
-    msg = sermidi.receive()
-    if (isinstance(msg, MIDIUnknownEvent)):
-        # Ignore unknown MIDI events
-        pass
-    elif msg is not None:
+    if serthru.poll(usbout.write):
         ledOn()
-        usbmidi.send(msg)
-    else:
-       # Ignore "None"
-       pass
 
     ledOff()
@@ -0,0 +1,801 @@
+# MIDI Benchmark
+# for desktop Python on the host computer
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# This is a host-side benchmark for the Micropython MIDI code
+# in this area.  It does not need a Pico - run it with a desktop
+# Python from this directory:
+#
+#    python3 MIDIBenchmark.py
+#
+# Some sections also check that what comes out is right.  If any of
+# these fail they are listed at the end and it exits with an error.
+#
+# It needs the SimpleMIDIDecoder.py, SimpleMIDIRouter.py,
+# SimpleMIDIPIOTx.py, SimpleMIDIEncoder.py, SimpleMIDIEngine.py,
+# SimpleMIDIRing.py, SimpleMIDIVoiceAllocator.py, SimpleMIDIRx.py,
+# SimpleMIDIPIORx.py, SimpleMIDIMerger.py, SimpleMIDIThru.py and
+# SimpleMIDIHost.py modules from @diyelectromusic too.
+#
+import gc
+import random
+import sys
+import threading
+import time
+import SimpleMIDIHost
+SimpleMIDIHost.install()
+import SimpleMIDIDecoder
+import SimpleMIDIRouter
+import SimpleMIDIPIOTx
+import SimpleMIDIEncoder
+import SimpleMIDIEngine
+import SimpleMIDIRing
+import SimpleMIDIVoiceAllocator
+import SimpleMIDIRx
+import SimpleMIDIPIORx
+import SimpleMIDIMerger
+import SimpleMIDIThru
+import tracemalloc
+
+NUM_MSGS = 20000
+CHUNK = 32   # Bytes handed over per feed(), roughly a UART FIFO's worth
+
+# Names of any checks that have failed
+failed = []
+
+# Returns "OK", or records the failure and returns the text given
+def check(name, ok, fail="MISMATCH"):
+    if ok:
+        return "OK"
+    failed.append(name)
+    return fail
+
+def doNothing(*args):
+    pass
+
+def newDecoder():
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md.cbNoteOn (doNothing)
+    md.cbNoteOff (doNothing)
+    md.cbThru (doNothing)
+    return md
+
+# Build a dense controller stream, as sent by a bank of pots or
+# faders, mixed in with some notes.  Running status is used
+# whenever the status byte repeats, as most controllers do.
+def midiStream(nummsgs, seed=1):
+    rnd = random.Random(seed)
+    stream = bytearray()
+    status = 0
+    for i in range(nummsgs):
+        ch = rnd.randrange(16)
+        if rnd.random() < 0.8:
+            msg = [0xB0+ch, rnd.randrange(128), rnd.randrange(128)]
+        else:
+            msg = [rnd.choice([0x80,0x90])+ch, rnd.randrange(128), rnd.randrange(1,128)]
+        if msg[0] == status:
+            stream.extend(msg[1:])
+        else:
+            stream.extend(msg)
+            status = msg[0]
+    return bytes(stream)
+
+# The per-byte loop mirrors what the main loops used to do
+# with the UART: one read(1) and one decoder call per byte.
+def benchRead(stream):
+    md = newDecoder()
+    start = time.perf_counter()
+    for i in range(len(stream)):
+        md.read(stream[i:i+1][0])
+    return time.perf_counter() - start
+
+def benchFeed(stream):
+    md = newDecoder()
+    start = time.perf_counter()
+    for i in range(0, len(stream), CHUNK):
+        md.feed(stream[i:i+CHUNK])
+    return time.perf_counter() - start
+
+def report(name, nbytes, secs):
+    print ("%-24s %10.0f bytes/sec" % (name, nbytes/secs))
+
+stream = midiStream(NUM_MSGS)
+print ("Stream: ", len(stream), "bytes, ", NUM_MSGS, "messages")
+report("read() per byte", len(stream), benchRead(stream))
+report("feed() per %d bytes" % CHUNK, len(stream), benchFeed(stream))
+
+# Routing: compare walking the list of rules for every message (as
+# SimpleMIDIMultiRxTx used to, but without the printing) with the
+# compiled routing table.
+NUM_PORTS = 6
+NUM_ROUTES = 20000
+
+def midiRouterList(rules, s_ch, s_cmd, s_src):
+    d_dst = []
+    for r in rules:
+        ch,cmd,src,dst = r
+        if (ch == -1) or (s_ch == ch):
+            if (cmd == -1) or (s_cmd == cmd):
+                if (src == -1) or (s_src == src):
+                    d_dst.append(dst)
+    return set(d_dst)
+
+def midiRules(numrules, seed=1):
+    rnd = random.Random(seed)
+    rules = []
+    for i in range(numrules):
+        ch = rnd.choice([-1, rnd.randrange(1,17)])
+        cmd = rnd.choice([-1, rnd.randrange(0x80,0xF0,0x10)])
+        src = rnd.choice([-1, rnd.randrange(NUM_PORTS)])
+        rules.append([ch, cmd, src, rnd.randrange(NUM_PORTS)])
+    return rules
+
+def midiMessages(nummsgs, seed=2):
+    rnd = random.Random(seed)
+    return [(rnd.randrange(1,17), rnd.randrange(0x80,0xF0,0x10), rnd.randrange(NUM_PORTS)) for i in range(nummsgs)]
+
+def benchRouteList(rules, msgs):
+    start = time.perf_counter()
+    for ch,cmd,src in msgs:
+        for d in midiRouterList(rules, ch, cmd, src):
+            pass
+    return time.perf_counter() - start
+
+def benchRouteTable(rules, msgs):
+    router = SimpleMIDIRouter.SimpleMIDIRouter(NUM_PORTS, rules)
+    route = router.route
+    start = time.perf_counter()
+    for ch,cmd,src in msgs:
+        for d in route(ch, cmd, src):
+            pass
+    return time.perf_counter() - start
+
+msgs = midiMessages(NUM_ROUTES)
+print ()
+for numrules in [10, 100, 1000]:
+    rules = midiRules(numrules)
+    print ("%4d rules: list %10.0f msgs/sec   table %10.0f msgs/sec" %
+           (numrules, len(msgs)/benchRouteList(rules, msgs), len(msgs)/benchRouteTable(rules, msgs)))
+
+# PIO transmit: SimpleMIDIHost's rp2.StateMachine has a four word
+# TX FIFO.  Each tick() sends one byte on the wire.  A real sm.put()
+# would block the main loop when the FIFO is full, so there that is
+# counted as a stall (each one is roughly a byte's time at 31250).
+
+# Chords of up to eight notes or a burst of controllers at a time,
+# with enough of a gap in between to get them all onto the wire.
+PIO_BURST = 8
+PIO_GAP = 32
+
+def pioMessages(nummsgs, seed=3):
+    rnd = random.Random(seed)
+    msgs = []
+    for i in range(nummsgs):
+        cmd = rnd.choice([0x80, 0x90, 0x90, 0xB0, 0xC0, 0xD0, 0xE0])
+        msgs.append((cmd + rnd.randrange(16), rnd.randrange(128), rnd.randrange(128)))
+    return msgs
+
+# Expected bytes on the wire, with the right length for each message
+def pioExpected(msgs):
+    wire = bytearray()
+    for b0,b1,b2 in msgs:
+        wire.extend(bytes([b0,b1,b2])[:SimpleMIDIDecoder.MIDI_DATALEN[b0]+1])
+    return wire
+
+# How pio_midi_send used to do it: one put() per byte
+def pioPerByte(sm, msgs):
+    for i in range(0, len(msgs), PIO_BURST):
+        for b0,b1,b2 in msgs[i:i+PIO_BURST]:
+            sm.put(b0)
+            sm.put(b1)
+            if SimpleMIDIDecoder.MIDI_DATALEN[b0] > 1:
+                sm.put(b2)
+        for t in range(PIO_GAP):
+            sm.tick()
+
+def pioDriver(sm, msgs):
+    tx = SimpleMIDIPIOTx.SimpleMIDIPIOTx(sm)
+    for i in range(0, len(msgs), PIO_BURST):
+        for b0,b1,b2 in msgs[i:i+PIO_BURST]:
+            tx.send(b0, b1, b2)
+        for t in range(PIO_GAP):
+            sm.tick()
+            tx.service()
+    tx.flush()
+    return tx
+
+msgs = pioMessages(2000)
+expected = pioExpected(msgs)
+print ()
+sm = SimpleMIDIHost.StateMachine(100)
+pioPerByte(sm, msgs)
+sm.tick(None)
+print ("PIO put() per byte: %6d puts %6d stalls  %s" %
+       (sm.puts, sm.stalls, check("PIO put() per byte", sm.output == expected)))
+sm = SimpleMIDIHost.StateMachine(101)
+tx = pioDriver(sm, msgs)
+sm.tick(None)
+print ("SimpleMIDIPIOTx:    %6d puts %6d stalls  %s  (queue high water %d bytes, %d dropped)" %
+       (sm.puts, sm.stalls, check("SimpleMIDIPIOTx", sm.output == expected), tx.highwater, tx.drops))
+
+# Running status: decode a stream into messages, then send them
+# again both with a full status byte every time (as the senders
+# used to) and through the encoder.  The encoded stream is decoded
+# again to check nothing was lost on the way.
+def decodeMessages(stream):
+    msgs = []
+    def doMsg(ch, cmd, d1, d2):
+        msgs.append((cmd+ch-1, d1, d2))
+    def doRealtime(cmd, ts):
+        msgs.append((cmd, -1, -1))
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder(realtime=True)
+    md.cbNoteOn (doMsg)
+    md.cbNoteOff (doMsg)
+    md.cbThru (doMsg)
+    md.cbRealtime (doRealtime)
+    md.feed(stream)
+    return msgs
+
+def encodeMessages(msgs, runningstatus):
+    out = bytearray()
+    enc = SimpleMIDIEncoder.SimpleMIDIEncoder(out.extend, runningstatus)
+    for b0,b1,b2 in msgs:
+        enc.send(b0, b1, b2)
+    return out
+
+# A chord sequence: each chord played and released on one channel,
+# with MIDI clock running along with it.
+def chordStream(numchords, seed=4):
+    rnd = random.Random(seed)
+    stream = bytearray()
+    for i in range(numchords):
+        ch = rnd.randrange(4)
+        notes = [rnd.randrange(36,84) for n in range(rnd.randrange(3,7))]
+        for n in notes:
+            stream.extend([0x90+ch, n, 100])
+        stream.extend([0xF8] * 6)
+        for n in notes:
+            stream.extend([0x80+ch, n, 0])
+        stream.extend([0xF8] * 6)
+    return bytes(stream)
+
+# A bank of eight faders on one channel being moved together
+def faderStream(nummsgs, seed=5):
+    rnd = random.Random(seed)
+    stream = bytearray()
+    for i in range(nummsgs):
+        stream.extend([0xB0, 70 + i % 8, rnd.randrange(128)])
+    return bytes(stream)
+
+print ()
+for name, stream in [("Mixed channels", midiStream(NUM_MSGS)),
+                     ("Faders", faderStream(NUM_MSGS)),
+                     ("Chords + clock", chordStream(2000))]:
+    msgs = decodeMessages(stream)
+    full = encodeMessages(msgs, False)
+    rs = encodeMessages(msgs, True)
+    print ("%-16s %7d bytes  running status %7d bytes  (%4.1f%% saved)  %s" %
+           (name, len(full), len(rs), 100.0*(len(full)-len(rs))/len(full),
+            check("Running status: " + name, decodeMessages(rs) == msgs)))
+
+# Dual core engine: a "device" thread sends controller messages into
+# a stand-in UART at roughly the rate MIDI can carry them, while the
+# main loop spends UI_SECS of every pass "scanning the UI".  Compare
+# decoding in the main loop, as PicoTX816IOPanel used to, with
+# decoding in the engine's thread.  Two latencies are measured from
+# each message arriving in the UART:
+#
+#   * Decoded - to when it has been read and decoded.  On the Pico
+#     the UART only has a small FIFO, so this is what decides
+#     whether bytes get lost.
+#   * Handled - to when its callback runs in the main loop.
+#
+# Desktop Python threads take turns rather than running at the same
+# time like the Pico's two cores, so the thread switch interval is
+# turned down to get a little closer to that.
+NUM_LATENCY = 1000
+MSG_SECS = 0.001
+UI_SECS = 0.002
+
+class MockUART:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buf = bytearray()
+
+    def inject(self, data):
+        with self.lock:
+            self.buf.extend(data)
+
+    def any(self):
+        return len(self.buf)
+
+    def read(self, n):
+        with self.lock:
+            data = bytes(self.buf[:n])
+            del self.buf[:n]
+        return data
+
+def busyWait(secs):
+    end = time.perf_counter() + secs
+    while time.perf_counter() < end:
+        pass
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values)-1, int(len(values)*p/100))]
+
+def latencyRun(useEngine):
+    uart = MockUART()
+    sent = [0.0] * NUM_LATENCY
+    decoded = []
+    handled = []
+    def msgId(d1, d2):
+        return d1 + (d2 << 7)
+
+    def doMsg(ch, cmd, d1, d2, src=0):
+        handled.append(time.perf_counter() - sent[msgId(d1, d2)])
+
+    def doDecoded(ch, cmd, d1, d2):
+        decoded.append(time.perf_counter() - sent[msgId(d1, d2)])
+        doMsg(ch, cmd, d1, d2)
+
+    def device():
+        for i in range(NUM_LATENCY):
+            sent[i] = time.perf_counter()
+            uart.inject(bytes([0xB0, i & 0x7F, i >> 7]))
+            time.sleep(MSG_SECS)
+
+    if useEngine:
+        engine = SimpleMIDIEngine.SimpleMIDIEngine(128, lambda: time.sleep(0))
+        engine.addUART(uart)
+        engine.cbThru (doMsg)
+        # Note the time as each message goes into the ring
+        ring = engine.ring(0)
+        ringput = ring.put
+        def put(b0, b1=0, b2=0):
+            decoded.append(time.perf_counter() - sent[msgId(b1, b2)])
+            return ringput(b0, b1, b2)
+        ring.put = put
+        engine.start()
+    else:
+        md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+        md.cbThru (doDecoded)
+
+    dev = threading.Thread(target=device)
+    dev.start()
+    while len(handled) < NUM_LATENCY:
+        if useEngine:
+            engine.service()
+        else:
+            n = uart.any()
+            if n:
+                md.feed(uart.read(n))
+        busyWait(UI_SECS)
+    dev.join()
+    if useEngine:
+        engine.stop()
+    return decoded, handled
+
+print ()
+switch = sys.getswitchinterval()
+sys.setswitchinterval(0.0001)
+for name, useEngine in [("Main loop", False), ("Engine", True)]:
+    decoded, handled = latencyRun(useEngine)
+    print ("%-10s decoded p50 %6.3f ms  p99 %6.3f ms   handled p50 %6.3f ms  p99 %6.3f ms" %
+           (name, 1000*percentile(decoded, 50), 1000*percentile(decoded, 99),
+            1000*percentile(handled, 50), 1000*percentile(handled, 99)))
+sys.setswitchinterval(switch)
+
+# SimpleMIDIRing: one thread puts numbered events into a small ring
+# as fast as it can (trying again whenever the ring is full) while
+# another takes them out.  Every event should come out, in order.
+# Each thread gives way to the other while it is waiting.
+NUM_RING = 100000
+
+def ringRun(size):
+    ring = SimpleMIDIRing.SimpleMIDIRing(size)
+    def producer():
+        for i in range(NUM_RING):
+            while not ring.put(0x90 | (i >> 14), (i >> 7) & 0x7F, i & 0x7F):
+                time.sleep(0)
+    errors = 0
+    start = time.perf_counter()
+    prod = threading.Thread(target=producer)
+    prod.start()
+    expect = 0
+    while expect < NUM_RING:
+        ev = ring.get()
+        if ev == -1:
+            time.sleep(0)
+            continue
+        i = ((ev >> 16) & 0x0F) << 14 | ((ev >> 8) & 0x7F) << 7 | (ev & 0x7F)
+        if i != expect:
+            errors += 1
+        expect = i + 1
+    prod.join()
+    return time.perf_counter() - start, errors, ring.overflows
+
+print ()
+sys.setswitchinterval(0.0001)
+for size in [4, 64]:
+    secs, errors, full = ringRun(size)
+    print ("Ring size %3d: %8.0f events/sec  %s  (found full %d times)" %
+           (size, NUM_RING/secs, check("Ring size %d" % size, errors == 0, "%d OUT OF ORDER" % errors), full))
+sys.setswitchinterval(switch)
+
+# Voice allocation for 8 oscillators (as in the PIOBeep projects),
+# playing overlapping chords: each chord is started before the one
+# before it is released, so often more notes want to sound than there
+# are voices.  The old way searched the oscillators for a free one
+# (0 meaning free) and dropped the note if there wasn't one.  It also
+# let the same note take up more than one oscillator.
+NUM_VOICES = 8
+NUM_VCHORDS = 20000
+
+def voiceEvents(numchords, seed=6):
+    rnd = random.Random(seed)
+    events = []
+    last = []
+    for i in range(numchords):
+        root = rnd.randrange(36, 90)
+        chord = sorted(set(root + rnd.choice([0, 3, 4, 7, 10, 12, 14]) for n in range(rnd.randrange(3, 7))))
+        for note in chord:
+            events.append((1, note, rnd.randrange(1, 128)))
+        for note in last:
+            if note not in chord:
+                events.append((0, note, 0))
+        last = chord
+    for note in last:
+        events.append((0, note, 0))
+    return events
+
+def voiceScan(events):
+    oscuse = [0] * NUM_VOICES
+    dropped = 0
+    for on, note, vel in events:
+        if on:
+            for o in range(NUM_VOICES):
+                if (oscuse[o] == 0):
+                    oscuse[o] = note
+                    break
+            else:
+                dropped += 1
+        else:
+            for o in range(NUM_VOICES):
+                if (oscuse[o] == note):
+                    oscuse[o] = 0
+    return dropped, 0
+
+def voiceAllocator(steal):
+    def run(events):
+        va = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(NUM_VOICES, steal)
+        noteOn = va.noteOn
+        noteOff = va.noteOff
+        for on, note, vel in events:
+            if on:
+                noteOn(note, vel)
+            else:
+                noteOff(note)
+        return va.drops, va.steals
+    return run
+
+def voiceRun(fn, events):
+    start = time.perf_counter()
+    dropped, stolen = fn(events)
+    secs = time.perf_counter() - start
+    tracemalloc.start()
+    fn(events)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return secs, dropped, stolen, peak
+
+print ()
+events = voiceEvents(NUM_VCHORDS)
+noteons = sum(1 for e in events if e[0])
+print ("Voices: ", NUM_VOICES, "voices, ", noteons, "notes in", NUM_VCHORDS, "overlapping chords")
+for name, fn in [("Scan oscuse[]", voiceScan),
+                 ("Allocator, no steal", voiceAllocator(SimpleMIDIVoiceAllocator.STEAL_NONE)),
+                 ("Allocator, oldest", voiceAllocator(SimpleMIDIVoiceAllocator.STEAL_OLDEST)),
+                 ("Allocator, quietest", voiceAllocator(SimpleMIDIVoiceAllocator.STEAL_QUIETEST))]:
+    secs, dropped, stolen, peak = voiceRun(fn, events)
+    print ("%-20s %6.2f us/event  %5.1f%% dropped  %5.1f%% stolen  (peak %d bytes incl. set up)" %
+           (name, 1000000*secs/len(events), 100*dropped/noteons, 100*stolen/noteons, peak))
+
+# Receiving while the main loop is busy: bursts of notes (chords
+# arriving back to back at the full 31250 baud) go to a PIO input with
+# a 4 byte FIFO and a UART with a 32 byte FIFO, on a simulated clock.
+# The main loop spends "ui" mS at a time on something else (such as
+# updating a display) between reads.
+#   * Polling - the main loop reads whatever is in the FIFO when it
+#     gets round to it, so anything more that arrived is lost.
+#   * Timer IRQ - SimpleMIDIRx empties the FIFO into a ring every
+#     RX_PERIOD mS and the main loop feeds the ring to the decoder.
+# The hardware UARTs in Micropython already have a bigger buffer
+# (rxbuf), so the UART here shows what that would be like without it.
+NUM_RXBURSTS = 500
+
+def rxBursts(numbursts, seed=7):
+    rnd = random.Random(seed)
+    bursts = []
+    t = 0
+    for i in range(numbursts):
+        data = bytearray()
+        for n in range(rnd.randrange(2, 9)):
+            data.extend([0x90 + rnd.randrange(16), rnd.randrange(36, 96), rnd.randrange(1, 128)])
+        bursts.append((t, bytes(data)))
+        t += rnd.randrange(5000, 40000)
+    return bursts
+
+def rxRun(dev, fifo, bursts, ui, useIrq):
+    dev.fifo = fifo
+    dev.overruns = 0
+    count = [0]
+    def doCount(ch, cmd, d1, d2):
+        count[0] += 1
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md.cbNoteOn (doCount)
+    md.cbNoteOff (doCount)
+    md.cbThru (doCount)
+    wire = SimpleMIDIHost.Wire(dev)
+    for at, data in bursts:
+        wire.send(data, at)
+    uarts = isinstance(dev, SimpleMIDIHost.UART)
+    rx = SimpleMIDIRx.SimpleMIDIRx()
+    if uarts:
+        rx.addUART(dev)
+    else:
+        rx.addPIO(dev)
+    t = 0
+    while wire.waiting():
+        if useIrq:
+            # The timer keeps going while the main loop is busy
+            end = t + ui*1000
+            while t < end:
+                t += SimpleMIDIRx.RX_PERIOD*1000
+                wire.run(t)
+                rx.irq()
+            rx.feed(0, md)
+        else:
+            t += ui*1000
+            wire.run(t)
+            if uarts:
+                n = dev.any()
+                if n:
+                    md.feed(dev.read(n))
+            else:
+                while dev.rx_fifo():
+                    md.read(dev.get(None, 24))
+    if useIrq:
+        rx.irq()
+        rx.feed(0, md)
+    dev.fifo = None
+    return count[0], dev.overruns + sum(rx.overflows)
+
+print ()
+bursts = rxBursts(NUM_RXBURSTS)
+nummsgs = sum(len(d) for t, d in bursts) // 3
+print ("Receiving:", nummsgs, "notes in", NUM_RXBURSTS, "bursts")
+for name, dev, fifo in [("PIO", SimpleMIDIHost.StateMachine(99), 4),
+                        ("UART", SimpleMIDIHost.UART(99, 31250), 32)]:
+    for ui in [1, 5, 20]:
+        results = []
+        for useIrq in [False, True]:
+            got, lost = rxRun(dev, fifo, bursts, ui, useIrq)
+            results.append("%5.1f%% lost (%5d bytes)" % (100*(nummsgs-got)/nummsgs, lost))
+        print ("%-4s FIFO %2d, ui %2d mS:  polling %s   timer IRQ %s" %
+               (name, fifo, ui, results[0], results[1]))
+
+# Reading 8 PIO receive state machines, with some of them busy.
+# Each round every busy port gets a full FIFO (4 bytes) and the
+# main loop polls until it has read them all.
+#   * Per byte - as SimpleMIDIMultiRxTx and SimpleMIDIChannelMerger
+#     used to: rx_fifo() on every port, then one get() per byte.
+#   * Bulk - SimpleMIDIPIORx: FSTAT says which ports to look at, and
+#     one get() empties each FIFO.
+# Idle is how many times round the main loop a second there is time
+# for when nothing is being received.  On the host the stand-in state
+# machines and FSTAT take a lot of the time, so this only gives an
+# idea of the difference.  The two are run in turn PIO_RUNS times
+# and the median of each is shown, as a single run can easily be
+# thrown out by anything else the computer is doing.
+NUM_PIORX = 8
+NUM_PIOROUNDS = 5000
+PIO_RUNS = 7
+
+def pioRxPerByte(sms, md):
+    def poll():
+        for i in range(NUM_PIORX):
+            if (sms[i].rx_fifo()):
+                md[i].read(sms[i].get() >> 24)
+    return poll
+
+def pioRxBulk(sms, md):
+    pio_rx = SimpleMIDIPIORx.SimpleMIDIPIORx(sms, 0)
+    def poll():
+        pio_rx.poll(md)
+    return poll
+
+def pioRxRun(makePoll, busy):
+    sms = [SimpleMIDIHost.StateMachine(i) for i in range(NUM_PIORX)]
+    md = [newDecoder() for i in range(NUM_PIORX)]
+    poll = makePoll(sms, md)
+    data = bytes([0x90, 60, 100, 61])
+    secs = 0
+    for r in range(NUM_PIOROUNDS):
+        for i in range(busy):
+            sms[i].inject(data)
+        start = time.process_time()
+        while (sms[busy-1].rx):
+            poll()
+        secs += time.process_time() - start
+    start = time.process_time()
+    for r in range(NUM_PIOROUNDS):
+        poll()
+    idle = time.process_time() - start
+    return busy*len(data)*NUM_PIOROUNDS/secs, NUM_PIOROUNDS/idle
+
+print ()
+print ("PIO receive:", NUM_PIORX, "state machines")
+gc.disable()
+for busy in [1, 4, 8]:
+    runs = [[], []]
+    for r in range(PIO_RUNS):
+        for m, makePoll in enumerate([pioRxPerByte, pioRxBulk]):
+            runs[m].append(pioRxRun(makePoll, busy))
+    results = []
+    for m in range(2):
+        bps = sorted(x[0] for x in runs[m])[PIO_RUNS//2]
+        idle = sorted(x[1] for x in runs[m])[PIO_RUNS//2]
+        results.append("%8.0f bytes/sec %7.0f idle/sec" % (bps, idle))
+    print ("%d busy:  per byte %s   bulk %s" % (busy, results[0], results[1]))
+gc.enable()
+
+# Merging 8 inputs onto one output, on a simulated clock.  Input 0
+# sends a note every 400uS, more than the output can take (a 3 byte
+# message takes 960uS at 31250 baud), while the other 7 send one
+# every 10mS.  The output UART has a 32 byte FIFO.
+#   * Direct - as SimpleMIDIChannelMerger used to, each message is
+#     written as soon as it is decoded, so everything waits behind
+#     input 0 (in reality the main loop would stall in write()).
+#   * SimpleMIDIMerger - each input has its own queue and only as
+#     much as will fit in the FIFO is written each time round.
+# Wait is from a message arriving to it starting to go out.
+NUM_MERGEIN = 8
+MERGE_US = 2000000
+MERGE_STEP = 100
+
+def mergeRun(policy):
+    t = [0]
+    fifo = bytearray()
+    waits = [[] for i in range(NUM_MERGEIN)]
+    def clock():
+        return t[0]
+    if policy == None:
+        def send(i, b0, b1, b2):
+            waits[i].append(len(fifo) * 320)
+            fifo.extend(bytes([b0, b1, b2]))
+    else:
+        merger = SimpleMIDIMerger.SimpleMIDIMerger(fifo.extend, NUM_MERGEIN, policy=policy, clock=clock,
+                                                   ready=lambda: 32 - len(fifo))
+        send = merger.send
+    nextbyte = 0
+    for t[0] in range(0, MERGE_US, MERGE_STEP):
+        now = t[0]
+        if now % 400 == 0:
+            send(0, 0x90, (now // 400) & 0x7F, 100)
+        for i in range(1, NUM_MERGEIN):
+            if now % 10000 == i * 1000:
+                send(i, 0x90 + i, 60, 100)
+        if policy != None:
+            merger.service()
+        while fifo and now >= nextbyte:
+            del fifo[0]
+            nextbyte = now + 320
+    if policy == None:
+        busy = (sum(waits[0]) / len(waits[0]), max(waits[0]), 0)
+        quiet = [w for i in range(1, NUM_MERGEIN) for w in waits[i]]
+        return busy, (sum(quiet) / len(quiet), max(quiet))
+    q = merger.inputs
+    # Add on the time spent in the FIFO, which is at most 32 bytes
+    fifous = 32 * 320
+    busy = (q[0].latsum / q[0].sent + fifous, q[0].latmax + fifous, q[0].drops / (q[0].sent + q[0].drops))
+    sent = sum(q[i].sent for i in range(1, NUM_MERGEIN))
+    quiet = (sum(q[i].latsum for i in range(1, NUM_MERGEIN)) / sent + fifous,
+             max(q[i].latmax for i in range(1, NUM_MERGEIN)) + fifous)
+    return busy, quiet
+
+print ()
+print ("Merging:", NUM_MERGEIN, "inputs, wait in mS (worst case for the FIFO with the merger)")
+for name, policy in [("Direct", None),
+                     ("Merger, round robin", SimpleMIDIMerger.MERGE_ROUNDROBIN),
+                     ("Merger, oldest first", SimpleMIDIMerger.MERGE_OLDEST)]:
+    busy, quiet = mergeRun(policy)
+    print ("%-21s busy input: avg %7.1f max %7.1f (%4.1f%% dropped)   others: avg %7.1f max %7.1f" %
+           (name, busy[0]/1000, busy[1]/1000, 100*busy[2], quiet[0]/1000, quiet[1]/1000))
+
+# Passing MIDI from one port to another, as the routers do, reading
+# 64 bytes at a time.
+#   * Decode and send - each message is decoded into its parts by
+#     SimpleMIDIDecoder and put back together by SimpleMIDIEncoder
+#     (without running status, so every message is complete).
+#   * SimpleMIDIThru - finds where each message ends and passes the
+#     bytes on as they are.
+# The CircuitPython routers used to do the first of these with an
+# adafruit_midi message object for each message, which costs more
+# again, but adafruit_midi isn't needed here so isn't measured.
+THRU_CHUNK = 64
+
+class ThruPort:
+    def __init__(self, stream):
+        self.stream = stream
+        self.pos = 0
+    def readinto(self, buf):
+        n = min(len(buf), len(self.stream) - self.pos)
+        buf[:n] = self.stream[self.pos:self.pos+n]
+        self.pos += n
+        return n
+
+def thruDecode(stream, out):
+    enc = SimpleMIDIEncoder.SimpleMIDIEncoder(out, runningstatus=False)
+    def doSend(ch, cmd, d1, d2):
+        enc.send(cmd+ch-1, d1, d2)
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md.cbNoteOn (doSend)
+    md.cbNoteOff (doSend)
+    md.cbThru (doSend)
+    port = ThruPort(stream)
+    buf = bytearray(THRU_CHUNK)
+    mv = memoryview(buf)
+    start = time.perf_counter()
+    n = port.readinto(buf)
+    while n:
+        md.feed(mv[:n])
+        n = port.readinto(buf)
+    return time.perf_counter() - start
+
+def thruRaw(stream, out):
+    thru = SimpleMIDIThru.SimpleMIDIThru(ThruPort(stream), size=THRU_CHUNK)
+    start = time.perf_counter()
+    while thru.poll(out):
+        pass
+    return time.perf_counter() - start
+
+print ()
+stream = midiStream(NUM_MSGS)
+outputs = []
+for name, fn in [("Decode and send", thruDecode), ("SimpleMIDIThru", thruRaw)]:
+    out = bytearray()
+    secs = fn(stream, out.extend)
+    outputs.append(bytes(out))
+    report("Thru: " + name, len(stream), secs)
+print ("Thru: output", check("Thru", outputs[0] == outputs[1], "DIFFERS"))
+
+if failed:
+    print ()
+    for name in failed:
+        print ("FAILED:", name)
+    sys.exit(1)
@@ -0,0 +1,502 @@
+# MIDI Benchmark Suite
+# for desktop Python on the host computer
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Replays MIDI messages through the decoder, routers and the MIDI
+# handling in some of the projects, and reports for each:
+#
+#    bytes_per_sec, msgs_per_sec - throughput
+#    relative                    - throughput against reference code
+#    p50_us, p99_us              - time taken for each message
+#    alloc_bytes_per_msg         - memory allocated for each message
+#
+# as JSON, so that results can be kept and compared.  Run it with a
+# desktop Python from this directory.
+#
+# Example Usage:
+#
+#    python3 MIDIBenchmarkSuite.py
+#    python3 MIDIBenchmarkSuite.py --out results.json
+#    python3 MIDIBenchmarkSuite.py --baseline results.json
+#
+# With --baseline it exits with an error if any case has got more
+# than --tolerance (default 20%) slower than in the baseline, or
+# allocates that much more memory.  Throughput is the median of
+# several runs of at least 100mS each, compared using the relative
+# figure, so that a baseline can be re-run without the code changing
+# and still pass.
+#
+# With --profile it also sends the messages through SimpleMIDIMultiRxTx
+# with SimpleMIDIProfile.py, and adds how much memory is allocated for
+# each type of message, and by each of its send functions, under
+# "profile".
+#
+# The decoder cases can also replay a recording of raw MIDI bytes
+# (e.g. captured from a serial port) using --stream FILE.
+#
+# Allocation is measured with tracemalloc as the peak memory used
+# while handling each message.  This is desktop Python's memory, which
+# isn't the same as Micropython's (e.g. iterating over bytes or a tuple
+# allocates in both, but by different amounts), so it is best used to
+# spot changes rather than as an exact figure for the Pico.
+#
+# The projects are imported using the stand-ins in SimpleMIDIHost.py,
+# so this needs that and all the other Simple MIDI modules in this
+# area, and the MiniDexedTX816 area alongside it.
+#
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import SimpleMIDIHost
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TX816 = os.path.join(HERE, "..", "MiniDexedTX816")
+
+SimpleMIDIHost.install([TX816])
+SimpleMIDIHost.spiDevice(0, SimpleMIDIHost.MAX7219Model(2))
+SimpleMIDIHost.spiDevice(1, SimpleMIDIHost.MCP3008Model())
+
+import SimpleMIDIDecoder
+import SimpleMIDIRouter
+
+# -----------------------------------------------
+#
+#  Test messages
+#
+# -----------------------------------------------
+
+# Each message is a tuple of (cmd, ch, d1, d2), with ch 1 to 16
+# and d2 == -1 for single data byte messages, as the decoder
+# callbacks would see them.
+def randomMessages(nummsgs, seed=1, channels=16):
+    rnd = random.Random(seed)
+    msgs = []
+    playing = []
+    for i in range(nummsgs):
+        r = rnd.random()
+        ch = rnd.randrange(1, channels+1)
+        if (r < 0.3) or (playing and r < 0.6):
+            if playing and (r >= 0.3):
+                ch, note = playing.pop(rnd.randrange(len(playing)))
+                msgs.append((0x80, ch, note, 0))
+            else:
+                note = rnd.randrange(36, 96)
+                playing.append((ch, note))
+                msgs.append((0x90, ch, note, rnd.randrange(1, 128)))
+        elif (r < 0.9):
+            msgs.append((0xB0, ch, rnd.randrange(128), rnd.randrange(128)))
+        elif (r < 0.95):
+            msgs.append((0xC0, ch, rnd.randrange(128), -1))
+        else:
+            msgs.append((0xE0, ch, rnd.randrange(128), rnd.randrange(128)))
+    for ch, note in playing:
+        msgs.append((0x80, ch, note, 0))
+    return msgs
+
+# Turn messages into the bytes for each, using running status
+def messageBytes(msgs):
+    chunks = []
+    status = 0
+    for cmd, ch, d1, d2 in msgs:
+        b0 = cmd + ch - 1
+        data = [d1] if (d2 == -1) else [d1, d2]
+        if (b0 == status):
+            chunks.append(bytes(data))
+        else:
+            chunks.append(bytes([b0] + data))
+            status = b0
+    return chunks
+
+# Split a recording of raw MIDI into one chunk per message
+def streamChunks(stream):
+    chunks = []
+    def doMsg(*args):
+        chunks.append(len(chunk))
+    chunk = bytearray()
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md.cbNoteOn (doMsg)
+    md.cbNoteOff (doMsg)
+    md.cbThru (doMsg)
+    result = []
+    for b in stream:
+        chunk.append(b)
+        n = len(chunks)
+        md.read(b)
+        if (len(chunks) != n):
+            result.append(bytes(chunk))
+            chunk = bytearray()
+    return result
+
+# -----------------------------------------------
+#
+#  Measuring
+#
+# -----------------------------------------------
+# Throughput is the median of RUNS runs, each going over the messages
+# as many times as it takes to last at least MIN_SECS.  Only a
+# millisecond or so for each is too short to compare between runs.
+#
+# How fast the computer itself is running can change by more than the
+# tolerance from one moment to the next (other programs, power saving,
+# or a shared virtual machine), so each run is followed by the same
+# amount of time in a fixed piece of reference code.  The "relative"
+# figure is the throughput divided by the reference speed measured
+# alongside it, and that is what is compared with a baseline.
+RUNS = 5
+MIN_SECS = 0.1
+
+# Reference code: a little of everything the cases do
+def reference(loops):
+    table = bytearray(range(256))
+    total = 0
+    for i in range(loops):
+        mb = table[i & 0xFF]
+        if (mb & 0x80):
+            total += mb >> 4
+        else:
+            total += mb & 0x0F
+    return total
+
+# Loops of reference code per second, measured for MIN_SECS
+def referenceSpeed():
+    secs = 0
+    loops = 0
+    while (secs < MIN_SECS):
+        start = time.process_time()
+        reference(10000)
+        secs += time.process_time() - start
+        loops += 10000
+    return loops / secs
+
+def percentile(values, p):
+    return values[min(len(values)-1, int(len(values)*p/100))]
+
+# fn is called once for each item.  nbytes is the number of MIDI bytes
+# the items represent (0 if that doesn't apply), and reset (if given) is called before each pass
+# to put things back to how they started.
+def measure(fn, items, nbytes, reset=None):
+    # Throughput, taking the median of a few runs to
+    # smooth out anything else the computer is doing.
+    # The garbage collector is kept out of the timing, as timeit does,
+    # as how much work it has depends on what ran before.
+    rates = []
+    relative = []
+    gc.collect()
+    gc.disable()
+    for r in range(RUNS):
+        secs = 0
+        passes = 0
+        while (secs < MIN_SECS):
+            if reset:
+                reset()
+            start = time.process_time()
+            for item in items:
+                fn(item)
+            secs += time.process_time() - start
+            passes += 1
+        rates.append(passes / secs)
+        relative.append(passes / secs / referenceSpeed())
+    gc.enable()
+    rates.sort()
+    rate = rates[len(rates)//2]
+    relative.sort()
+    relative = relative[len(relative)//2]
+
+    # Time for each message
+    if reset:
+        reset()
+    clock = time.perf_counter_ns
+    times = []
+    for item in items:
+        t = clock()
+        fn(item)
+        times.append(clock() - t)
+    times.sort()
+
+    # Allocation for each message
+    if reset:
+        reset()
+    tracemalloc.start()
+    alloc = 0
+    for item in items:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(item)
+        alloc += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "msgs": len(items),
+        "bytes": nbytes,
+        "bytes_per_sec": round(nbytes * rate) if nbytes else None,
+        "msgs_per_sec": round(len(items) * rate),
+        "relative": round(len(items) * relative, 4),
+        "p50_us": round(percentile(times, 50) / 1000, 3),
+        "p99_us": round(percentile(times, 99) / 1000, 3),
+        "alloc_bytes_per_msg": round(alloc / len(items), 1),
+    }
+
+# -----------------------------------------------
+#
+#  Cases
+#
+# -----------------------------------------------
+def doNothing(*args):
+    pass
+
+def newDecoder():
+    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md.cbNoteOn (doNothing)
+    md.cbNoteOff (doNothing)
+    md.cbThru (doNothing)
+    return md
+
+def caseDecoderRead(chunks):
+    md = newDecoder()
+    read = md.read
+    def fn(chunk):
+        for b in chunk:
+            read(b)
+    return measure(fn, chunks, sum(len(c) for c in chunks))
+
+def caseDecoderFeed(chunks):
+    md = newDecoder()
+    return measure(md.feed, chunks, sum(len(c) for c in chunks))
+
+# The routing rules from SimpleMIDIMultiRxTx
+MIDIRT = [
+    [-1, -1, 2, 2],
+    [-1, -1, 3, 3],
+    [-1, -1, 4, 4],
+    [-1, -1, 5, 0],
+    [-1, -1, 0, 1],
+    [-1, -1, 0, 5],
+    [-1, -1, 1, 1],
+    [-1, -1, 1, 5],
+    [6, 0x80, 0, 4],
+    [6, 0x90, 0, 4],
+]
+NUM_SRC = 6
+
+# How SimpleMIDIMultiRxTx used to route, walking the rules every time
+def midiRouterList(s_ch, s_cmd, s_src):
+    d_dst = []
+    for r in MIDIRT:
+        ch,cmd,src,dst = r
+        if (ch == -1) or (s_ch == ch):
+            if (cmd == -1) or (s_cmd == cmd):
+                if (src == -1) or (s_src == src):
+                    d_dst.append(dst)
+    return set(d_dst)
+
+def routeItems(msgs):
+    return [(cmd, ch, i % NUM_SRC) for i, (cmd, ch, d1, d2) in enumerate(msgs)]
+
+def caseRouterList(msgs):
+    def fn(item):
+        cmd, ch, src = item
+        for d in midiRouterList(ch, cmd, src):
+            pass
+    return measure(fn, routeItems(msgs), 0)
+
+def caseRouterTable(msgs):
+    route = SimpleMIDIRouter.SimpleMIDIRouter(NUM_SRC, MIDIRT).route
+    def fn(item):
+        cmd, ch, src = item
+        for d in route(ch, cmd, src):
+            pass
+    return measure(fn, routeItems(msgs), 0)
+
+def caseNoteBalancer(msgs, balance=None):
+    import SimpleMIDINoteBalancer as nb
+    if balance is not None:
+        nb.BALANCE = balance
+    # Only the time spent in the code is being measured, so the
+    # PIO transmit FIFOs are never allowed to fill up.
+    for tx in nb.tx_uarts:
+        tx.sm.txfifo = None
+    midi2port = nb.midi2port
+    notes = [m for m in msgs if m[0] in (0x80, 0x90) and m[1] <= 3]
+    def fn(m):
+        midi2port(m[0], m[1], m[2])
+    result = measure(fn, notes, 3*len(notes), nb.balancerInit)
+    # How the notes from the last pass were spread over the ports
+    result["port_notes"] = nb.portNotes[:nb.NUM_PORTS]
+    return result
+
+def tx816():
+    import PicoTX816IOPanel as tx
+    for i in [0, 1]:
+        SimpleMIDIHost.uart(i).capture = False
+    return tx
+
+def tx816Send(tx):
+    toCommon = tx.midiSendToCommon
+    toInd = tx.midiSendToInd
+    def fn(m):
+        cmd, ch, d1, d2 = m
+        if not toCommon(cmd, ch, d1, d2):
+            toInd(cmd, ch, d1, d2)
+    return fn
+
+def caseTX816Ind(msgs):
+    tx = tx816()
+    for tg in range(1, 9):
+        tx.midiSetInd(tg)
+    return measure(tx816Send(tx), msgs, 3*len(msgs))
+
+def caseTX816Common(msgs):
+    tx = tx816()
+    for tg in range(1, 9):
+        tx.midiSetCommon(tg)
+    common = [(cmd, tx.MIDICOMCH, d1, d2) for cmd, ch, d1, d2 in msgs]
+    result = measure(tx816Send(tx), common, 3*len(common))
+    for tg in range(1, 9):
+        tx.midiSetInd(tg)
+    return result
+
+# -----------------------------------------------
+#
+#  Profiling
+#
+# -----------------------------------------------
+
+# Sends the messages through SimpleMIDIMultiRxTx using
+# SimpleMIDIProfile to see what allocates memory along the way.
+def profileMultiRxTx(msgs):
+    import SimpleMIDIMultiRxTx as mx
+    import SimpleMIDIProfile
+    for i in range(mx.HW_NUM_UARTS):
+        SimpleMIDIHost.uart(i).capture = False
+    # Only the time spent in the code is being measured, so the
+    # PIO transmit FIFOs are never allowed to fill up.
+    for i in range(mx.TX_NUM_UARTS):
+        SimpleMIDIHost.sm(mx.RX_NUM_UARTS+i).capture = False
+        SimpleMIDIHost.sm(mx.RX_NUM_UARTS+i).txfifo = None
+
+    prof = SimpleMIDIProfile.SimpleMIDIProfile()
+    for md in mx.md:
+        prof.wrapDecoder(md)
+    mx.midi_send = prof.wrap("midi_send", mx.midi_send)
+    mx.sched.service = prof.wrap("service", mx.sched.service)
+
+    rx = SimpleMIDIHost.uart(0)
+    for chunk in messageBytes(msgs):
+        rx.inject(chunk)
+        mx.poll()
+    return prof.results()
+
+# -----------------------------------------------
+#
+#  Main
+#
+# -----------------------------------------------
+def run(args):
+    msgs = randomMessages(args.msgs)
+    if args.stream:
+        with open(args.stream, "rb") as f:
+            chunks = streamChunks(f.read())
+    else:
+        chunks = messageBytes(msgs)
+
+    cases = [
+        ("decoder_read", lambda: caseDecoderRead(chunks)),
+        ("decoder_feed", lambda: caseDecoderFeed(chunks)),
+        ("router_list", lambda: caseRouterList(msgs)),
+        ("router_table", lambda: caseRouterTable(msgs)),
+        ("notebalancer_midi2port", lambda: caseNoteBalancer(msgs)),
+        ("notebalancer_first", lambda: caseNoteBalancer(msgs, 0)),
+        ("notebalancer_roundrobin", lambda: caseNoteBalancer(msgs, 1)),
+        ("notebalancer_leastloaded", lambda: caseNoteBalancer(msgs, 2)),
+        ("notebalancer_steal", lambda: caseNoteBalancer(msgs, 3)),
+        ("tx816_send_ind", lambda: caseTX816Ind(msgs)),
+        ("tx816_send_common", lambda: caseTX816Common(msgs)),
+    ]
+    results = {}
+    for name, fn in cases:
+        if (not args.case) or (name in args.case):
+            results[name] = fn()
+    results = {
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "msgs": args.msgs,
+        "stream": args.stream,
+        "cases": results,
+    }
+    if args.profile:
+        results["profile"] = profileMultiRxTx(msgs)
+    return results
+
+# Returns a list of problems compared to a baseline
+def compare(results, baseline, tolerance):
+    problems = []
+    for name, r in results["cases"].items():
+        b = baseline["cases"].get(name)
+        if not b:
+            continue
+        if ("relative" in b):
+            if r["relative"] < b["relative"] * (1 - tolerance):
+                problems.append("%s: %.4f msgs per reference loop, was %.4f" % (name, r["relative"], b["relative"]))
+        elif r["msgs_per_sec"] < b["msgs_per_sec"] * (1 - tolerance):
+            problems.append("%s: %d msgs/sec, was %d" % (name, r["msgs_per_sec"], b["msgs_per_sec"]))
+        if r["alloc_bytes_per_msg"] > b["alloc_bytes_per_msg"] * (1 + tolerance) + 1:
+            problems.append("%s: allocates %.1f bytes/msg, was %.1f" %
+                            (name, r["alloc_bytes_per_msg"], b["alloc_bytes_per_msg"]))
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="MIDI throughput and latency benchmarks")
+    parser.add_argument("--msgs", type=int, default=20000, help="number of messages")
+    parser.add_argument("--stream", help="file of raw MIDI bytes to use for the decoder")
+    parser.add_argument("--case", action="append", help="only run this case (can be repeated)")
+    parser.add_argument("--out", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against results from this file")
+    parser.add_argument("--profile", action="store_true", help="also report what allocates in SimpleMIDIMultiRxTx")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slow down (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print (text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for p in problems:
+            print ("REGRESSION:", p, file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
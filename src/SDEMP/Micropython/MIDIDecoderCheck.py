@@ -0,0 +1,239 @@
+# MIDI Decoder Check
+# for desktop Python on the host computer
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Host-side checks for SimpleMIDIDecoder.  It does not need a Pico -
+# run it with a desktop Python from this directory:
+#
+#    python3 MIDIDecoderCheck.py
+#
+# It prints a line for each check and exits with an error if any of
+# them fail.
+#
+# Conformance: random byte streams are replayed through SimpleMIDIDecoder
+# and through OldMIDIDecoder below, which is the decoder as it was before
+# status bytes were looked up in tables (walking through the commands one
+# at a time), and the callbacks they make must be identical.
+#
+# The old decoder used a first data byte of 0 to mean it didn't have one
+# yet, so the random data bytes are 1 to 127 to keep it in step.
+#
+# Data values: for every voice command, every value 0 to 127 is sent in
+# each data byte position (with the other data byte set to 0, 64 and
+# 127 in turn), both with a status byte on every message and using
+# running status.  Every message must come out once, with the right
+# values, and in the right order.  This is done with the decoder as it
+# is by default and with all its optional features switched on.
+#
+# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+#
+import random
+import sys
+import SimpleMIDIDecoder
+
+NUM_STREAMS = 200
+STREAM_LEN = 2000
+
+failed = 0
+
+def check(name, ok, detail=""):
+    global failed
+    if ok:
+        print ("OK    ", name)
+    else:
+        failed += 1
+        print ("FAILED", name, detail)
+
+# Records every callback, in order
+def logDecoder(md, log):
+    def doNoteOn(ch, cmd, d1, d2):
+        log.append(("on", ch, cmd, d1, d2))
+    def doNoteOff(ch, cmd, d1, d2):
+        log.append(("off", ch, cmd, d1, d2))
+    def doThru(ch, cmd, d1, d2):
+        log.append(("thru", ch, cmd, d1, d2))
+    md.cbNoteOn (doNoteOn)
+    md.cbNoteOff (doNoteOff)
+    md.cbThru (doThru)
+    return md
+
+# The original decoder, with only the parts needed for the callbacks
+class OldMIDIDecoder:
+
+    def __init__(self):
+        self.ch = 0
+        self.cmd = 0
+        self.d1 = 0
+        self.d2 = 0
+
+    def cbThru (self, callback):
+        self.ThruFn = callback
+
+    def cbNoteOn (self, callback):
+        self.NoteOnFn = callback
+
+    def cbNoteOff (self, callback):
+        self.NoteOffFn = callback
+
+    def read(self, mb):
+        if ((mb >= 0x80) and (mb <= 0xEF)):
+            self.cmd = mb & 0xF0
+            self.ch = 1 + (mb & 0x0F)
+            self.d1 = 0
+            self.d2 = 0
+        elif ((mb >= 0xF0) and (mb <= 0xF7)):
+            self.cmd = 0
+        elif ((mb >= 0xF8) and (mb <= 0xFF)):
+            pass
+        else:
+            if (self.cmd == 0):
+                return
+            if (self.cmd == 0x80):
+                if (self.d1 == 0):
+                    self.d1 = mb
+                else:
+                    self.d2 = mb
+                    self.NoteOffFn (self.ch, self.cmd, self.d1, self.d2)
+                    self.d1 = 0
+                    self.d2 = 0
+            elif (self.cmd == 0x90):
+                if (self.d1 == 0):
+                    self.d1 = mb
+                else:
+                    self.d2 = mb
+                    if (self.d2 == 0):
+                        self.NoteOffFn (self.ch, self.cmd, self.d1, self.d2)
+                    else:
+                        self.NoteOnFn (self.ch, self.cmd, self.d1, self.d2)
+                    self.d1 = 0
+                    self.d2 = 0
+            elif (self.cmd == 0xC0) or (self.cmd == 0xD0):
+                self.d1 = mb
+                self.ThruFn(self.ch, self.cmd, self.d1, -1)
+                self.d1 = 0
+            else:
+                if (self.d1 == 0):
+                    self.d1 = mb
+                else:
+                    self.d2 = mb
+                    self.ThruFn(self.ch, self.cmd, self.d1, self.d2)
+                    self.d1 = 0
+                    self.d2 = 0
+
+# Mostly data bytes, with voice status bytes, System Common (including
+# SysEx start and end) and Real-Time bytes scattered through, so that
+# messages are cut short, interrupted and use running status.
+def randomStream(rnd, length):
+    stream = bytearray()
+    for i in range(length):
+        r = rnd.random()
+        if r < 0.15:
+            stream.append(rnd.randrange(0x80, 0xF0))
+        elif r < 0.18:
+            stream.append(rnd.randrange(0xF0, 0xF8))
+        elif r < 0.21:
+            stream.append(rnd.randrange(0xF8, 0x100))
+        else:
+            stream.append(rnd.randrange(1, 0x80))
+    return stream
+
+def conformance():
+    rnd = random.Random(1)
+    mismatches = 0
+    callbacks = 0
+    for s in range(NUM_STREAMS):
+        stream = randomStream(rnd, STREAM_LEN)
+        oldlog = []
+        newlog = []
+        old = logDecoder(OldMIDIDecoder(), oldlog)
+        new = logDecoder(SimpleMIDIDecoder.SimpleMIDIDecoder(), newlog)
+        for mb in stream:
+            old.read(mb)
+        # Feed the new one in random sized pieces, as state must
+        # carry over from one buffer to the next.
+        i = 0
+        while i < len(stream):
+            n = rnd.randrange(1, 64)
+            new.feed(stream[i:i+n])
+            i += n
+        callbacks += len(oldlog)
+        if oldlog != newlog:
+            mismatches += 1
+    check("Conformance: %d random streams, %d callbacks" % (NUM_STREAMS, callbacks),
+          mismatches == 0, "(%d streams differ)" % mismatches)
+
+def doNothing(*args):
+    pass
+
+# What the decoder should report for one message
+def expected(status, d1, d2):
+    ch = 1 + (status & 0x0F)
+    cmd = status & 0xF0
+    if cmd == 0x80:
+        return ("off", ch, cmd, d1, d2)
+    if cmd == 0x90:
+        if d2 == 0:
+            return ("off", ch, cmd, d1, d2)
+        return ("on", ch, cmd, d1, d2)
+    if cmd == 0xC0 or cmd == 0xD0:
+        return ("thru", ch, cmd, d1, -1)
+    return ("thru", ch, cmd, d1, d2)
+
+def dataValues(name, **features):
+    for cmd in range(0x80, 0xF0, 0x10):
+        status = cmd + 5
+        twobytes = SimpleMIDIDecoder.MIDI_DATALEN[status] == 2
+        for running in [False, True]:
+            msgs = []
+            for other in [0, 64, 127]:
+                for v in range(128):
+                    msgs.append((v, other))
+                    if twobytes:
+                        msgs.append((other, v))
+            stream = bytearray()
+            want = []
+            for d1, d2 in msgs:
+                if not running or not stream:
+                    stream.append(status)
+                stream.append(d1)
+                if twobytes:
+                    stream.append(d2)
+                want.append(expected(status, d1, d2))
+            log = []
+            md = logDecoder(SimpleMIDIDecoder.SimpleMIDIDecoder(**features), log)
+            md.cbCC14 (doNothing)
+            md.feed(stream)
+            check("Data values (%s): 0x%02X %s, %d messages" %
+                  (name, cmd, "running status" if running else "status each time", len(msgs)),
+                  log == want, "(got %d callbacks)" % len(log))
+
+conformance()
+dataValues("default")
+dataValues("all features", sysex=True, realtime=True, common=True, cc14=True)
+
+if failed:
+    print (failed, "check(s) failed")
+    sys.exit(1)
@@ -24,10 +24,14 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 import machine
 import time
 import picokeypad as keypad
-import ustruct
+import SimpleMIDIEncoder
+import SimpleMIDIDecoder
 
 MIDI_CH = 1      # MIDI Channel 1 to 16
 MIDI_VOICE = 33  # MIDI Voice Number 1 to 128
@@ -38,6 +42,20 @@ midiNotes = [
 ]
 
 uart = machine.UART(0,31250)
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
+
+# If a MIDI clock is received the sequencer will follow it,
+# stepping once every CLOCKS_PER_STEP clocks (24 per beat)
+# while it is running and otherwise following its tempo.
+CLOCKS_PER_STEP = 24
+tempo = SimpleMIDIDecoder.MIDIClockTempo(diff=time.ticks_diff)
+md = SimpleMIDIDecoder.SimpleMIDIDecoder(realtime=True, clock=time.ticks_us)
+md.cbRealtime (tempo.realtime)
+def doMidiNothing(ch,cmd,d1,d2):
+    pass
+md.cbNoteOn (doMidiNothing)
+md.cbNoteOff (doMidiNothing)
+md.cbThru (doMidiNothing)
 
 keypad.init()
 keypad.set_brightness(1.0)
@@ -50,17 +68,18 @@ time_ms = 0
 step = 0
 lastnote = 0
 lastkey = -1
+laststep = -1
 
 def noteOn(x):
-    uart.write(ustruct.pack("bbb",0x90+MIDI_CH-1,x,127))
+    midiOut.noteOn(MIDI_CH,x,127)
     
 def noteOff(x):
-    uart.write(ustruct.pack("bbb",0x80+MIDI_CH-1,x,0))
+    midiOut.noteOff(MIDI_CH,x,0)
     
 def progChange(x):
     if (x<1 or x>128):
         return
-    uart.write(ustruct.pack("bb",0xC0+MIDI_CH-1,x-1))
+    midiOut.pc(MIDI_CH,x-1)
     
 # Based on code from https://github.com/sandyjmacdonald
 def colourwheel(pos):
@@ -97,9 +116,24 @@ while True:
                 lightUp(key)
             keypad.update()
 
-    # Play the sequencer on our time schedule
+    # Check for MIDI clock
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
+    if (tempo.bpm()):
+        TEMPO = tempo.bpm()
+
+    # Play the sequencer on the MIDI clock if it is running,
+    # otherwise on our own time schedule.
     newtime_ms = time.ticks_ms()
-    if (newtime_ms > time_ms):
+    if (tempo.running):
+        # NB: The first clock after a Start is the first step
+        clockstep = (tempo.ticks - 1) // CLOCKS_PER_STEP
+        wakeup = (clockstep >= 0) and (clockstep != laststep)
+        laststep = clockstep
+    else:
+        wakeup = (newtime_ms > time_ms)
+    if (wakeup):
         # Time to wake up!
         
         # Calculate the next "tick" millisecond counter from the TEMPO
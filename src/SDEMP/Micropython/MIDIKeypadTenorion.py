@@ -24,10 +24,13 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 import machine
 import time
 import picokeypad as keypad
-import ustruct
+import SimpleMIDIEncoder
 
 MIDI_CH = 1      # MIDI Channel 1 to 16
 MIDI_VOICE = 33  # MIDI Voice Number 1 to 128
@@ -46,6 +49,8 @@ midiNotes4 = [
 ]
 
 uart = machine.UART(0,31250)
+# All MIDI is sent using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 keypad.init()
 keypad.set_brightness(1.0)
@@ -62,15 +67,15 @@ lastnote = 0
 lastkey = -1
 
 def noteOn(x):
-    uart.write(ustruct.pack("bbb",0x90+MIDI_CH-1,x,127))
+    midiOut.noteOn(MIDI_CH,x,127)
     
 def noteOff(x):
-    uart.write(ustruct.pack("bbb",0x80+MIDI_CH-1,x,0))
+    midiOut.noteOff(MIDI_CH,x,0)
     
 def progChange(x):
     if (x<1 or x>128):
         return
-    uart.write(ustruct.pack("bb",0xC0+MIDI_CH-1,x-1))
+    midiOut.pc(MIDI_CH,x-1)
     
 def lightUp(x):
     keypad.illuminate(x, 0, 50, 50)
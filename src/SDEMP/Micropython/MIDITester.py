@@ -25,9 +25,12 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 import machine
 import utime
-import ustruct
+import SimpleMIDIEncoder
 import random
 
 CH = 1
@@ -35,6 +38,8 @@ CH = 1
 pin = machine.Pin(25, machine.Pin.OUT)
 uart1 = machine.UART(0,31250)
 uart2 = machine.UART(1,31250)
+midiOut1 = SimpleMIDIEncoder.SimpleMIDIEncoder(uart1.write)
+midiOut2 = SimpleMIDIEncoder.SimpleMIDIEncoder(uart2.write)
 
 # C3 D3 E3 F3 G3 A3 B3   C4 D4 E4 F4 G4 A4 B4   C5 D5 E5 F5 G5 A5 B5 C6
 # 48 50 52 53 55 57 59   60 62 64 65 67 69 71   72 74 76 77 79 81 83 84
@@ -48,12 +53,12 @@ diff  = random.randint(100,500)
 while True:
     for x in notes:
         pin.value(1)
-        uart1.write(ustruct.pack("bbb",0x90|(CH-1),x,127))
+        midiOut1.noteOn(CH,x,127)
         utime.sleep_ms(diff)
-        uart2.write(ustruct.pack("bbb",0x90|(CH),x+12,127))
+        midiOut2.noteOn(CH+1,x+12,127)
         utime.sleep_ms(120)
         pin.value(0)
         utime.sleep_ms(tempo)
-        uart1.write(ustruct.pack("bbb",0x80|(CH-1),x,0))
+        midiOut1.noteOff(CH,x,0)
         utime.sleep_ms(diff)
-        uart2.write(ustruct.pack("bbb",0x80|(CH),x+12,0))
+        midiOut2.noteOff(CH+1,x+12,0)
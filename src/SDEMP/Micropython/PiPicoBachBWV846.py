@@ -25,12 +25,17 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 import machine
 import utime
-import ustruct
+import SimpleMIDIEncoder
 
 pin = machine.Pin(25, machine.Pin.OUT)
 uart = machine.UART(1,31250)
+# All MIDI is sent using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 # C3 D3 E3 F3 G3 A3 B3   C4 D4 E4 F4 G4 A4 B4   C5 D5 E5 F5 G5 A5 B5 C6
 # 48 50 52 53 55 57 59   60 62 64 65 67 69 71   72 74 76 77 79 81 83 84
@@ -73,22 +78,22 @@ notes = [
 
 for x in notes:
     pin.value(1)
-    uart.write(ustruct.pack("bbb",0x90,x,127))
+    midiOut.noteOn(1,x,127)
     utime.sleep_ms(120)
     pin.value(0)
     utime.sleep_ms(50)
-    uart.write(ustruct.pack("bbb",0x80,x,0))
+    midiOut.noteOff(1,x,0)
 
 pin.value(1)
-uart.write(ustruct.pack("bbb",0x90,36,127))
-uart.write(ustruct.pack("bbb",0x90,48,127))
-uart.write(ustruct.pack("bbb",0x90,64,127))
-uart.write(ustruct.pack("bbb",0x90,67,127))
-uart.write(ustruct.pack("bbb",0x90,72,127))
+midiOut.noteOn(1,36,127)
+midiOut.noteOn(1,48,127)
+midiOut.noteOn(1,64,127)
+midiOut.noteOn(1,67,127)
+midiOut.noteOn(1,72,127)
 utime.sleep_ms(2000)
 pin.value(0)
-uart.write(ustruct.pack("bbb",0x80,36,127))
-uart.write(ustruct.pack("bbb",0x80,48,127))
-uart.write(ustruct.pack("bbb",0x80,64,127))
-uart.write(ustruct.pack("bbb",0x80,67,127))
-uart.write(ustruct.pack("bbb",0x80,72,127))
+midiOut.noteOff(1,36,127)
+midiOut.noteOff(1,48,127)
+midiOut.noteOff(1,64,127)
+midiOut.noteOff(1,67,127)
+midiOut.noteOff(1,72,127)
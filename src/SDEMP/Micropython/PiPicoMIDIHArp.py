@@ -24,13 +24,18 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 import machine
-import ustruct
+import SimpleMIDIEncoder
 import picowireless
 from time import sleep
 
 led  = machine.Pin(25, machine.Pin.OUT)
 uart = machine.UART(0,31250)
+# All MIDI is sent using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 ssid=[]
 channel=[]
@@ -94,11 +99,11 @@ def ssid2Midi (c):
 
 def midiNoteOn (note, vel):
     #print ("NoteOn:", note, " (", vel, ")")
-    uart.write(ustruct.pack("bbb",0x90+MIDICH-1,note,vel))
+    midiOut.noteOn(MIDICH,note,vel)
 
 def midiNoteOff (note):
     #print ("NoteOff:", note)
-    uart.write(ustruct.pack("bbb",0x80+MIDICH-1,note,0))
+    midiOut.noteOff(MIDICH,note,0)
 
 scanNetworks()
 printNetworks()
@@ -24,13 +24,18 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 from machine import Pin
 from machine import UART
 import utime
-import ustruct
+import SimpleMIDIEncoder
 
 led = Pin(25, Pin.OUT)
 uart = UART(0,31250)
+# All MIDI is sent using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 # Details of how to make a keyboard matrix
 # http://blog.komar.be/how-to-make-a-keyboard-the-matrix/
@@ -43,10 +48,10 @@ lastnote = []
 
 def midiNoteOn(x):
     led.value(1)
-    uart.write(ustruct.pack("bbb",0x90,x,127))
+    midiOut.noteOn(1,x,127)
 
 def midiNoteOff(x):
-    uart.write(ustruct.pack("bbb",0x80,x,0))
+    midiOut.noteOff(1,x,0)
     led.value(0)
 
 # Switch OFF will be HIGH (operating in PULL_UP mode)
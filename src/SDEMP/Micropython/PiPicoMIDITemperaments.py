@@ -24,12 +24,13 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py and SimpleMIDIVoiceAllocator.py modules
+# from @diyelectromusic too.
 #
 import machine
 import utime
-import ustruct
 import PIOBeep
+import SimpleMIDIVoiceAllocator
 import SimpleMIDIDecoder
 
 # Serial port handling for MIDI
@@ -48,7 +49,6 @@ hinote  = 105  # A7 Last MIDI note supported
 playnote = []
 lastnote = []
 osc = []
-oscuse = []
 midi2tet = []
 midi2jst = []
 numnotes = hinote-lownote+1
@@ -60,28 +60,26 @@ def noteOn(x):
     if (x<lownote) or (x>hinote):
         return
 
-    # Find a free oscillator
-    for o in range(0, numosc):
-        if (oscuse[o] == 0):
-            oscuse[o] = x
-            if (mode):
-                freq = midi2jst[x-lownote]
-            else:
-                freq = midi2tet[x-lownote]
-            osc[o].note_on(freq)
-            print (o, ": Note On:  ", x, " (", freq, ")")
-            return
+    # Find a free oscillator, or take over the one that has
+    # been playing longest if they are all in use
+    o = voices.noteOn(x)
+    if (o != -1):
+        if (mode):
+            freq = midi2jst[x-lownote]
+        else:
+            freq = midi2tet[x-lownote]
+        osc[o].note_on(freq)
+        print (o, ": Note On:  ", x, " (", freq, ")")
 
 def noteOff(x):
     if (x<lownote) or (x>hinote):
         return
 
     # Find the playing oscillator and turn it off
-    for o in range(0, numosc):
-        if (oscuse[o] == x):
-            osc[o].note_off()
-            oscuse[o] = 0    
-            print (o, ": Note Off: ", x)
+    o = voices.noteOff(x)
+    if (o != -1):
+        osc[o].note_off()
+        print (o, ": Note Off: ", x)
 
 # Initialise the oscillators...
 # Note: This uses pins that don't clash with the Pimoroni Keypad or Audio Packs
@@ -89,7 +87,7 @@ osc_pins = [9,12,13,14,15,16,20,21]
 numosc = len(osc_pins)
 for o in range(0, numosc):
     osc.append(PIOBeep.PIOBeep(o,osc_pins[o]))
-    oscuse.append(0)
+voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(numosc, SimpleMIDIVoiceAllocator.STEAL_OLDEST)
 
 # Pre-calculate the frequency values to use for the oscillators
 for n in range(0, numnotes):
@@ -129,8 +127,9 @@ md.cbNoteOff (doMidiNoteOff)
 
 while True:
     # Now check for MIDI messages too
-    if (uart.any()):
-        md.read(uart.read(1)[0])
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
 
     # Check the buttons to see what mode we're in
     btn1 = button1.value()
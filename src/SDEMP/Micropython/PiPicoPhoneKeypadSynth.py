@@ -24,13 +24,18 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIEncoder.py and SimpleMIDIDecoder.py modules
+# from @diyelectromusic too.
+#
 from machine import Pin
 from machine import UART
 import utime
-import ustruct
+import SimpleMIDIEncoder
 
 led = Pin(25, Pin.OUT)
 uart = UART(0,31250)
+# All MIDI is sent using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 # General MIDI program voice list
 # Note: voicesets and voices are numbered from 0
@@ -106,16 +111,16 @@ voice = 0
 
 def midiNoteOn(x):
     led.value(1)
-    uart.write(ustruct.pack("bbb",0x90,x+octave*12,127))
+    midiOut.noteOn(1,x+octave*12,127)
 
 def midiNoteOff(x):
-    uart.write(ustruct.pack("bbb",0x80,x+octave*12,0))
+    midiOut.noteOff(1,x+octave*12,0)
     led.value(0)
     
 def midiProgramChange():
     global voiceset, voice
     program = voiceset*8 + voice
-    uart.write(ustruct.pack("bb",0xC0,program))
+    midiOut.pc(1,program)
 
 def keypadOn(x):
     global octave, voiceset, voice
@@ -24,10 +24,12 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIVoiceAllocator.py module from @diyelectromusic too.
+#
 from machine import Pin
 import utime
-import ustruct
 import PIOBeep
+import SimpleMIDIVoiceAllocator
 
 # Details of how to make a keyboard matrix
 # http://blog.komar.be/how-to-make-a-keyboard-the-matrix/
@@ -39,32 +41,29 @@ cols = []
 playnote = []
 lastnote = []
 osc = []
-oscuse = []
 midi2osc = []
 
 def noteOn(x):
-    # Find a free oscillator
-    for o in range(0, numosc):
-        if (oscuse[o] == 0):
-            oscuse[o] = x
-            osc[o].note_on(midi2osc[x-firstnote])
-            print (o, ": Note On:  ", x, " (", midi2osc[x-firstnote], ")")
-            return
+    # Find a free oscillator, or take over the one that has
+    # been playing longest if they are all in use
+    o = voices.noteOn(x)
+    if (o != -1):
+        osc[o].note_on(midi2osc[x-firstnote])
+        print (o, ": Note On:  ", x, " (", midi2osc[x-firstnote], ")")
 
 def noteOff(x):
     # Find the playing oscillator and turn it off
-    for o in range(0, numosc):
-        if (oscuse[o] == x):
-            osc[o].note_off()
-            oscuse[o] = 0    
-            print (o, ": Note Off: ", x)
+    o = voices.noteOff(x)
+    if (o != -1):
+        osc[o].note_off()
+        print (o, ": Note Off: ", x)
 
 # Initialise the oscillators...
 osc_pins = [14,15,16,17,18,19,20,21]
 numosc = len(osc_pins)
 for o in range(0, numosc):
     osc.append(PIOBeep.PIOBeep(o,osc_pins[o]))
-    oscuse.append(0)
+voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(numosc, SimpleMIDIVoiceAllocator.STEAL_OLDEST)
 
 # Switch OFF will be HIGH (operating in PULL_UP mode)
 row_pins = [3,2,5,4,6,8,7,10,9,12,11,13]
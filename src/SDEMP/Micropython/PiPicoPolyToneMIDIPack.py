@@ -24,10 +24,12 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIVoiceAllocator.py module from @diyelectromusic too.
+#
 from machine import Pin
 import utime
-import ustruct
 import PIOBeep
+import SimpleMIDIVoiceAllocator
 
 # Serial port handling for MIDI
 pin = machine.Pin(25, machine.Pin.OUT)
@@ -39,7 +41,6 @@ hinote  = 105  # A7 Last MIDI note supported
 playnote = []
 lastnote = []
 osc = []
-oscuse = []
 midi2osc = []
 numnotes = hinote-lownote+1
 
@@ -47,24 +48,22 @@ def noteOn(x):
     if (x<lownote) or (x>hinote):
         return
 
-    # Find a free oscillator
-    for o in range(0, numosc):
-        if (oscuse[o] == 0):
-            oscuse[o] = x
-            osc[o].note_on(midi2osc[x-lownote])
-            print (o, ": Note On:  ", x, " (", midi2osc[x-lownote], ")")
-            return
+    # Find a free oscillator, or take over the one that has
+    # been playing longest if they are all in use
+    o = voices.noteOn(x)
+    if (o != -1):
+        osc[o].note_on(midi2osc[x-lownote])
+        print (o, ": Note On:  ", x, " (", midi2osc[x-lownote], ")")
 
 def noteOff(x):
     if (x<lownote) or (x>hinote):
         return
 
     # Find the playing oscillator and turn it off
-    for o in range(0, numosc):
-        if (oscuse[o] == x):
-            osc[o].note_off()
-            oscuse[o] = 0    
-            print (o, ": Note Off: ", x)
+    o = voices.noteOff(x)
+    if (o != -1):
+        osc[o].note_off()
+        print (o, ": Note Off: ", x)
 
 # Initialise the oscillators...
 # Note: This uses pins that don't clash with the Pimoroni Keypad or Audio Packs
@@ -72,7 +71,7 @@ osc_pins = [9,12,13,14,15,16,20,21]
 numosc = len(osc_pins)
 for o in range(0, numosc):
     osc.append(PIOBeep.PIOBeep(o,osc_pins[o]))
-    oscuse.append(0)
+voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(numosc, SimpleMIDIVoiceAllocator.STEAL_OLDEST)
 
 # Pre-calculate the frequency values to use for the oscillators
 for n in range(0, numnotes):
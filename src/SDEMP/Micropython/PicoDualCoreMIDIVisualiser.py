@@ -29,10 +29,11 @@
 #
 import time
 import machine
-import ustruct
 import _thread
 import gc
 import SimpleMIDIDecoder
+import SimpleMIDIEncoder
+import SimpleMIDIRing
 from PicoRGBLED import NeoPixel
 from Pico8SEGLED import LED_8SEG, KILOBIT, HUNDREDS, TENS, UNITS, Dot
 
@@ -100,6 +101,9 @@ from Pico8SEGLED import LED_8SEG, KILOBIT, HUNDREDS, TENS, UNITS, Dot
 #        a) Update the 8SEG LED display based on the value set in the original thread.
 #        b) Run periodic "garbage collection" for Micropython.
 #
+#   The value for the 8SEG display is passed between the two threads using
+#   a SimpleMIDIRing, so they never both update the same variable.
+#
 #   I don't know why garbage collection is needed, but without it, everything
 #   grinds to a halt!
 #
@@ -109,6 +113,8 @@ from Pico8SEGLED import LED_8SEG, KILOBIT, HUNDREDS, TENS, UNITS, Dot
 # Initialise the serial and MIDI handling
 #
 uart = machine.UART(0,31250)
+# MIDI is passed on using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 # Size of the LED array
 w = 16
@@ -124,7 +130,7 @@ def doMidiNoteOn(ch, cmd, note, vel):
     setMidiLed(note)
     playing[note]+=1
     segMIDI(ch, cmd, note, vel)
-    uart.write(ustruct.pack("bbb",cmd+ch,note,vel))
+    midiOut.send(cmd+ch-1,note,vel)
 
 def doMidiNoteOff(ch, cmd, note, vel):
 #    print ("Note Off\t", note, "\t", vel)
@@ -133,16 +139,13 @@ def doMidiNoteOff(ch, cmd, note, vel):
         clearMidiLed(note)
         playing[note] = 0
     segMIDI(ch, cmd, note, vel)
-    uart.write(ustruct.pack("bbb",cmd+ch,note,vel))
+    midiOut.send(cmd+ch-1,note,vel)
 
 def doMidiThru(ch, cmd, d1, d2):
     segMIDI(ch, cmd, d1, d2)
-    if (d2 == -1):
-        #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1)
-        uart.write(ustruct.pack("bb",cmd+ch,d1))
-    else:
-        #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1, "\t", d2)
-        uart.write(ustruct.pack("bbb",cmd+ch,d1,d2))
+    #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1, "\t", d2)
+    # The encoder knows when there is only one data byte
+    midiOut.send(cmd+ch-1,d1,d2)
 
 md = SimpleMIDIDecoder.SimpleMIDIDecoder()
 md.cbNoteOn (doMidiNoteOn)
@@ -156,18 +159,15 @@ md.cbThru (doMidiThru)
 
 # Using default GP9,10,11
 LED = LED_8SEG()
-LEDValue = 0 # Don't use this directly, use the set/get routines
-def segInit():
-    setLEDValue(0)
-
-# Access functions for the shared LEDValue
-def getLEDValue():
-    global LEDValue
-    return LEDValue
 
-def setLEDValue(value):
+# The main thread adds each MIDI message to be displayed to segRing
+# and the second thread picks them up, showing the most recent.
+# LEDValue is only ever used by the second thread.
+segRing = SimpleMIDIRing.SimpleMIDIRing(16)
+LEDValue = 0
+def segInit():
     global LEDValue
-    LEDValue = value
+    LEDValue = 0
 
 # Set dimensions of the MIDI display
 MIDI_W  = 12
@@ -202,18 +202,21 @@ def segDec (v, dot):
     LED.write_cmd(KILOBIT,LED.SEG8[(v%10000)//1000])
 
 def segScan ():
-    ledvalue = getLEDValue()
-    segHex(ledvalue, Dot)
-    #print ("2: LEDValue=", hex(ledvalue))
+    global LEDValue
+    ev = segRing.get()
+    while (ev != -1):
+        # Display can only show two bytes, the command and first data byte...
+        LEDValue = ev >> 8
+        ev = segRing.get()
+    segHex(LEDValue, Dot)
+    #print ("2: LEDValue=", hex(LEDValue))
 
 def segMIDI(ch, cmd, d1, d2):
     # Fudge so that passing in 0 will still print 0...
     if (ch == 0):
         ch = 1
-    # Display can only show two bytes...
-    ledvalue = (((cmd|(ch-1))<<8)+d1)
-    setLEDValue(ledvalue)
-    #print ("1: LEDValue=", hex(ledvalue))
+    segRing.put(cmd|(ch-1), d1)
+    #print ("1: LEDValue=", hex(((cmd|(ch-1))<<8)+d1))
 
 # -------------------------------------------------------
 #
@@ -280,6 +283,22 @@ def clearMidiLed (mnote):
     x, y = midi2pixel(mnote)
     ledOff(x, y)
 
+# Set PROFILE to True to find out how much memory is allocated for
+# each type of MIDI message and when updating the displays, and how
+# often the garbage collector runs in the middle of them.  Stop the
+# program and use prof.dump() from the REPL to see the results.
+#
+# NB: Anything allocated by the second thread at the same time
+#     (see below) will be counted too.
+PROFILE = False
+if (PROFILE):
+    import SimpleMIDIProfile
+    prof = SimpleMIDIProfile.SimpleMIDIProfile()
+    prof.wrapDecoder(md)
+    setMidiLed = prof.wrap("setMidiLed", setMidiLed)
+    clearMidiLed = prof.wrap("clearMidiLed", clearMidiLed)
+    segMIDI = prof.wrap("segMIDI", segMIDI)
+
 
 # -------------------------------------------------------
 #
@@ -337,5 +356,6 @@ while True:
         scancounter = 0
 
     # Check for MIDI messages
-    if (uart.any()):
-        md.read(uart.read(1)[0])
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
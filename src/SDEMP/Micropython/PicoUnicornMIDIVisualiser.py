@@ -28,30 +28,29 @@
 import picounicorn
 import time
 import machine
-import ustruct
 import SimpleMIDIDecoder
+import SimpleMIDIEncoder
 
 # Initialise the serial MIDI handling
 uart = machine.UART(0,31250)
+# MIDI is passed on using an encoder, so no memory is allocated for each message
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 # MIDI callback routines
 def doMidiNoteOn(ch, cmd, note, vel):
 #    print ("Note On\t", note, "\t", vel)
     setMidiLed(note)
-    uart.write(ustruct.pack("bbb",cmd+ch,note,vel))
+    midiOut.send(cmd+ch-1,note,vel)
 
 def doMidiNoteOff(ch, cmd, note, vel):
 #    print ("Note Off\t", note, "\t", vel)
     clearMidiLed(note)
-    uart.write(ustruct.pack("bbb",cmd+ch,note,vel))
+    midiOut.send(cmd+ch-1,note,vel)
 
 def doMidiThru(ch, cmd, d1, d2):
-    if (d2 == -1):
-        #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1)
-        uart.write(ustruct.pack("bb",cmd+ch,d1))
-    else:
-        #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1, "\t", d2)
-        uart.write(ustruct.pack("bbb",cmd+ch,d1,d2))
+    #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1, "\t", d2)
+    # The encoder knows when there is only one data byte
+    midiOut.send(cmd+ch-1,d1,d2)
 
 md = SimpleMIDIDecoder.SimpleMIDIDecoder()
 md.cbNoteOn (doMidiNoteOn)
@@ -140,6 +139,7 @@ clearDisplay()
 
 while True:
     # Check for MIDI messages
-    if (uart.any()):
-        md.read(uart.read(1)[0])
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
 
@@ -24,11 +24,15 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIDecoder.py and SimpleMIDIVoiceAllocator.py modules
+# from @diyelectromusic too.
+#
 import machine
 import time
 import picokeypad as keypad
-import ustruct
 import PIOBeep
+import SimpleMIDIVoiceAllocator
+import SimpleMIDIDecoder
 
 #
 # Definitions for the notes played by the grid
@@ -48,6 +52,20 @@ midiNotes3 = [
     67,69,72,74,76,79,81,84,86,88,91 # Pentatonic
 ]
 
+# If a MIDI clock is received on UART 0 the sequencer will follow
+# it, stepping once every CLOCKS_PER_STEP clocks (24 per beat)
+# while it is running and otherwise following its tempo.
+uart = machine.UART(0,31250)
+CLOCKS_PER_STEP = 24
+tempo = SimpleMIDIDecoder.MIDIClockTempo(diff=time.ticks_diff)
+md = SimpleMIDIDecoder.SimpleMIDIDecoder(realtime=True, clock=time.ticks_us)
+md.cbRealtime (tempo.realtime)
+def doMidiNothing(ch,cmd,d1,d2):
+    pass
+md.cbNoteOn (doMidiNothing)
+md.cbNoteOff (doMidiNothing)
+md.cbThru (doMidiNothing)
+
 keypad.init()
 keypad.set_brightness(1.0)
 NUM_NOTES = len(midiNotes1)
@@ -59,6 +77,7 @@ time_ms = 0
 step = 0
 lastnote = 0
 lastkey = -1
+laststep = -1
 
 #
 # Definitions for the frequencies the tone() side will respond to
@@ -68,7 +87,6 @@ lowfreq = 55   # A1 Frequency
 hinote  = 105  # A7 Last MIDI note supported
 playnote = []
 osc = []
-oscuse = []
 midi2osc = []
 numnotes = hinote-lownote+1
 
@@ -86,22 +104,20 @@ def noteOn(x):
     if (x<lownote) or (x>hinote):
         return
 
-    # Find a free oscillator
-    for o in range(0, numosc):
-        if (oscuse[o] == 0):
-            oscuse[o] = x
-            osc[o].note_on(midi2osc[x-lownote])
-            return
+    # Find a free oscillator, or take over the one that has
+    # been playing longest if they are all in use
+    o = voices.noteOn(x)
+    if (o != -1):
+        osc[o].note_on(midi2osc[x-lownote])
 
 def noteOff(x):
     if (x<lownote) or (x>hinote):
         return
 
     # Find the playing oscillator and turn it off
-    for o in range(0, numosc):
-        if (oscuse[o] == x):
-            osc[o].note_off()
-            oscuse[o] = 0
+    o = voices.noteOff(x)
+    if (o != -1):
+        osc[o].note_off()
 
 # Initialise the oscillators...
 # Note: This uses pins that don't clash with the Pimoroni Keypad or Audio Packs
@@ -109,7 +125,7 @@ osc_pins = [9,12,13,14,15,16,20,21]
 numosc = len(osc_pins)
 for o in range(0, numosc):
     osc.append(PIOBeep.PIOBeep(o,osc_pins[o]))
-    oscuse.append(0)
+voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(numosc, SimpleMIDIVoiceAllocator.STEAL_OLDEST)
 
 # Pre-calculate the frequency values to use for the oscillators
 for n in range(0, numnotes):
@@ -156,9 +172,24 @@ while True:
                 lightUp(key)
             keypad.update()
 
-    # Play the sequencer on our time schedule
+    # Check for MIDI clock
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
+    if (tempo.bpm()):
+        TEMPO = tempo.bpm()
+
+    # Play the sequencer on the MIDI clock if it is running,
+    # otherwise on our own time schedule.
     newtime_ms = time.ticks_ms()
-    if (newtime_ms > time_ms):
+    if (tempo.running):
+        # NB: The first clock after a Start is the first step
+        clockstep = (tempo.ticks - 1) // CLOCKS_PER_STEP
+        wakeup = (clockstep >= 0) and (clockstep != laststep)
+        laststep = clockstep
+    else:
+        wakeup = (newtime_ms > time_ms)
+    if (wakeup):
         # Time to wake up!
         
         # Calculate the next "tick" millisecond counter from the TEMPO
@@ -24,11 +24,13 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
+# This needs the SimpleMIDIVoiceAllocator.py module from @diyelectromusic too.
+#
 import machine
 import time
 import picokeypad as keypad
-import ustruct
 import PIOBeep
+import SimpleMIDIVoiceAllocator
 
 #
 # Definitions for the IO connections on the "tone pack"
@@ -79,7 +81,6 @@ lowfreq = 55   # A1 Frequency
 hinote  = 105  # A7 Last MIDI note supported
 playnote = []
 osc = []
-oscuse = []
 midi2osc = []
 numnotes = hinote-lownote+1
 
@@ -97,22 +98,20 @@ def noteOn(x):
     if (x<lownote) or (x>hinote):
         return
 
-    # Find a free oscillator
-    for o in range(0, numosc):
-        if (oscuse[o] == 0):
-            oscuse[o] = x
-            osc[o].note_on(midi2osc[x-lownote])
-            return
+    # Find a free oscillator, or take over the one that has
+    # been playing longest if they are all in use
+    o = voices.noteOn(x)
+    if (o != -1):
+        osc[o].note_on(midi2osc[x-lownote])
 
 def noteOff(x):
     if (x<lownote) or (x>hinote):
         return
 
     # Find the playing oscillator and turn it off
-    for o in range(0, numosc):
-        if (oscuse[o] == x):
-            osc[o].note_off()
-            oscuse[o] = 0
+    o = voices.noteOff(x)
+    if (o != -1):
+        osc[o].note_off()
 
 # Initialise the oscillators...
 # Note: This uses pins that don't clash with the Pimoroni Keypad or Audio Packs
@@ -120,7 +119,7 @@ osc_pins = [9,12,13,14,15,16,20,21]
 numosc = len(osc_pins)
 for o in range(0, numosc):
     osc.append(PIOBeep.PIOBeep(o,osc_pins[o]))
-    oscuse.append(0)
+voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(numosc, SimpleMIDIVoiceAllocator.STEAL_OLDEST)
 
 # Pre-calculate the frequency values to use for the oscillators
 for n in range(0, numnotes):
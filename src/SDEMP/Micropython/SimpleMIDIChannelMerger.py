@@ -25,18 +25,40 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py, SimpleMIDIEncoder.py,
+# SimpleMIDIMerger.py and SimpleMIDIPIORx.py modules from
+# @diyelectromusic too.
 #
 import machine
 import rp2
-import ustruct
+import utime
 import SimpleMIDIDecoder
+import SimpleMIDIMerger
+import SimpleMIDIPIORx
 
 UART_BAUD = 31250
 PIN_BASE = 6
 NUM_UARTS = 8
 
 tx_uart = machine.UART(0,31250)
+
+# The merger only writes what the UART can take without blocking.
+# Its hardware FIFO is empty once everything has been sent.
+TX_UART_FIFO = 32
+def txReady():
+    if (tx_uart.txdone()):
+        return TX_UART_FIFO
+    return 0
+
+# All the inputs are merged onto one output.  Each input has its
+# own queue and they take it in turns, whole messages at a time, so
+# a busy input can't hold up the others and SysEx isn't split up.
+# Running status is used to make the most of the time available.
+# The queues are sized to hold the largest SysEx the decoders below
+# will pass on (SimpleMIDIMerger.MERGE_SYSEXMAX).
+# Use merger.dump() from the REPL to see how busy it has been.
+merger = SimpleMIDIMerger.SimpleMIDIMerger(tx_uart.write, NUM_UARTS, policy=SimpleMIDIMerger.MERGE_ROUNDROBIN,
+                                           clock=utime.ticks_us, diff=utime.ticks_diff, ready=txReady)
 pin = machine.Pin(25, machine.Pin.OUT)
 
 # PIO code taken from 
@@ -80,39 +102,54 @@ for i in range(NUM_UARTS):
 #    sm.irq(handler) - We're ignoring any "break" indications from the state machine
     sm.active(1)
     rx_uarts.append(sm)
-
-def midi_send(cmd, ch, b1, b2):
-    if (b2 == -1):
-        tx_uart.write(ustruct.pack("bb",cmd+ch-1,b1))
-    else:
-        tx_uart.write(ustruct.pack("bbb",cmd+ch-1,b1,b2))
+# The state machines are read all together, only looking
+# at those with something waiting.
+pio_rx = SimpleMIDIPIORx.SimpleMIDIPIORx(rx_uarts, 0)
 
 # Basic MIDI handling commands.
 # These will only be called when a MIDI decoder
-# has a complete MIDI message to send.
-def doMidiNoteOn(ch,cmd,note,vel):
+# has a complete MIDI message to send, and idx
+# is the input it was received on.
+def doMidiNoteOn(ch,cmd,note,vel,idx):
     #print(ch,"\tNote On \t", note, "\t", vel)
     pin.value(1)
-    midi_send(cmd, ch, note, vel)
+    merger.send(idx, cmd+ch-1, note, vel)
 
-def doMidiNoteOff(ch,cmd,note,vel):
+def doMidiNoteOff(ch,cmd,note,vel,idx):
     #print(ch,"\tNote Off\t", note, "\t", vel)
     pin.value(0)
-    midi_send(cmd, ch, note, vel)
+    merger.send(idx, cmd+ch-1, note, vel)
+
+def doMidiThru(ch,cmd,d1,d2,idx):
+    merger.send(idx, cmd+ch-1, d1, d2)
 
-def doMidiThru(ch,cmd,d1,d2):
-    midi_send(cmd, ch, d1, d2)
+def doMidiSysEx(data,idx):
+    merger.sysex(idx, data)
+
+def doMidiRealtime(cmd,ts,idx):
+    merger.realtime(cmd)
 
 md = []
 for i in range(NUM_UARTS):
     # Set up one MIDI decoder per UART
-    md_t = SimpleMIDIDecoder.SimpleMIDIDecoder()
+    md_t = SimpleMIDIDecoder.SimpleMIDIDecoder(i, sysex=True, realtime=True, sysexmax=SimpleMIDIMerger.MERGE_SYSEXMAX)
     md_t.cbNoteOn (doMidiNoteOn)
     md_t.cbNoteOff (doMidiNoteOff)
     md_t.cbThru (doMidiThru)
+    md_t.cbSysEx (doMidiSysEx)
+    md_t.cbRealtime (doMidiRealtime)
     md.append(md_t)
 
-while True:
-    for i in range(NUM_UARTS):
-        if (rx_uarts[i].rx_fifo()):
-            md[i].read(rx_uarts[i].get() >> 24)
+# Each time round the main loop is in poll(), so that this can also
+# be imported and driven from elsewhere, e.g. on a desktop computer
+# using SimpleMIDIHost.py.  It only runs by itself when run directly.
+def poll():
+    pio_rx.poll(md)
+    merger.service()
+
+def main():
+    while True:
+        poll()
+
+if __name__ == "__main__":
+    main()
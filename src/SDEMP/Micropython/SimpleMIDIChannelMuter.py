@@ -25,11 +25,12 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py and SimpleMIDIEncoder.py modules
+# from @diyelectromusic too.
 #
 from machine import Pin, UART
-import ustruct
 import SimpleMIDIDecoder
+import SimpleMIDIEncoder
 import picokeypad as keypad
 
 UART_BAUD = 31250
@@ -42,21 +43,19 @@ MIDICH = [
     True, True, True, True,
 ]
 
-led = Pin(25, machine.Pin.OUT)
+led = Pin(25, Pin.OUT)
 uart = UART(0,31250)
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
 
 def midiAllNotesOff (ch):
     # Send the MIDI CC Channel Message for All Notes OFf
-    uart.write(ustruct.pack("bbb",0xB0+ch-1,123, 0))
+    midiOut.send(0xB0+ch-1, 123, 0)
 
 def midiChannelMuter (ch, cmd, d1, d2):
     if (not MIDICH[ch-1]):
         return
 
-    if (d2 == -1):
-        uart.write(ustruct.pack("bb",cmd+ch-1,d1))
-    else:
-        uart.write(ustruct.pack("bbb",cmd+ch-1,d1,d2))
+    midiOut.send(cmd+ch-1, d1, d2)
 
 # Basic MIDI handling commands
 def doMidiNoteOn(ch,cmd,note,vel):
@@ -84,8 +83,9 @@ colour_index = 0
 NUM_PADS = keypad.get_num_pads()
 
 while True:
-    if (uart.any()):
-        md.read(uart.read(1)[0])
+    n = uart.any()
+    if (n):
+        md.feed(uart.read(n))
 
     button_states = keypad.get_button_states()
     if last_button_states != button_states:
@@ -25,18 +25,20 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py and SimpleMIDIPIOTx.py modules
+# from @diyelectromusic too.
 #
 from machine import Pin, UART
 from rp2 import PIO, StateMachine, asm_pio
 import SimpleMIDIDecoder
+import SimpleMIDIPIOTx
 
 UART_BAUD = 31250
 PIN_BASE = 6
 NUM_UARTS = 8
 MIDI_CH_BASE = 1
 
-pin = Pin(25, machine.Pin.OUT)
+pin = Pin(25, Pin.OUT)
 rx_uart = UART(0,31250)
 
 @asm_pio(sideset_init=PIO.OUT_HIGH, out_init=PIO.OUT_HIGH, out_shiftdir=PIO.SHIFT_RIGHT)
@@ -62,7 +64,7 @@ for i in range(NUM_UARTS):
         i, uart_tx, freq=8 * UART_BAUD, sideset_base=Pin(PIN_BASE + i), out_base=Pin(PIN_BASE + i)
     )
     sm.active(1)
-    tx_uarts.append(sm)
+    tx_uarts.append(SimpleMIDIPIOTx.SimpleMIDIPIOTx(sm))
 
 def pio_midi_send(cmd, ch, b1, b2):
     # UARTS are mapped onto consecutive MIDI channels
@@ -75,16 +77,14 @@ def pio_midi_send(cmd, ch, b1, b2):
         return
 
     midiuart = ch - MIDI_CH_BASE
-    sm = tx_uarts[midiuart]
     
     # Build the first MIDI byte:
     #   0xCn
     #     C = MIDI command (e.g. 8 for NoteOff)
     #     n = MIDI channel (0 to 15)
+    # The transmitter works out how many data bytes to send.
     b0 = cmd + ch-1
-    sm.put(b0)
-    sm.put(b1)
-    sm.put(b2)
+    tx_uarts[midiuart].send(b0, b1, b2)
     #print ("Sent ",hex(b0),b1,b2)
 
 # Basic MIDI handling commands
@@ -111,6 +111,19 @@ md.cbNoteOn (doMidiNoteOn)
 md.cbNoteOff (doMidiNoteOff)
 md.cbThru (doMidiThru)
 
-while True:
-    if (rx_uart.any()):
-        md.read(rx_uart.read(1)[0])
+# Each time round the main loop is in poll(), so that this can also
+# be imported and driven from elsewhere, e.g. on a desktop computer
+# using SimpleMIDIHost.py.  It only runs by itself when run directly.
+def poll():
+    n = rx_uart.any()
+    if (n):
+        md.feed(rx_uart.read(n))
+    for tx in tx_uarts:
+        tx.service()
+
+def main():
+    while True:
+        poll()
+
+if __name__ == "__main__":
+    main()
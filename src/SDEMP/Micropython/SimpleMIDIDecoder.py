@@ -39,6 +39,18 @@
 #            md.read(uart.read(1)[0])
 #---------------------
 #
+# Alternatively, everything waiting in the UART can be handed over
+# in one go using feed().  This accepts bytes, a bytearray or a
+# memoryview and behaves exactly as if read() had been called for
+# each byte in turn, so running status is kept between calls.
+#
+#---------------------
+#    while True:
+#        n = uart.any()
+#        if (n):
+#            md.feed(uart.read(n))
+#---------------------
+#
 # To add bespoke handling, define callback functions for NoteOn, NoteOff or
 # a default "Thru" handling as shown below.
 #
@@ -96,6 +108,92 @@
 #            if (uart[i].any()):
 #                md[i].read(uart[i].read(1)[0])
 #---------------------
+#
+# By default only the MIDI Voice Category (channel) messages are
+# decoded.  Other parts of MIDI can be switched on when the decoder
+# is created:
+#
+#    sysex=True    - System Exclusive messages are passed to cbSysEx
+#    realtime=True - Real-Time messages (clock, start, stop, etc)
+#                    are passed to cbRealtime
+#    common=True   - System Common messages (MTC quarter frame,
+#                    Song Position, Song Select, Tune Request) are
+#                    passed to cbSysCommon
+#    cc14=True     - Control Change 0-31 are paired with 32-63 and
+#                    the 14-bit values passed to cbCC14 as well as
+#                    the usual 7-bit messages going to cbThru
+#
+# Anything that isn't switched on costs nothing when decoding as the
+# handling is chosen once when the decoder is created.
+#
+#---------------------
+#    def doMidiSysEx(data):
+#        print("SysEx\t", len(data), "bytes")
+#
+#    def doMidiRealtime(cmd,ts):
+#        print("Realtime\t", hex(cmd), "\t", ts)
+#
+#    def doMidiSysCommon(cmd,data1,data2):
+#        print("System\t", hex(cmd), "\t", data1, "\t", data2)
+#
+#    def doMidiCC14(ch,cc,value):
+#        print("CC14\t", cc, "\t", value)
+#
+#    md = SimpleMIDIDecoder.SimpleMIDIDecoder(sysex=True, realtime=True, common=True, cc14=True)
+#    md.cbSysEx (doMidiSysEx)
+#    md.cbRealtime (doMidiRealtime)
+#    md.cbSysCommon (doMidiSysCommon)
+#    md.cbCC14 (doMidiCC14)
+#---------------------
+#
+# Real-Time messages are passed on as soon as they arrive, even if
+# they are in the middle of another message, along with a timestamp.
+# To get timestamps, provide a clock function when creating the
+# decoder, e.g. clock=utime.ticks_us.  Otherwise they will be 0.
+#
+# With a clock, every completed message is also timestamped and the
+# time can be found in the decoder's ts attribute from within any
+# of the callbacks.
+#
+# MIDIClockTempo (at the end of this file) can be used as the
+# Real-Time callback to track the tempo of an incoming MIDI clock.
+#
+# SysEx messages are collected into a buffer allocated once when the
+# decoder is created, and cbSysEx is passed a memoryview onto it.
+# This means the data can be examined without copying, but it will
+# be overwritten by the next SysEx message, so copy it (e.g. with
+# bytes(data)) if it needs to be kept.
+#
+# The size of the buffer is set with sysexmax and what happens to a
+# message too big for it is set with sysexoverflow:
+#
+#    SYSEX_TRUNCATE - the first sysexmax bytes are passed on (default)
+#    SYSEX_DROP     - the whole message is ignored
+#    SYSEX_STREAM   - each full buffer is passed on as it fills up,
+#                     so cbSysEx may be called several times for
+#                     one message, the last part ending in 0xF7
+#
+# The number of messages that have overflowed is kept in sysexoverflows.
+#
+# Alternatively, for large dumps, SysEx can be passed on in chunks as
+# it arrives by providing a cbSysExChunk callback.  This is called
+# each time the buffer fills (so the chunk size is sysexmax) and at
+# the end of the message, with flags marking the first and last
+# chunk.  Memory use stays the same however big the dump is, and
+# cbSysEx is not used.
+#
+# As the decoder doesn't need any hardware, this can also be used on
+# a host computer to play back recorded .syx files.
+#
+#---------------------
+#    def doMidiSysExChunk(data,start,end):
+#        print("SysEx chunk\t", len(data), "\t", start, "\t", end)
+#
+#    md = SimpleMIDIDecoder.SimpleMIDIDecoder(sysex=True, sysexmax=256)
+#    md.cbSysExChunk (doMidiSysExChunk)
+#    with open("bank.syx", "rb") as f:
+#        md.feed(f.read())
+#---------------------
 
 
 # Implement a simple MIDI decoder.
@@ -114,17 +212,94 @@
 #   Nothing is done to the buffer when a RealTime Category message is received.
 #   Any data bytes are ignored when the buffer is 0.
 #
+# SysEx overflow handling (see above)
+SYSEX_TRUNCATE = 0
+SYSEX_DROP     = 1
+SYSEX_STREAM   = 2
+#
+# Rather than work out what sort of byte has arrived with a chain
+# of range comparisons, each byte is classified with a single lookup
+# into a 256 entry table.  A second table gives the number of data
+# bytes that go with each Voice Category and System Common status
+# byte.  Both are built once when the module is imported.
+#
+MIDI_DATA     = 0  # 0x00 to 0x7F
+MIDI_VOICE    = 1  # 0x80 to 0xEF
+MIDI_SYSEX    = 2  # 0xF0
+MIDI_COMMON   = 3  # 0xF1 to 0xF7
+MIDI_REALTIME = 4  # 0xF8 to 0xFF
+
+MIDI_BYTETYPE = bytearray(256)
+MIDI_DATALEN = bytearray(256)
+for _mb in range(0x80, 0x100):
+    if (_mb <= 0xEF):
+        MIDI_BYTETYPE[_mb] = MIDI_VOICE
+        if ((_mb & 0xF0) == 0xC0) or ((_mb & 0xF0) == 0xD0):
+            # Program Change and Channel Pressure
+            MIDI_DATALEN[_mb] = 1
+        else:
+            MIDI_DATALEN[_mb] = 2
+    elif (_mb == 0xF0):
+        MIDI_BYTETYPE[_mb] = MIDI_SYSEX
+    elif (_mb <= 0xF7):
+        MIDI_BYTETYPE[_mb] = MIDI_COMMON
+        if (_mb == 0xF2):
+            # Song Position Pointer
+            MIDI_DATALEN[_mb] = 2
+        elif (_mb == 0xF1) or (_mb == 0xF3):
+            # MTC Quarter Frame and Song Select
+            MIDI_DATALEN[_mb] = 1
+    else:
+        MIDI_BYTETYPE[_mb] = MIDI_REALTIME
+#
 class SimpleMIDIDecoder:
     
-    def __init__(self, idx=-1):
+    def __init__(self, idx=-1, sysex=False, realtime=False, common=False, cc14=False,
+                 sysexmax=256, sysexoverflow=SYSEX_TRUNCATE, clock=None):
         self.idx = idx
+        self.clock = clock
+        self.ts = 0
+        self.realtime = realtime
+        self.common = common
         self.ch = 0
         self.cmd = 0
         self.d1 = 0
         self.d2 = 0
+        self.dcnt = 0
         self.cbThruFn = 0
         self.cbNoteOnFn = 0
         self.cbNoteOffFn = 0
+        self.cbSysExFn = 0
+        self.cbSysExChunkFn = 0
+        self.cbRealtimeFn = 0
+        self.cbSysCommonFn = 0
+        self.cbCC14Fn = 0
+        self.dlen = 0
+        self.msgFn = 0
+        # Handler for a completed message, indexed by (status >> 4) - 8,
+        # i.e. NoteOff, NoteOn, Poly Pressure, CC, PC, Ch Pressure, Pitch Bend
+        self.msgFns = [self.NoteOffFn, self.NoteOnOffFn,
+                       self.ThruFn, self.ThruFn, self.ThruFn, self.ThruFn, self.ThruFn]
+        if (cc14):
+            # Last MSB received for controllers 0-31 on each channel
+            self.cc14msb = bytearray(16*32)
+            self.msgFns[3] = self.CC14Fn
+        if (clock):
+            # Wrap each handler to record the time the message completed
+            for i in range(len(self.msgFns)):
+                self.msgFns[i] = self.timestamped(self.msgFns[i])
+        if (sysex):
+            self.sysex = bytearray(sysexmax)
+            self.sysexmv = memoryview(self.sysex)
+            self.sysexmax = sysexmax
+            self.sysexlen = 0
+            self.sysexpolicy = sysexoverflow
+            self.sysexover = False
+            self.sysexoverflows = 0
+            self.sysexstart = False
+            self.read = self.readSysEx
+        else:
+            self.read = self.readBasic
         
     def cbThru (self, callback):
         self.cbThruFn = callback
@@ -168,8 +343,200 @@ class SimpleMIDIDecoder:
             # Default NoteOff behaviour
             print ("NoteOff ", ch, ":", note, ":", level)
 
-    def read(self, mb):
-        if ((mb >= 0x80) and (mb <= 0xEF)):
+    def NoteOnOffFn (self, ch, cmd, note, level, idx):
+        # Special case if the level is zero - treat as NoteOff
+        if (level == 0):
+            self.NoteOffFn (ch, cmd, note, level, idx)
+        else:
+            self.NoteOnFn (ch, cmd, note, level, idx)
+
+    def cbSysEx (self, callback):
+        self.cbSysExFn = callback
+    
+    def SysExFn (self, data, idx):
+        if (self.cbSysExFn):
+            if (idx != -1):
+                self.cbSysExFn(data, idx)
+            else:
+                self.cbSysExFn(data)
+        else:
+            # Default SysEx behaviour
+            print ("SysEx:","".join("%02x" % x for x in data))
+
+    def cbSysExChunk (self, callback):
+        self.cbSysExChunkFn = callback
+
+    def SysExChunkFn (self, data, start, end, idx):
+        if (idx != -1):
+            self.cbSysExChunkFn(data, start, end, idx)
+        else:
+            self.cbSysExChunkFn(data, start, end)
+
+    def SysExOverflow (self, mb):
+        # Called when there is no more room in the SysEx buffer
+        if (self.cbSysExChunkFn):
+            # Chunk mode, so pass on this chunk and start the next
+            self.SysExChunkFn(self.sysexmv, self.sysexstart, False, self.idx)
+            self.sysexstart = False
+            self.sysex[0] = mb
+            self.sysexlen = 1
+            return
+        if (not self.sysexover):
+            self.sysexover = True
+            self.sysexoverflows += 1
+        if (self.sysexpolicy == SYSEX_STREAM):
+            # Pass on what we have so far and start filling again
+            self.SysExFn(self.sysexmv, self.idx)
+            self.sysex[0] = mb
+            self.sysexlen = 1
+        # Otherwise the byte is simply lost
+
+    def SysExEnd (self):
+        if (self.cbSysExChunkFn):
+            # Pass on the last chunk
+            self.SysExChunkFn(self.sysexmv[:self.sysexlen], self.sysexstart, True, self.idx)
+        # Pass on the complete message, unless it is being dropped
+        elif (not self.sysexover) or (self.sysexpolicy != SYSEX_DROP):
+            self.SysExFn(self.sysexmv[:self.sysexlen], self.idx)
+        self.cmd = 0
+
+    def cbRealtime (self, callback):
+        self.cbRealtimeFn = callback
+
+    def RealtimeFn (self, cmd, idx):
+        if (self.clock):
+            ts = self.clock()
+        else:
+            ts = 0
+        if (self.cbRealtimeFn):
+            if (idx != -1):
+                self.cbRealtimeFn(cmd, ts, idx)
+            else:
+                self.cbRealtimeFn(cmd, ts)
+        else:
+            # Default Real-Time behaviour
+            print ("Realtime ", hex(cmd), ":", ts)
+
+    def timestamped (self, fn):
+        clock = self.clock
+        def stampFn (ch, cmd, d1, d2, idx):
+            self.ts = clock()
+            fn (ch, cmd, d1, d2, idx)
+        return stampFn
+
+    def cbSysCommon (self, callback):
+        self.cbSysCommonFn = callback
+
+    def SysCommonFn (self, cmd, d1, d2, idx):
+        if (self.cbSysCommonFn):
+            if (idx != -1):
+                self.cbSysCommonFn(cmd, d1, d2, idx)
+            else:
+                self.cbSysCommonFn(cmd, d1, d2)
+        else:
+            # Default System Common behaviour
+            print ("System ", hex(cmd), ":", d1, ":", d2)
+
+    def SysCommonDataFn (self, ch, cmd, d1, d2, idx):
+        # System Common messages don't use Running Status
+        # so any further data bytes are ignored.
+        self.cmd = 0
+        self.SysCommonFn (cmd, d1, d2, idx)
+
+    def cbCC14 (self, callback):
+        self.cbCC14Fn = callback
+
+    def CC14Fn (self, ch, cmd, cc, value, idx):
+        # The 7-bit controller is passed on as usual
+        self.ThruFn (ch, cmd, cc, value, idx)
+
+        # Controllers 0-31 are the MSB and 32-63 the LSB
+        # of a 14-bit value.  A new MSB implies an LSB of 0.
+        if (cc < 32):
+            self.cc14msb[(ch-1)*32 + cc] = value
+            self.CC14ValueFn (ch, cc, value << 7, idx)
+        elif (cc < 64):
+            cc = cc - 32
+            self.CC14ValueFn (ch, cc, (self.cc14msb[(ch-1)*32 + cc] << 7) + value, idx)
+
+    def CC14ValueFn (self, ch, cc, value, idx):
+        if (self.cbCC14Fn):
+            if (idx != -1):
+                self.cbCC14Fn(ch, cc, value, idx)
+            else:
+                self.cbCC14Fn(ch, cc, value)
+        else:
+            # Default 14-bit CC behaviour
+            print ("CC14 ", ch, ":", cc, ":", value)
+
+    # One of the following two read functions is used as read()
+    # depending on whether SysEx handling is required.
+    #
+    def readSysEx(self, mb):
+        if (self.cmd == 0xF0):
+            # Processing a SysEx message...
+            if (mb < 0x80):
+                # SysEx data
+                if (self.sysexlen < self.sysexmax):
+                    self.sysex[self.sysexlen] = mb
+                    self.sysexlen += 1
+                else:
+                    self.SysExOverflow(mb)
+                return
+            elif (mb == 0xF7):
+                # End of System Exclusive
+                if (self.sysexlen < self.sysexmax):
+                    self.sysex[self.sysexlen] = mb
+                    self.sysexlen += 1
+                else:
+                    self.SysExOverflow(mb)
+                self.SysExEnd()
+                return
+            elif (mb >= 0xF8):
+                # Real-Time messages may appear in the middle
+                # of SysEx without ending it, so let the rest
+                # of the decoder handle them.
+                pass
+            else:
+                # Start of a new status byte:
+                # This will end system exclusive processing
+                # and signal the start of new command.
+                self.SysExEnd()
+                # Fall through to let rest of decoder take over again
+
+        if (mb == 0xF0):
+            # MIDI System Exclusive Message.
+            self.cmd = 0xF0
+            self.dcnt = 0
+            self.sysex[0] = mb
+            self.sysexlen = 1
+            self.sysexover = False
+            self.sysexstart = True
+            return
+
+        self.readBasic(mb)
+
+    def readBasic(self, mb):
+        bt = MIDI_BYTETYPE[mb]
+        if (bt == MIDI_DATA):
+            # MIDI Data
+            if (self.cmd == 0):
+                # No record of what state we're in, so can go no further
+                return
+            # Count the data bytes as they arrive rather than rely
+            # on their values, as 0 is a perfectly valid note number,
+            # controller number or pitch bend LSB.
+            if (self.dcnt == 0):
+                self.d1 = mb
+            else:
+                self.d2 = mb
+            self.dcnt += 1
+            if (self.dcnt == self.dlen):
+                # Message complete.  Reset the count ready for
+                # more data under running status.
+                self.dcnt = 0
+                self.msgFn (self.ch, self.cmd, self.d1, self.d2, self.idx)
+        elif (bt == MIDI_VOICE):
             # MIDI Voice Category Message.
             # Action: Start handling Running Status
             
@@ -177,72 +544,128 @@ class SimpleMIDIDecoder:
             self.cmd = mb & 0xF0
             self.ch = 1 + (mb & 0x0F)
             
-            # Initialise the two data bytes ready for processing
+            # Look up how many data bytes to expect and who to tell
+            self.dlen = MIDI_DATALEN[mb]
+            self.msgFn = self.msgFns[(mb >> 4) - 8]
+            
+            # Initialise the two data bytes ready for processing.
+            # Single data-byte messages always report data2 as -1.
+            self.dcnt = 0
             self.d1 = 0
-            self.d2 = 0
-        elif ((mb >= 0xF0) and (mb <= 0xF7)):
-            # MIDI System Common Category Message.
-            # These are not handled by this decoder.
-            # Action: Reset Running Status.
-            self.cmd = 0
-        elif ((mb >= 0xF8) and (mb <= 0xFF)):
+            if (self.dlen == 1):
+                self.d2 = -1
+            else:
+                self.d2 = 0
+        elif (bt == MIDI_REALTIME):
             # System Real-Time Message.
-            # These are not handled by this decoder.
-            # Action: Ignore these.
-            pass
+            # Action: Leave Running Status alone.
+            if (self.realtime):
+                self.RealtimeFn (mb, self.idx)
         else:
-            # MIDI Data
-            if (self.cmd == 0):
-                # No record of what state we're in, so can go no further
-                return
-            if (self.cmd == 0x80):
-                # Note OFF Received
-                if (self.d1 == 0):
-                    # Store the note number
-                    self.d1 = mb
+            # MIDI System Common Category Message (including SysEx
+            # if it isn't being handled).
+            # Action: Reset Running Status.
+            self.cmd = 0
+            if (self.common and (mb != 0xF0) and (mb != 0xF7)):
+                self.dlen = MIDI_DATALEN[mb]
+                if (self.dlen == 0):
+                    # No data (e.g. Tune Request) so action straight away
+                    self.SysCommonFn (mb, -1, -1, self.idx)
                 else:
-                    # Already have the note, so store the level
-                    self.d2 = mb
-                    self.NoteOffFn (self.ch, self.cmd, self.d1, self.d2, self.idx)
+                    # Collect the data bytes as for Voice messages
+                    self.cmd = mb
+                    self.ch = 0
+                    self.msgFn = self.SysCommonDataFn
+                    self.dcnt = 0
                     self.d1 = 0
-                    self.d2 = 0
-            elif (self.cmd == 0x90):
-                # Note ON Received
-                if (self.d1 == 0):
-                    # Store the note number
-                    self.d1 = mb
-                else:
-                    # Already have the note, so store the level
-                    self.d2 = mb
-                    # Special case if the level (data2) is zero - treat as NoteOff
-                    if (self.d2 == 0):
-                        self.NoteOffFn (self.ch, self.cmd, self.d1, self.d2, self.idx)
+                    if (self.dlen == 1):
+                        self.d2 = -1
                     else:
-                        self.NoteOnFn (self.ch, self.cmd, self.d1, self.d2, self.idx)
-                    self.d1 = 0
-                    self.d2 = 0
-            elif (self.cmd == 0xC0):
-                # Program Change
-                # This is a single data-byte message
-                self.d1 = mb
-                self.ThruFn(self.ch, self.cmd, self.d1, -1, self.idx)
-                self.d1 = 0
-            elif (self.cmd == 0xD0):
-                # Channel Pressure
-                # This is a single data-byte message
-                self.d1 = mb
-                self.ThruFn(self.ch, self.cmd, self.d1, -1, self.idx)
-                self.d1 = 0
-            else:
-                # All other commands are two-byte data commands
-                if (self.d1 == 0):
-                    # Store the first data byte
-                    self.d1 = mb
-                else:
-                    # Store the second data byte and action
-                    self.d2 = mb
-                    self.ThruFn(self.ch, self.cmd, self.d1, self.d2, self.idx)
-                    self.d1 = 0
-                    self.d2 = 0
+                        self.d2 = 0
+
+    def feed(self, buf):
+        # Process a whole buffer of received MIDI bytes.
+        # Running status carries across calls, so a message
+        # may be split over several buffers.
+        read = self.read
+        for mb in buf:
+            read(mb)
 
 
+# Track the tempo of an incoming MIDI clock.
+#
+# MIDI clock is sent at 24 pulses (0xF8) per quarter note, so the
+# tempo is worked out from the average time between pulses over a
+# rolling window of the last few pulses.  The number of pulses since
+# the last Start (0xFA) is kept in ticks, and running is True between
+# Start/Continue and Stop (0xFC).
+#
+# Timestamps are in "units" per second (1000000 for ticks_us).  As the
+# Pico's ticks wrap around, pass in ticks_diff to compare them.
+#
+# realtime() can be given straight to cbRealtime, for a decoder with
+# or without an input number (the number is ignored).
+#
+#---------------------
+#    import utime
+#    import SimpleMIDIDecoder
+#
+#    tempo = SimpleMIDIDecoder.MIDIClockTempo(diff=utime.ticks_diff)
+#    md = SimpleMIDIDecoder.SimpleMIDIDecoder(realtime=True, clock=utime.ticks_us)
+#    md.cbRealtime (tempo.realtime)
+#    ...
+#    print ("BPM: ", tempo.bpm())
+#---------------------
+#
+class MIDIClockTempo:
+
+    def __init__(self, window=24, units=1000000, diff=None):
+        self.window = window
+        self.units = units
+        self.diff = diff
+        self.intervals = [0] * window
+        self.pos = 0
+        self.count = 0
+        self.total = 0
+        self.last = 0
+        self.haslast = False
+        self.ticks = 0
+        self.running = False
+
+    def realtime (self, cmd, ts, idx=-1):
+        if (cmd == 0xF8):
+            self.tick(ts)
+        elif (cmd == 0xFA):
+            # Start
+            self.ticks = 0
+            self.running = True
+        elif (cmd == 0xFB):
+            # Continue
+            self.running = True
+        elif (cmd == 0xFC):
+            # Stop
+            self.running = False
+
+    def tick (self, ts):
+        if (self.haslast):
+            if (self.diff):
+                dt = self.diff(ts, self.last)
+            else:
+                dt = ts - self.last
+            # Replace the oldest interval in the window
+            self.total += dt - self.intervals[self.pos]
+            self.intervals[self.pos] = dt
+            self.pos += 1
+            if (self.pos >= self.window):
+                self.pos = 0
+            if (self.count < self.window):
+                self.count += 1
+        self.last = ts
+        self.haslast = True
+        self.ticks += 1
+
+    def bpm (self):
+        # Returns 0 until at least two pulses have been received
+        if (self.total <= 0):
+            return 0
+        return (60 * self.units * self.count) / (24 * self.total)
@@ -0,0 +1,185 @@
+# Simple MIDI Encoder
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Formats MIDI messages for sending to one output port, using
+# MIDI "running status": if a message has the same status byte as
+# the one before it, the status byte is left out.  For dense chords
+# or streams of controllers this saves up to a third of the bytes
+# on the wire, and at 31250 baud that is a lot of time.
+#
+# There should be one encoder for each output port, as it has to
+# remember what was last sent on that port.
+#
+# The status byte is always sent again:
+#   * After "refresh" messages have been sent without it, so that a
+#     device plugged in part way through a stream soon picks it up.
+#     Set refresh to 0 to never do this.
+#   * After any system message or buffer sent with writebuf() (e.g.
+#     SysEx), as these cancel running status.
+#   * After any realtime byte.  Strictly speaking realtime bytes
+#     don't affect running status, but some receivers get this wrong.
+#
+# Messages are built in a preallocated buffer and handed to the
+# write function as a memoryview.  The write function can be a
+# UART's write() or anything else that takes a buffer.  If it
+# returns False (e.g. a full SimpleMIDIPIOTx queue) the message is
+# assumed lost and the status will be sent next time.
+#
+# This is the way to send MIDI from any of the projects, rather than
+# using ustruct.pack(), which allocates a new bytes object for every
+# message (and its "b" format is for signed values, so isn't right
+# for status bytes of 0x80 and above).  Nothing is allocated for
+# each message, so sending MIDI doesn't set off the garbage collector
+# in the middle of playing.
+#
+# It works the same way on CircuitPython, with a busio.UART's write()
+# as the write function.  Copy this file and SimpleMIDIDecoder.py
+# (which it uses) over from the Micropython area along with the
+# project.
+#
+# As well as send(), there are helpers for the most common messages
+# which take a MIDI channel from 1 to 16:
+#
+#    noteOn(ch, note, vel)
+#    noteOff(ch, note, vel)
+#    cc(ch, controller, value)
+#    pc(ch, program)               - program 0 to 127
+#    pitchBend(ch, value)          - value 0 to 16383, PB_CENTRE is 8192
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIEncoder
+#
+#    uart = machine.UART(0,31250)
+#    enc = SimpleMIDIEncoder.SimpleMIDIEncoder(uart.write)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        enc.send(cmd+ch-1, note, vel)
+#
+#    def playNote(note):
+#        enc.noteOn(1, note, 127)
+#---------------------
+#
+# The number of data bytes for each status byte is shared with the
+# decoder, so this needs the SimpleMIDIDecoder.py module too.
+#
+import SimpleMIDIDecoder
+
+# Default number of messages that can be sent using running status
+# before the status byte is sent again.
+RS_REFRESH = 32
+
+# Pitch bend value for "no bend"
+PB_CENTRE = 8192
+
+class SimpleMIDIEncoder:
+
+    def __init__(self, write, runningstatus=True, refresh=RS_REFRESH):
+        self.write = write
+        self.runningstatus = runningstatus
+        self.refresh = refresh
+        self.status = 0
+        self.rscount = 0
+        # Counters for bytes sent and status bytes saved
+        self.sent = 0
+        self.saved = 0
+        # Scratch message and a view of it for each length
+        self.msg = bytearray(3)
+        mv = memoryview(self.msg)
+        self.msgmv = [mv[0:0], mv[0:1], mv[0:2], mv[0:3]]
+
+    # Send a single MIDI message.
+    #   b0 = MIDI status byte, including the channel for voice messages
+    #   b1 = MIDI data byte 1 (if needed)
+    #   b2 = MIDI data byte 2 (if needed, otherwise ignored)
+    def send(self, b0, b1=0, b2=0):
+        if (b0 >= 0xF8):
+            self.realtime(b0)
+            return
+
+        n = SimpleMIDIDecoder.MIDI_DATALEN[b0]
+        msg = self.msg
+        if (b0 == self.status) and ((self.refresh == 0) or (self.rscount < self.refresh)):
+            # Running status - just send the data bytes
+            self.rscount += 1
+            self.saved += 1
+            if (n > 0):
+                msg[0] = b1
+                if (n > 1):
+                    msg[1] = b2
+        else:
+            msg[0] = b0
+            if (n > 0):
+                msg[1] = b1
+                if (n > 1):
+                    msg[2] = b2
+            n += 1
+            self.rscount = 0
+            if (self.runningstatus) and (b0 < 0xF0):
+                self.status = b0
+            else:
+                self.status = 0
+
+        self.sent += n
+        if (self.write(self.msgmv[n]) is False):
+            self.status = 0
+
+    # Helpers for the common channel messages.  ch is 1 to 16.
+    def noteOn(self, ch, note, vel=127):
+        self.send(0x90+ch-1, note, vel)
+
+    def noteOff(self, ch, note, vel=0):
+        self.send(0x80+ch-1, note, vel)
+
+    def cc(self, ch, controller, value):
+        self.send(0xB0+ch-1, controller, value)
+
+    def pc(self, ch, program):
+        self.send(0xC0+ch-1, program)
+
+    def pitchBend(self, ch, value):
+        # 14-bit value, sent as the LSB then the MSB
+        self.send(0xE0+ch-1, value & 0x7F, (value >> 7) & 0x7F)
+
+    # Send a single realtime byte (e.g. 0xF8 MIDI Clock)
+    def realtime(self, mb):
+        msg = self.msg
+        msg[0] = mb
+        self.status = 0
+        self.sent += 1
+        self.write(self.msgmv[1])
+
+    # Send a buffer of already formatted MIDI data (e.g. SysEx)
+    def writebuf(self, buf):
+        self.status = 0
+        self.sent += len(buf)
+        self.write(buf)
+
+    # Make sure the next message includes its status byte
+    def reset(self):
+        self.status = 0
@@ -0,0 +1,237 @@
+# Simple MIDI Dual Core Engine
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Splits MIDI handling across the two cores of the Pico:
+#
+#   * Core 1 does nothing but poll the MIDI inputs (hardware UARTs
+#     and PIO UART receive state machines) and decode what arrives.
+#   * Decoded messages are passed over to core 0 in a SimpleMIDIRing
+#     for each input, without any locking.
+#   * Core 0 calls service() from its main loop to pick up the
+#     messages and pass them on to the usual NoteOn, NoteOff and Thru
+#     callbacks for routing, in between scanning pots, switches,
+#     displays and so on.
+#
+# This means slow things on core 0 (e.g. SPI reads or display
+# updates) don't hold up reading MIDI.  They only delay when the
+# messages are acted on, and nothing is lost unless a ring fills up.
+#
+# The callbacks are just like the SimpleMIDIDecoder ones and are
+# always given the input number (in the order the inputs were added):
+#    doMidiNoteOn(ch,cmd,note,vel,src)
+#    doMidiNoteOff(ch,cmd,note,vel,src)
+#    doMidiThru(ch,cmd,d1,d2,src)
+#    doMidiRealtime(cmd,src)
+#
+# SysEx doesn't go through the rings.  If it is needed, enable it when
+# adding the input and set the SysEx callbacks on the input's decoder
+# directly, but note that these will then run on core 1.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIEngine
+#
+#    engine = SimpleMIDIEngine.SimpleMIDIEngine()
+#    engine.addUART(machine.UART(0,31250))
+#    engine.addPIO(rx_sm)
+#    engine.cbNoteOn (doMidiNoteOn)
+#    engine.cbNoteOff (doMidiNoteOff)
+#    engine.cbThru (doMidiThru)
+#    engine.start()
+#
+#    while True:
+#        engine.service()
+#        ... scan the UI ...
+#---------------------
+#
+# _thread is also part of desktop Python, so this works on the host
+# too, where the second "core" is just another thread.  There, pass
+# an idle function (e.g. time.sleep(0)) so that the polling thread
+# gives the main thread a chance to run.
+#
+# PIO inputs are read with SimpleMIDIPIORx, which empties each state
+# machine's FIFO with a single get() rather than one call per byte.
+#
+# This needs the SimpleMIDIDecoder.py, SimpleMIDIPIORx.py and
+# SimpleMIDIRing.py modules too.
+#
+import _thread
+import SimpleMIDIDecoder
+import SimpleMIDIPIORx
+import SimpleMIDIRing
+
+# Most messages taken from each input on each call to service()
+ENGINE_MAXEVENTS = 16
+
+class SimpleMIDIEngine:
+
+    def __init__(self, size=64, idle=None):
+        self.size = size
+        self.idle = idle
+        self.uarts = []
+        # The PIO state machines and their decoders.  SimpleMIDIPIORx
+        # is given the list itself, so it sees any added later on.
+        self.pios = []
+        self.piomd = []
+        self.piorx = SimpleMIDIPIORx.SimpleMIDIPIORx(self.pios)
+        self.decoders = []
+        self.rings = []
+        self.running = False
+        self.stopped = True
+        self.cbNoteOnFn = 0
+        self.cbNoteOffFn = 0
+        self.cbThruFn = 0
+        self.cbRealtimeFn = 0
+
+    def addInput(self, sysex, sysexmax, realtime):
+        src = len(self.decoders)
+        ring = SimpleMIDIRing.SimpleMIDIRing(self.size)
+        md = SimpleMIDIDecoder.SimpleMIDIDecoder(src, sysex=sysex, sysexmax=sysexmax, realtime=realtime)
+
+        # Everything decoded on core 1 goes into this input's ring.
+        # Single data byte messages have d2 == -1, which is stored
+        # as 0 and put back again by service().
+        def doMsg(ch, cmd, d1, d2, src):
+            if (d2 < 0):
+                d2 = 0
+            ring.put(cmd+ch-1, d1, d2)
+
+        def doRealtime(cmd, ts, src):
+            ring.put(cmd)
+
+        md.cbNoteOn (doMsg)
+        md.cbNoteOff (doMsg)
+        md.cbThru (doMsg)
+        md.cbRealtime (doRealtime)
+        self.decoders.append(md)
+        self.rings.append(ring)
+        return src
+
+    # Add a hardware (or anything with any() and read()) UART.
+    # Returns the input number.
+    def addUART(self, uart, sysex=False, sysexmax=256, realtime=False):
+        src = self.addInput(sysex, sysexmax, realtime)
+        self.uarts.append((uart, self.decoders[src]))
+        return src
+
+    # Add a PIO UART receive state machine, which puts each received
+    # byte in the top 8 bits of a FIFO word.  Returns the input number.
+    def addPIO(self, sm, sysex=False, sysexmax=256, realtime=False):
+        src = self.addInput(sysex, sysexmax, realtime)
+        self.pios.append(sm)
+        self.piomd.append(self.decoders[src])
+        return src
+
+    def decoder(self, src):
+        return self.decoders[src]
+
+    def ring(self, src):
+        return self.rings[src]
+
+    def cbNoteOn (self, callback):
+        self.cbNoteOnFn = callback
+
+    def cbNoteOff (self, callback):
+        self.cbNoteOffFn = callback
+
+    def cbThru (self, callback):
+        self.cbThruFn = callback
+
+    def cbRealtime (self, callback):
+        self.cbRealtimeFn = callback
+
+    # Core 1: read and decode whatever has arrived on all inputs.
+    # Returns True if anything was received.
+    def poll(self):
+        rx = False
+        for uart, md in self.uarts:
+            n = uart.any()
+            if (n):
+                md.feed(uart.read(n))
+                rx = True
+        for i in range(len(self.pios)):
+            buf = self.piorx.drain(i)
+            if (buf):
+                self.piomd[i].feed(buf)
+                rx = True
+        return rx
+
+    def run(self):
+        self.stopped = False
+        while (self.running):
+            if (not self.poll()) and (self.idle):
+                self.idle()
+        self.stopped = True
+
+    # Start polling on the other core
+    def start(self):
+        self.running = True
+        _thread.start_new_thread(self.run, ())
+
+    def stop(self):
+        self.running = False
+        while (not self.stopped):
+            pass
+
+    # Core 0: pass on the decoded messages waiting from each input.
+    # Returns the number of messages handled.
+    def service(self, maxevents=ENGINE_MAXEVENTS):
+        cnt = 0
+        for src in range(len(self.rings)):
+            ring = self.rings[src]
+            for i in range(maxevents):
+                ev = ring.get()
+                if (ev == -1):
+                    break
+                self.dispatch(ev, src)
+                cnt += 1
+        return cnt
+
+    def dispatch(self, ev, src):
+        status = ev >> 16
+        d1 = (ev >> 8) & 0xFF
+        d2 = ev & 0xFF
+        if (status >= 0xF8):
+            if (self.cbRealtimeFn):
+                self.cbRealtimeFn(status, src)
+            return
+
+        cmd = status & 0xF0
+        ch = (status & 0x0F) + 1
+        if (cmd == 0x90) and (d2 != 0):
+            if (self.cbNoteOnFn):
+                self.cbNoteOnFn(ch, cmd, d1, d2, src)
+        elif (cmd == 0x80) or (cmd == 0x90):
+            # NoteOn with zero velocity is a NoteOff
+            if (self.cbNoteOffFn):
+                self.cbNoteOffFn(ch, cmd, d1, d2, src)
+        else:
+            if (SimpleMIDIDecoder.MIDI_DATALEN[status] == 1):
+                d2 = -1
+            if (self.cbThruFn):
+                self.cbThruFn(ch, cmd, d1, d2, src)
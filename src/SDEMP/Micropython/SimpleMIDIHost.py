@@ -0,0 +1,679 @@
+# Simple MIDI Host Hardware Stand-ins
+# for desktop Python on the host computer
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# This provides just enough of the Micropython hardware modules
+# (machine, rp2, utime and ustruct) for the MIDI projects in this
+# area to be imported and driven from a desktop Python, e.g. for
+# benchmarking or checking changes without a Pico.
+#
+# Call install() before importing a project:
+#
+#   * UARTs read whatever has been passed to inject() and keep
+#     everything written in "output" (unless "capture" is False).
+#     They can also loop their output back to their input, or be
+#     connected to a pseudo terminal (pty) on Linux to talk to other
+#     software.
+#   * PIO state machines do the same for the uart_rx and uart_tx
+#     PIO programs.  The PIO code itself isn't run.  The transmit
+#     FIFO is four words deep and only empties as advance() is
+#     called with a simulated clock (or tick() for each word), so
+#     tx_fifo() fills up just as it would on the Pico.
+#   * Pins remember their values, and set() on an input calls
+#     any irq handler.
+#   * SPI buses pass transfers on to a model of whatever is attached
+#     to them, e.g. an MCP3008 ADC or MAX7219 display driver.
+#   * ADCs return whatever their value is set to.
+#   * machine.mem32 shows which PIO state machines have something
+#     waiting in their receive FIFO (the FSTAT registers).
+#   * utime has the Micropython ticks_ms() and related functions.
+#     The desktop's own time module is left alone, so a project that
+#     is to be imported like this needs to use utime for them.
+#   * Wire sends MIDI to a UART or state machine at 31250 baud
+#     against a simulated clock, and their fifo can be limited to
+#     see how much is lost if it isn't read quickly enough.
+#
+# Each UART, state machine, pin and SPI bus that is created is
+# remembered by its id, so once the project has set them up they
+# can be found using uart(), sm(), pin() and spi().
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIHost
+#    SimpleMIDIHost.install()
+#    SimpleMIDIHost.spiDevice(1, SimpleMIDIHost.MCP3008Model())
+#
+#    import SimpleMIDIChannelRouter as router
+#
+#    SimpleMIDIHost.uart(0).inject(bytes([0x90, 60, 100]))
+#    router.poll()
+#    print (SimpleMIDIHost.sm(0).output)
+#---------------------
+#
+# The projects below only run their main loop if they are run
+# directly, so importing them like this just sets everything up.
+# They keep the body of that loop in poll(), which can be called
+# to run it once:
+#
+#   * SimpleMIDIChannelRouter
+#   * SimpleMIDIChannelMerger
+#   * SimpleMIDINoteBalancer
+#   * SimpleMIDIMultiRxTx
+#   * PicoTX816IOPanel (in the MiniDexedTX816 area)
+#
+# The other projects still run as soon as they are imported.
+#
+import os
+import struct
+import sys
+import time
+import types
+
+# -----------------------------------------------
+#
+#  utime
+#
+# -----------------------------------------------
+# Micropython ticks wrap around, so do the same here
+TICKS_PERIOD = 1 << 30
+TICKS_HALF = TICKS_PERIOD // 2
+
+def ticks_ms():
+    return (time.monotonic_ns() // 1000000) % TICKS_PERIOD
+
+def ticks_us():
+    return (time.monotonic_ns() // 1000) % TICKS_PERIOD
+
+def ticks_cpu():
+    return time.perf_counter_ns() % TICKS_PERIOD
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % TICKS_PERIOD
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + TICKS_HALF) % TICKS_PERIOD) - TICKS_HALF
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+def sleep_us(us):
+    time.sleep(us / 1000000)
+
+# -----------------------------------------------
+#
+#  machine
+#
+# -----------------------------------------------
+pins = {}
+uarts = {}
+spis = {}
+spidevices = {}
+ptys = {}
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.handler = None
+        self.trigger = 0
+        self.val = 0
+        self.init(mode, pull, value)
+        pins[id] = self
+
+    def init(self, mode=-1, pull=-1, value=None):
+        self.mode = mode
+        self.pull = pull
+        if (value != None):
+            self.val = value
+        elif (pull == Pin.PULL_UP):
+            self.val = 1
+
+    def value(self, v=None):
+        if (v == None):
+            return self.val
+        self.val = 1 if v else 0
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.val = 1
+
+    def off(self):
+        self.val = 0
+
+    def toggle(self):
+        self.val = 1 - self.val
+
+    def irq(self, handler=None, trigger=IRQ_FALLING|IRQ_RISING):
+        self.handler = handler
+        self.trigger = trigger
+
+    # Host only: drive an input, e.g. a button press
+    def set(self, v):
+        v = 1 if v else 0
+        old = self.val
+        self.val = v
+        if (self.handler):
+            if (old and not v and (self.trigger & Pin.IRQ_FALLING)) or \
+               (v and not old and (self.trigger & Pin.IRQ_RISING)):
+                self.handler(self)
+
+class UART:
+
+    def __init__(self, id, baudrate=9600, bits=8, parity=None, stop=1, tx=None, rx=None,
+                 timeout=0, txbuf=256, rxbuf=256, loopback=False):
+        self.id = id
+        self.baudrate = baudrate
+        self.loopback = loopback
+        self.input = bytearray()
+        self.output = bytearray()
+        self.capture = True
+        # Host only: set fifo to limit how many bytes can be waiting,
+        # with any more lost and counted in overruns.
+        self.fifo = None
+        self.overruns = 0
+        self.fd = ptys.get(id, -1)
+        uarts[id] = self
+
+    def init(self, baudrate=9600, **kw):
+        self.baudrate = baudrate
+
+    # Host only: data for the UART to receive
+    def inject(self, data):
+        if (self.fifo != None):
+            room = max(0, self.fifo - len(self.input))
+            self.overruns += max(0, len(data) - room)
+            data = data[:room]
+        self.input.extend(data)
+
+    def pollpty(self):
+        if (self.fd != -1):
+            try:
+                self.input.extend(os.read(self.fd, 1024))
+            except (BlockingIOError, OSError):
+                pass
+
+    def any(self):
+        self.pollpty()
+        return len(self.input)
+
+    def read(self, n=-1):
+        self.pollpty()
+        if (not self.input):
+            return None
+        if (n < 0):
+            n = len(self.input)
+        data = bytes(self.input[:n])
+        del self.input[:n]
+        return data
+
+    def readinto(self, buf, n=-1):
+        data = self.read(len(buf) if n < 0 else n)
+        if (data == None):
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def write(self, buf):
+        if (self.capture):
+            self.output.extend(buf)
+        if (self.loopback):
+            self.input.extend(buf)
+        if (self.fd != -1):
+            os.write(self.fd, bytes(buf))
+        return len(buf)
+
+    def txdone(self):
+        return True
+
+    def flush(self):
+        pass
+
+class SPI:
+
+    def __init__(self, id, baudrate=1000000, polarity=0, phase=0, bits=8, firstbit=0,
+                 sck=None, mosi=None, miso=None):
+        self.id = id
+        self.baudrate = baudrate
+        self.device = spidevices.get(id)
+        spis[id] = self
+
+    def init(self, baudrate=1000000, **kw):
+        self.baudrate = baudrate
+
+    def write(self, buf):
+        if (self.device):
+            self.device.transfer(buf, None)
+
+    def readinto(self, buf, write=0):
+        out = bytes([write]) * len(buf)
+        self.write_readinto(out, buf)
+
+    def read(self, nbytes, write=0):
+        buf = bytearray(nbytes)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def write_readinto(self, out, buf):
+        for i in range(len(buf)):
+            buf[i] = 0
+        if (self.device):
+            self.device.transfer(out, buf)
+
+class ADC:
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.val = 0
+
+    def read_u16(self):
+        return self.val
+
+    # Host only
+    def set(self, v):
+        self.val = v
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kw):
+        self.callback = None
+        if (kw):
+            self.init(**kw)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None):
+        self.callback = callback
+
+    def deinit(self):
+        self.callback = None
+
+    # Host only: call the timer callback as if it has expired
+    def fire(self):
+        if (self.callback):
+            self.callback(self)
+
+def freq(hz=None):
+    return 125000000
+
+# Only the PIO FSTAT registers are modelled, showing whether each
+# state machine's FIFOs are empty.  The state machines keep RXEMPTY
+# and TXEMPTY up to date in fstat, so TXEMPTY is only set again once
+# tick() or advance() has sent everything in the TX FIFO.  Anything
+# else reads as 0, and writes are ignored.
+PIO_BASE = [0x50200000, 0x50300000]
+PIO_FSTAT = 0x004
+# Words in each state machine's FIFOs
+PIO_FIFO_DEPTH = 4
+fstat = {PIO_BASE[0] + PIO_FSTAT: 0x0F000F00,
+         PIO_BASE[1] + PIO_FSTAT: 0x0F000F00}
+
+class Mem32:
+
+    def __getitem__(self, addr):
+        return fstat.get(addr, 0)
+
+    def __setitem__(self, addr, value):
+        pass
+
+mem32 = Mem32()
+
+def reset():
+    raise SystemExit
+
+# Models of SPI devices.  transfer() is given what was written
+# and a buffer to fill in with the reply (None if only writing).
+class MCP3008Model:
+
+    def __init__(self, values=None):
+        if (values == None):
+            values = [0] * 8
+        self.values = values
+
+    def transfer(self, out, buf):
+        # Start bit, then single-ended/differential and channel,
+        # with the 10-bit result in the last two bytes.
+        if (buf != None) and (len(out) >= 3):
+            v = self.values[(out[1] >> 4) & 7]
+            buf[1] = (v >> 8) & 0x03
+            buf[2] = v & 0xFF
+
+class MAX7219Model:
+
+    def __init__(self, devices=1):
+        self.devices = devices
+        self.digits = []
+        self.registers = []
+        for d in range(devices):
+            self.digits.append(bytearray(8))
+            self.registers.append(bytearray(16))
+
+    def transfer(self, out, buf):
+        # Cascaded devices: the first register/data pair written
+        # ends up in the last device in the chain.
+        n = len(out) // 2
+        for i in range(n):
+            dev = n - 1 - i
+            if (dev < self.devices):
+                reg = out[i*2] & 0x0F
+                self.registers[dev][reg] = out[i*2+1]
+                if (reg >= 1) and (reg <= 8):
+                    self.digits[dev][reg-1] = out[i*2+1]
+
+# -----------------------------------------------
+#
+#  rp2
+#
+# -----------------------------------------------
+statemachines = {}
+
+class PIO:
+    IN_LOW = 0
+    IN_HIGH = 1
+    OUT_LOW = 2
+    OUT_HIGH = 3
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+    JOIN_NONE = 0
+    JOIN_TX = 1
+    JOIN_RX = 2
+    IRQ_SM0 = 0x100
+
+    def __init__(self, id):
+        self.id = id
+
+    def state_machine(self, id, *args, **kw):
+        return StateMachine(self.id*4 + id, *args, **kw)
+
+# The PIO assembler isn't needed on the host, so the
+# program is never run.
+def asm_pio(**kw):
+    def asm(fn):
+        return fn
+    return asm
+
+class StateMachine:
+
+    def __init__(self, id, prog=None, freq=-1, **kw):
+        self.id = id
+        self.prog = prog
+        self.running = 0
+        self.rx = []
+        self.output = bytearray()
+        self.words = []
+        self.capture = True
+        # Host only: the receive FIFO holds 4 words (8 if joined),
+        # but isn't limited unless fifo is set.  Anything else
+        # received is lost and counted in overruns.
+        self.fifo = None
+        self.overruns = 0
+        self.rxempty()
+        # Host only: the transmit FIFO holds txfifo words (8 if
+        # joined, which can be set here).  They are taken out again
+        # by tick() or advance(), as the state machine sends them.
+        # put() would wait for room on the Pico, so here when it is
+        # full the oldest word is sent straight away and it counts
+        # as a stall.  If txfifo is None, everything is sent straight
+        # away and tx_fifo() is always 0.
+        self.txfifo = PIO_FIFO_DEPTH
+        self.tx = 0
+        self.puts = 0
+        self.stalls = 0
+        # Time to send each word in uS.  uart_tx runs at 8 cycles
+        # a bit and sends 10 bits for each byte.
+        if (freq > 0):
+            self.wordus = 80 * 1000000 / freq
+        else:
+            self.wordus = 320
+        self.txus = 0
+        self.txempty()
+        statemachines[id] = self
+
+    def init(self, prog, freq=-1, **kw):
+        self.prog = prog
+
+    def active(self, value=None):
+        if (value == None):
+            return self.running
+        self.running = value
+
+    def restart(self):
+        pass
+
+    def exec(self, instr):
+        pass
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        pass
+
+    # Words written are kept, along with their bottom 8 bits
+    # in output as that is what uart_tx sends.
+    def put(self, value, shift=0):
+        self.puts += 1
+        if (isinstance(value, int)):
+            value = [value]
+        for w in value:
+            if (self.txfifo == None):
+                pass
+            elif (self.tx >= self.txfifo):
+                self.stalls += 1
+            else:
+                self.tx += 1
+            if (self.capture):
+                w = w >> shift
+                self.words.append(w)
+                self.output.append(w & 0xFF)
+        self.txempty()
+
+    def get(self, buf=None, shift=0):
+        if (buf != None):
+            # Fill the whole buffer, keeping as much of
+            # each word as fits in each item, as the Pico does.
+            # This is a single call on the Pico, so the words are
+            # taken out in one go here too.
+            mask = 0xFF if isinstance(buf, (bytearray, memoryview)) else (1 << (8*buf.itemsize)) - 1
+            n = len(buf)
+            words = self.rx[:n]
+            del self.rx[:n]
+            for i in range(n):
+                buf[i] = (words[i] >> shift) & mask
+            self.rxempty()
+            return None
+        w = self.rx.pop(0) >> shift
+        self.rxempty()
+        return w
+
+    def rxempty(self):
+        if (not self.rx) and (self.id < 8):
+            fstat[PIO_BASE[self.id >> 2] + PIO_FSTAT] |= 1 << (8 + (self.id & 3))
+
+    def rx_fifo(self):
+        return len(self.rx)
+
+    def tx_fifo(self):
+        return self.tx
+
+    def txempty(self):
+        if (self.id < 8):
+            bit = 1 << (24 + (self.id & 3))
+            if (self.tx):
+                fstat[PIO_BASE[self.id >> 2] + PIO_FSTAT] &= ~bit
+            else:
+                fstat[PIO_BASE[self.id >> 2] + PIO_FSTAT] |= bit
+
+    # Host only: the state machine has sent n words from its
+    # transmit FIFO (all of them if n is None).
+    def tick(self, n=1):
+        if (n == None) or (n > self.tx):
+            n = self.tx
+        self.tx -= n
+        self.txempty()
+
+    # Host only: send whatever would have gone in the time since
+    # the last call, with "now" in uS on the same clock as Wire.
+    def advance(self, now):
+        if (now < self.txus):
+            self.txus = now
+        n = int((now - self.txus) / self.wordus)
+        if (self.tx == 0):
+            # Nothing to send, so nothing is carried over
+            self.txus = now
+        elif (n):
+            self.txus += n * self.wordus
+            self.tick(n)
+
+    # Host only: bytes for uart_rx to receive, which puts
+    # each one in the top 8 bits of a word.
+    def inject(self, data):
+        for b in data:
+            if (self.fifo != None) and (len(self.rx) >= self.fifo):
+                self.overruns += 1
+            else:
+                self.rx.append(b << 24)
+                if (self.id < 8):
+                    fstat[PIO_BASE[self.id >> 2] + PIO_FSTAT] &= ~(1 << (8 + (self.id & 3)))
+
+# -----------------------------------------------
+#
+#  MIDI arriving over time
+#
+# -----------------------------------------------
+
+# Host only: passes bytes to a UART or state machine's inject() at
+# the rate they would arrive over a MIDI cable, against a simulated
+# clock in microseconds.  Along with setting the fifo of the UART
+# or state machine, this shows what happens if the project doesn't
+# read them quickly enough.
+#
+#    wire = SimpleMIDIHost.Wire(SimpleMIDIHost.sm(0))
+#    wire.send(bytes([0x90, 60, 100]), 0)
+#    wire.run(1000)   # everything due in the first 1mS arrives
+#
+class Wire:
+
+    def __init__(self, dev, baud=31250):
+        self.dev = dev
+        # 10 bits for each byte, including the start and stop bits
+        self.byteus = 10 * 1000000 / baud
+        self.due = []
+        self.next = 0
+        self.free = 0
+        self.sent = 0
+
+    # Send data starting no sooner than time "at", but
+    # after anything else that is already being sent.
+    def send(self, data, at):
+        t = max(at, self.free)
+        for b in data:
+            t += self.byteus
+            self.due.append((t, b))
+        self.free = t
+        self.sent += len(data)
+
+    # Deliver everything that has arrived by time "now"
+    def run(self, now):
+        due = self.due
+        i = self.next
+        while (i < len(due)) and (due[i][0] <= now):
+            self.dev.inject(bytes([due[i][1]]))
+            i += 1
+        self.next = i
+
+    def waiting(self):
+        return len(self.due) - self.next
+
+# -----------------------------------------------
+#
+#  Installing the stand-ins
+#
+# -----------------------------------------------
+def makeModule(name, names):
+    mod = types.ModuleType(name)
+    g = globals()
+    for n in names:
+        setattr(mod, n, g[n])
+    return mod
+
+machine = makeModule("machine", ["Pin", "UART", "SPI", "ADC", "Timer", "freq", "reset", "mem32"])
+rp2 = makeModule("rp2", ["PIO", "StateMachine", "asm_pio"])
+utime = makeModule("utime", ["ticks_ms", "ticks_us", "ticks_cpu", "ticks_add", "ticks_diff",
+                             "sleep_ms", "sleep_us"])
+utime.sleep = time.sleep
+utime.time = time.time
+
+def install(paths=None):
+    sys.modules["machine"] = machine
+    sys.modules["rp2"] = rp2
+    sys.modules["utime"] = utime
+    sys.modules["ustruct"] = struct
+    # Any other directories with projects or libraries in
+    if (paths):
+        for p in paths:
+            if p not in sys.path:
+                sys.path.append(p)
+
+# Use an SPI device model for an SPI bus when it is created
+def spiDevice(id, device):
+    spidevices[id] = device
+    if id in spis:
+        spis[id].device = device
+
+# Connect a UART to a new pseudo terminal when it is created,
+# and return the name of the other end for other software to use.
+def uartPty(id):
+    import pty
+    master, slave = pty.openpty()
+    os.set_blocking(master, False)
+    ptys[id] = master
+    if id in uarts:
+        uarts[id].fd = master
+    return os.ttyname(slave)
+
+def uart(id):
+    return uarts[id]
+
+def sm(id):
+    return statemachines[id]
+
+# Let every state machine send what it would have by time "now" (uS)
+def advance(now):
+    for s in statemachines.values():
+        s.advance(now)
+
+def pin(id):
+    return pins[id]
+
+def spi(id):
+    return spis[id]
@@ -0,0 +1,124 @@
+# Simple MIDI Log
+# for Micro Python or Circuit Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Printing to the REPL over USB serial can take several milliseconds,
+# which is far too long to do for every MIDI message.  This provides
+# a lightweight alternative:
+#
+#   * A counter for each type of event.
+#   * A ring buffer of the most recent events, which can be printed
+#     out on demand with dump().
+#
+# The level determines how much is done for each event:
+#
+#    LOG_OFF   - nothing
+#    LOG_COUNT - count each event (default)
+#    LOG_TRACE - count and record each event in the ring buffer
+#    LOG_PRINT - count, record and print each event (slow!)
+#
+# Events are numbered from 0 and given names when the log is created.
+# Each event can record up to four numbers with it.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDILog
+#
+#    EV_RX = 0
+#    EV_TX = 1
+#    log = SimpleMIDILog.SimpleMIDILog(["RX", "TX"], SimpleMIDILog.LOG_TRACE)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        log.event(EV_RX, ch, cmd, note, vel)
+#
+#    ...then from the REPL at any point:
+#
+#    >>> log.dump()
+#---------------------
+#
+LOG_OFF   = 0
+LOG_COUNT = 1
+LOG_TRACE = 2
+LOG_PRINT = 3
+
+# Number of values stored for each event in the ring buffer
+LOG_ENTRY = 5
+
+class SimpleMIDILog:
+
+    def __init__(self, names, level=LOG_COUNT, size=32):
+        self.names = names
+        self.level = level
+        self.size = size
+        self.counts = [0] * len(names)
+        # The ring buffer is allocated once and reused
+        self.ring = [0] * (size * LOG_ENTRY)
+        self.head = 0
+        self.num = 0
+
+    def event(self, ev, a=0, b=0, c=0, d=0):
+        if (self.level == LOG_OFF):
+            return
+        self.counts[ev] += 1
+        if (self.level >= LOG_TRACE):
+            r = self.ring
+            i = self.head * LOG_ENTRY
+            r[i] = ev
+            r[i+1] = a
+            r[i+2] = b
+            r[i+3] = c
+            r[i+4] = d
+            self.head += 1
+            if (self.head >= self.size):
+                self.head = 0
+            if (self.num < self.size):
+                self.num += 1
+            if (self.level >= LOG_PRINT):
+                print (self.names[ev], "\t", a, "\t", b, "\t", c, "\t", d)
+
+    def count(self, ev):
+        return self.counts[ev]
+
+    def clear(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.head = 0
+        self.num = 0
+
+    def dump(self):
+        # Print the recent events, oldest first, then the counters
+        i = self.head - self.num
+        if (i < 0):
+            i += self.size
+        for n in range(self.num):
+            e = i * LOG_ENTRY
+            print (self.names[self.ring[e]], "\t", self.ring[e+1], "\t", self.ring[e+2], "\t", self.ring[e+3], "\t", self.ring[e+4])
+            i += 1
+            if (i >= self.size):
+                i = 0
+        for ev in range(len(self.names)):
+            print (self.names[ev], "\t", self.counts[ev])
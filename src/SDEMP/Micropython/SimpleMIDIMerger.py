@@ -0,0 +1,391 @@
+# Simple MIDI Merger
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Merges MIDI from several inputs onto one output.
+#
+# Writing each message out as soon as its decoder completes it means
+# a busy input can keep all the others waiting, and a SysEx message
+# passed on a chunk at a time could end up with other messages in
+# the middle of it.  Instead, each input gets its own queue:
+#
+#   * Complete messages are added to the input's queue, along with
+#     the time they arrived.  If there isn't room the whole message
+#     is dropped and counted.  The queues are big enough for a SysEx
+#     message of up to MERGE_SYSEXMAX bytes by default, so if the
+#     decoders are given a bigger sysexmax, increase size to match.
+#   * service() is called from the main loop and takes whole
+#     messages from the queues in turn, either:
+#        MERGE_ROUNDROBIN - one from each input with anything waiting
+#        MERGE_OLDEST     - whichever has been waiting longest (this
+#                           needs a clock, e.g. utime.ticks_us)
+#   * Everything goes out through a SimpleMIDIEncoder, so running
+#     status is used on the output.
+#   * SysEx messages are queued whole and written out in one go, so
+#     nothing else can end up in the middle of them.
+#   * Realtime bytes (e.g. MIDI clock) aren't queued at all, but go
+#     straight out between messages.
+#
+# Each input keeps the most messages that have been waiting at once
+# ("high water"), how many were dropped, and how long messages have
+# waited (average and longest).  rate() gives the output bytes per
+# second since the stats were last cleared.
+#
+# Example Usage:
+#
+#---------------------
+#    import utime
+#    import SimpleMIDIMerger
+#
+#    uart = machine.UART(0,31250)
+#    merger = SimpleMIDIMerger.SimpleMIDIMerger(uart.write, 8, clock=utime.ticks_us, diff=utime.ticks_diff)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel,idx):
+#        merger.send(idx, cmd+ch-1, note, vel)
+#
+#    def doMidiSysEx(data,idx):
+#        merger.sysex(idx, data)
+#
+#    def doMidiRealtime(cmd,ts,idx):
+#        merger.realtime(cmd)
+#
+#    while True:
+#        ... read and decode MIDI, decoders created with their input number ...
+#        merger.service()
+#---------------------
+#
+# Use merger.dump() from the REPL to see the stats.
+#
+import SimpleMIDIDecoder
+import SimpleMIDIEncoder
+
+MERGE_ROUNDROBIN = 0
+MERGE_OLDEST     = 1
+
+# Most bytes written to the output in one go (used for SysEx)
+MERGE_CHUNK = 32
+
+# Largest SysEx message that will be passed on.  This matches the
+# default sysexmax for SimpleMIDIDecoder, and each input's queue must
+# be able to hold one of these (plus an 0xF7 if it was cut short)
+# or it will always be dropped.
+MERGE_SYSEXMAX = 256
+
+# Default size of each input's queue in bytes.  Room for the biggest
+# SysEx with some channel messages either side of it.
+MERGE_SIZE = MERGE_SYSEXMAX + 64
+
+# One input's queue.  The bytes for each message are kept in a ring
+# buffer, with the length and arrival time of each message in
+# another ring alongside.
+class SimpleMIDIMergeQueue:
+
+    def __init__(self, size=MERGE_SIZE, maxmsgs=32):
+        self.size = size
+        self.queue = bytearray(size)
+        self.head = 0
+        self.num = 0
+        self.maxmsgs = maxmsgs
+        self.lens = [0] * maxmsgs
+        self.times = [0] * maxmsgs
+        self.mhead = 0
+        self.mnum = 0
+        # Stats
+        self.drops = 0
+        self.highwater = 0
+        self.sent = 0
+        self.latsum = 0
+        self.latmax = 0
+
+    def room(self, n):
+        if (self.mnum >= self.maxmsgs) or (self.num + n > self.size):
+            self.drops += 1
+            return False
+        return True
+
+    def add(self, n, ts):
+        tail = self.mhead + self.mnum
+        if (tail >= self.maxmsgs):
+            tail -= self.maxmsgs
+        self.lens[tail] = n
+        self.times[tail] = ts
+        self.num += n
+        self.mnum += 1
+        if (self.mnum > self.highwater):
+            self.highwater = self.mnum
+
+    # Queue a channel or system common message.  Only the bytes
+    # the message actually uses are stored.
+    def put(self, b0, b1, b2, ts):
+        n = SimpleMIDIDecoder.MIDI_DATALEN[b0] + 1
+        if (not self.room(n)):
+            return False
+        queue = self.queue
+        size = self.size
+        tail = self.head + self.num
+        if (tail >= size):
+            tail -= size
+        queue[tail] = b0
+        if (n > 1):
+            tail += 1
+            if (tail >= size):
+                tail = 0
+            queue[tail] = b1
+            if (n > 2):
+                tail += 1
+                if (tail >= size):
+                    tail = 0
+                queue[tail] = b2
+        self.add(n, ts)
+        return True
+
+    # Queue a complete SysEx message.  If it was cut short by
+    # another status byte it is given its missing 0xF7.
+    def putbuf(self, buf, ts):
+        n = len(buf)
+        end = 0
+        if (buf[n-1] != 0xF7):
+            end = 1
+        if (not self.room(n+end)):
+            return False
+        queue = self.queue
+        size = self.size
+        tail = self.head + self.num
+        for i in range(n):
+            if (tail >= size):
+                tail -= size
+            queue[tail] = buf[i]
+            tail += 1
+        if (end):
+            if (tail >= size):
+                tail -= size
+            queue[tail] = 0xF7
+        self.add(n+end, ts)
+        return True
+
+    def next(self):
+        # Length of the next message waiting (0 if none)
+        if (self.mnum):
+            return self.lens[self.mhead]
+        return 0
+
+    def nexttime(self):
+        return self.times[self.mhead]
+
+    def byte(self):
+        mb = self.queue[self.head]
+        self.head += 1
+        if (self.head >= self.size):
+            self.head = 0
+        self.num -= 1
+        return mb
+
+    # Finished with the message at the front
+    def done(self, lat):
+        self.mhead += 1
+        if (self.mhead >= self.maxmsgs):
+            self.mhead = 0
+        self.mnum -= 1
+        self.sent += 1
+        self.latsum += lat
+        if (lat > self.latmax):
+            self.latmax = lat
+
+class SimpleMIDIMerger:
+
+    def __init__(self, write, numinputs, size=MERGE_SIZE, maxmsgs=32, policy=MERGE_ROUNDROBIN,
+                 clock=None, diff=None, units=1000000, ready=None):
+        self.out = SimpleMIDIEncoder.SimpleMIDIEncoder(write)
+        self.policy = policy
+        self.clock = clock
+        self.diff = diff
+        self.units = units
+        self.ready = ready
+        self.inputs = []
+        for i in range(numinputs):
+            self.inputs.append(SimpleMIDIMergeQueue(size, maxmsgs))
+        self.nextin = 0
+        self.rtsent = 0
+        # Scratch buffer for writing SysEx, with a view
+        # for each length so that writing doesn't allocate.
+        self.scratch = bytearray(MERGE_CHUNK)
+        mv = memoryview(self.scratch)
+        self.scratchmv = []
+        for i in range(MERGE_CHUNK+1):
+            self.scratchmv.append(mv[0:i])
+        self.clear()
+
+    def now(self):
+        if (self.clock):
+            return self.clock()
+        return 0
+
+    # Time from ts to now
+    def since(self, ts, now):
+        if (self.diff):
+            return self.diff(now, ts)
+        return now - ts
+
+    # Queue a channel or system common message from an input.
+    # For two byte messages b2 is ignored.
+    # Returns False if it had to be dropped.
+    def send(self, i, b0, b1=0, b2=0):
+        return self.inputs[i].put(b0, b1 & 0x7F, b2 & 0x7F, self.now())
+
+    # Queue a complete SysEx message (including the F0 and F7)
+    def sysex(self, i, data):
+        return self.inputs[i].putbuf(data, self.now())
+
+    # Realtime bytes go straight out
+    def realtime(self, mb):
+        self.rtsent += 1
+        self.out.realtime(mb)
+
+    # Which input to take the next message from, or -1 if
+    # nothing is waiting.
+    def choose(self):
+        inputs = self.inputs
+        num = len(inputs)
+        if (self.policy == MERGE_OLDEST):
+            now = self.now()
+            best = -1
+            bestage = -1
+            for i in range(num):
+                if (inputs[i].mnum):
+                    age = self.since(inputs[i].nexttime(), now)
+                    if (age > bestage):
+                        best = i
+                        bestage = age
+            return best
+        i = self.nextin
+        for c in range(num):
+            if (inputs[i].mnum):
+                self.nextin = i + 1
+                if (self.nextin >= num):
+                    self.nextin = 0
+                return i
+            i += 1
+            if (i >= num):
+                i = 0
+        return -1
+
+    # Write one whole message from input i
+    def writeMsg(self, i):
+        q = self.inputs[i]
+        n = q.next()
+        lat = self.since(q.nexttime(), self.now())
+        b0 = q.byte()
+        if (b0 == 0xF0):
+            # SysEx, written in chunks one after the other
+            scratch = self.scratch
+            scratch[0] = b0
+            cnt = 1
+            n -= 1
+            while (n):
+                scratch[cnt] = q.byte()
+                cnt += 1
+                n -= 1
+                if (cnt == MERGE_CHUNK) or (n == 0):
+                    self.out.writebuf(self.scratchmv[cnt])
+                    cnt = 0
+        elif (n == 3):
+            self.out.send(b0, q.byte(), q.byte())
+        elif (n == 2):
+            self.out.send(b0, q.byte())
+        else:
+            self.out.send(b0)
+        q.done(lat)
+
+    # Write out waiting messages, as many as the output will take if
+    # there is a ready function, otherwise everything.  A message is
+    # always written whole.  Returns the number of messages still
+    # waiting.
+    def service(self):
+        if (self.ready):
+            space = self.ready()
+            if (space <= 0):
+                return self.pending()
+        else:
+            space = None
+        written = False
+        while True:
+            last = self.nextin
+            i = self.choose()
+            if (i == -1):
+                return 0
+            if (space != None):
+                # A SysEx bigger than the space is still written if
+                # it is the first, or a long one might never go.
+                n = self.inputs[i].next()
+                if (n > space) and ((written) or (n <= 3)):
+                    # Leave it to be first next time
+                    self.nextin = last
+                    break
+                space -= n
+            self.writeMsg(i)
+            written = True
+        return self.pending()
+
+    def pending(self):
+        cnt = 0
+        for q in self.inputs:
+            cnt += q.mnum
+        return cnt
+
+    def drops(self):
+        cnt = 0
+        for q in self.inputs:
+            cnt += q.drops
+        return cnt
+
+    # Output bytes per second since the stats were cleared
+    def rate(self):
+        secs = self.since(self.start, self.now()) / self.units
+        if (secs <= 0):
+            return 0
+        return (self.out.sent - self.startsent) / secs
+
+    def clear(self):
+        self.start = self.now()
+        self.startsent = self.out.sent
+        for q in self.inputs:
+            q.drops = 0
+            q.highwater = q.mnum
+            q.sent = 0
+            q.latsum = 0
+            q.latmax = 0
+
+    def dump(self):
+        for i in range(len(self.inputs)):
+            q = self.inputs[i]
+            if (q.sent):
+                latavg = q.latsum // q.sent
+            else:
+                latavg = 0
+            print (i, "waiting:", q.mnum, "high water:", q.highwater, "dropped:", q.drops,
+                   "sent:", q.sent, "wait avg:", latavg, "max:", q.latmax)
+        print ("Output:", self.out.sent, "bytes,", int(self.rate()), "bytes/sec,",
+               "status bytes saved:", self.out.saved)
@@ -25,16 +25,31 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py, SimpleMIDIRouter.py, SimpleMIDIEncoder.py,
+# SimpleMIDIScheduler.py, SimpleMIDIPIOTx.py, SimpleMIDIRx.py and
+# SimpleMIDILog.py modules from @diyelectromusic too (and SimpleMIDIProfile.py to use PROFILE).
 #
 import machine
 import rp2
 import utime
-import ustruct
 import SimpleMIDIDecoder
+import SimpleMIDIRouter
+import SimpleMIDIPIOTx
+import SimpleMIDIRx
+import SimpleMIDIEncoder
+import SimpleMIDIScheduler
+import SimpleMIDILog
 
 ledpin = machine.Pin(25, machine.Pin.OUT)
 
+# Messages are counted rather than printed as printing to the
+# REPL is too slow to keep up.  Set the level to LOG_TRACE to also
+# keep the most recent messages, which can be seen using log.dump()
+# from the REPL, or LOG_PRINT to print them as they are sent.
+EV_TX      = 0
+EV_NOROUTE = 1
+log = SimpleMIDILog.SimpleMIDILog(["TX", "NOROUTE"], SimpleMIDILog.LOG_COUNT)
+
 def ledFlash():
     ledpin.value(1)
     utime.sleep_ms(100)
@@ -59,6 +74,9 @@ HW_NUM_UARTS = 2
 #
 # NB: -1 for CH, CMD or SRC means "any"
 #
+# Realtime messages (e.g. MIDI clock) have no channel, so they
+# are routed as CMD 0xF0 on CH 1.
+#
 MIDIRT = [
     [-1, -1, 2, 2],  # Anything on port 2 to port 2
     [-1, -1, 3, 3],  # Anything on port 3 to port 3
@@ -76,31 +94,18 @@ MIDIRT = [
 # of no other matches.  Set to -1 to disable.
 MIDIDEF = -1
 
-def midiRouter(s_ch,s_cmd,s_src):
-    d_dst = []
-    
-    # Return the destination serial ports to use
-    # based on the channel, command, and source
-    # serial port that received the message.
-    #
-    # This will return all routes that match,
-    # regardless of how specific the route is.
-    #
-    for r in MIDIRT:
-        ch,cmd,src,dst = r
-        if (ch == -1) or (s_ch == ch):
-            if (cmd == -1) or (s_cmd == cmd):
-                if (src == -1) or (s_src == src):
-                    print ("[",s_ch,",",s_cmd,",",s_src,"]\tMatched route: [",ch,",",cmd,",",src,",",dst,"] --> ", dst)
-                    d_dst.append(dst)
-    
-    if (not d_dst):
-        if (MIDIDEF != -1):
-            # Return the default route if one is configured
-            d_dst.append(MIDIDEF)
-
-    # Return the destinations found, eliminating duplicates
-    return set(d_dst)
+# The routing table is compiled once from MIDIRT, so finding the
+# destination serial ports for a message is a single lookup based
+# on the channel, command, and source serial port that received it.
+#
+# This will return all routes that match, regardless of how
+# specific the route is, with duplicates eliminated.
+#
+# If the routes are changed, use router.setRoutes() or
+# router.addRoute() so the table is rebuilt.
+#
+router = SimpleMIDIRouter.SimpleMIDIRouter(HW_NUM_UARTS+RX_NUM_UARTS, MIDIRT, MIDIDEF)
+midiRouter = router.route
 
 hw_uarts = []
 for i in range(HW_NUM_UARTS):
@@ -166,6 +171,14 @@ for i in range(RX_NUM_UARTS):
     rsm.active(1)
     rx_uarts.append(rsm)
     ledFlash()
+# The RX state machines' FIFOs only hold 4 bytes, which is less than
+# the time it takes to print a message with LOG_PRINT or to profile
+# one, so they are emptied into ring buffers by a timer interrupt
+# (started in main()) and the main loop decodes them from there.
+# Use rx.dump() from the REPL to see if anything has been lost.
+rx = SimpleMIDIRx.SimpleMIDIRx()
+for i in range(RX_NUM_UARTS):
+    rx.addPIO(rx_uarts[i])
 
 tx_uarts = []
 for i in range(TX_NUM_UARTS):
@@ -173,36 +186,47 @@ for i in range(TX_NUM_UARTS):
         RX_NUM_UARTS+i, uart_tx, freq=8 * UART_BAUD, sideset_base=machine.Pin(TX_PIN_BASE + i), out_base=machine.Pin(TX_PIN_BASE + i)
     )
     tsm.active(1)
-    tx_uarts.append(tsm)
+    tx_uarts.append(SimpleMIDIPIOTx.SimpleMIDIPIOTx(tsm))
     ledFlash()
 
-def pio_midi_send(pio_uart, cmd, ch, b1, b2):
-    sm = tx_uarts[pio_uart]
-    
+# Each output port has its own queue, so that a burst of data to
+# one port doesn't hold up any of the others.  They are emptied from
+# the main loop, only writing as much as each port can take without
+# blocking, with any realtime messages going first.
+#
+# Use sched.dump() from the REPL to see how full the queues get
+# and whether anything has been dropped.
+#
+# The hardware serial ports come first, followed by the PIO serial ports.
+HW_UART_FIFO = 32
+def hwReady(uart):
+    # The UART's hardware FIFO is empty once everything is sent
+    def ready():
+        if (uart.txdone()):
+            return HW_UART_FIFO
+        return 0
+    return ready
+
+sched = SimpleMIDIScheduler.SimpleMIDIScheduler()
+for i in range(HW_NUM_UARTS):
+    sched.addPort(hw_uarts[i].write, hwReady(hw_uarts[i]))
+for i in range(TX_NUM_UARTS):
+    sched.addPort(tx_uarts[i].write, tx_uarts[i].space)
+
+# Each output port also has its own encoder to keep track of
+# running status on that port.
+midiOut = []
+for i in range(HW_NUM_UARTS+TX_NUM_UARTS):
+    midiOut.append(SimpleMIDIEncoder.SimpleMIDIEncoder(sched.ports[i].write))
+
+def midi_send(uart, cmd, ch, b1, b2):
+    log.event(EV_TX, uart, cmd+ch-1, b1, b2)
     # Build the first MIDI byte:
     #   0xCn
     #     C = MIDI command (e.g. 8 for NoteOff)
     #     n = MIDI channel (0 to 15)
-    b0 = cmd + ch-1
-    sm.put(b0)
-    sm.put(b1)
-    if b2 != -1:
-        sm.put(b2)
-
-def uart_midi_send(uart, cmd, ch, b1, b2):
-    if (b2 == -1):
-        hw_uarts[uart].write(ustruct.pack("bb",cmd+ch-1,b1))
-    else:
-        hw_uarts[uart].write(ustruct.pack("bbb",cmd+ch-1,b1,b2))
-
-def midi_send(uart, cmd, ch, b1, b2):
-    print ("Sending (",ch,cmd,b1,b2,") to port ", uart)
-    if (uart < HW_NUM_UARTS):
-        # Use hardware serial port
-        uart_midi_send(uart, cmd, ch, b1, b2)
-    else:
-        # Use PIO serial port
-        pio_midi_send(uart-HW_NUM_UARTS, cmd, ch, b1, b2)
+    # The encoder works out how many data bytes to send.
+    midiOut[uart].send(cmd+ch-1, b1, b2)
 
 # Basic MIDI handling commands.
 # These will only be called when a MIDI decoder
@@ -215,37 +239,75 @@ def midi_send(uart, cmd, ch, b1, b2):
 def doMidiNoteOn(ch,cmd,note,vel,src):
     ledOn()
     dst = midiRouter(ch, cmd, src)
-    if dst:
-        for d in dst:
-            midi_send(d, cmd, ch, note, vel)
+    if not dst:
+        log.event(EV_NOROUTE, src, cmd+ch-1)
+    for d in dst:
+        midi_send(d, cmd, ch, note, vel)
 
 def doMidiNoteOff(ch,cmd,note,vel,src):
     ledOff()
     dst = midiRouter(ch, cmd, src)
-    if dst:
-        for d in dst:
-            midi_send(d, cmd, ch, note, vel)
+    if not dst:
+        log.event(EV_NOROUTE, src, cmd+ch-1)
+    for d in dst:
+        midi_send(d, cmd, ch, note, vel)
 
 def doMidiThru(ch,cmd,d1,d2,src):
     dst = midiRouter(ch, cmd, src)
-    if dst:
-        for d in dst:
-            midi_send(d, cmd, ch, d1, d2)
+    if not dst:
+        log.event(EV_NOROUTE, src, cmd+ch-1)
+    for d in dst:
+        midi_send(d, cmd, ch, d1, d2)
+
+def doMidiRealtime(cmd,ts,src):
+    for d in midiRouter(1, 0xF0, src):
+        midiOut[d].realtime(cmd)
 
 md = []
 for i in range(HW_NUM_UARTS+RX_NUM_UARTS):
     # Set up one MIDI decoder per hardware UARTs
-    md_t = SimpleMIDIDecoder.SimpleMIDIDecoder(i)
+    md_t = SimpleMIDIDecoder.SimpleMIDIDecoder(i, realtime=True)
     md_t.cbNoteOn (doMidiNoteOn)
     md_t.cbNoteOff (doMidiNoteOff)
     md_t.cbThru (doMidiThru)
+    md_t.cbRealtime (doMidiRealtime)
     md.append(md_t)
 
-while True:
+# Set PROFILE to True to find out how much memory is allocated for
+# each type of MIDI message, and when sending and emptying the output
+# queues.  Use prof.dump() from the REPL to see the results.  This
+# slows everything down, so only use it to look for problems.
+PROFILE = False
+if (PROFILE):
+    import SimpleMIDIProfile
+    prof = SimpleMIDIProfile.SimpleMIDIProfile()
+    for i in range(len(md)):
+        prof.wrapDecoder(md[i])
+    midi_send = prof.wrap("midi_send", midi_send)
+    sched.service = prof.wrap("service", sched.service)
+
+# Each time round the main loop is in poll(), so that this can also
+# be imported and driven from elsewhere, e.g. on a desktop computer
+# using SimpleMIDIHost.py.  It only runs by itself when run directly.
+def poll():
     for i in range(HW_NUM_UARTS):
-        if (hw_uarts[i].any()):
-            md[i].read(hw_uarts[i].read(1)[0])
+        n = hw_uarts[i].any()
+        if (n):
+            md[i].feed(hw_uarts[i].read(n))
 
+    # Until main() has started the interrupt (e.g. when driven from
+    # a desktop computer) the PIO inputs are emptied here instead.
+    if (not rx.timer):
+        rx.irq()
     for i in range(RX_NUM_UARTS):
-        if (rx_uarts[i].rx_fifo()):
-            md[HW_NUM_UARTS+i].read(rx_uarts[i].get() >> 24)
+        rx.feed(i, md[HW_NUM_UARTS+i])
+
+    sched.service()
+
+def main():
+    rx.start()
+    while True:
+        poll()
+
+if __name__ == "__main__":
+    main()
@@ -25,11 +25,14 @@
 #      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 #      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
-# This needs the SimpleMIDIDecoder.py module from @diyelectromusic too.
+# This needs the SimpleMIDIDecoder.py, SimpleMIDIPIOTx.py and
+# SimpleMIDILog.py modules from @diyelectromusic too.
 #
 from machine import Pin, UART
 from rp2 import PIO, StateMachine, asm_pio
 import SimpleMIDIDecoder
+import SimpleMIDIPIOTx
+import SimpleMIDILog
 
 # Basic hardware parameters
 UART_BAUD = 31250
@@ -66,38 +69,214 @@ MIDIRT = [
      }
     ]
 
-ledpin = Pin(MIDI_LED, machine.Pin.OUT)
+# Notes are counted rather than printed as printing to the
+# REPL is too slow to keep up.  Set the level to LOG_TRACE to also
+# keep the most recent notes, which can be seen using log.dump()
+# (or dumpPorts() for the current state of the ports) from the REPL.
+EV_ROUTED = 0
+EV_NOPORT = 1
+EV_STOLEN = 2
+log = SimpleMIDILog.SimpleMIDILog(["ROUTED", "NOPORT", "STOLEN"], SimpleMIDILog.LOG_COUNT)
+
+ledpin = Pin(MIDI_LED, Pin.OUT)
 hw_uart = UART(HW_UART,UART_BAUD)
 
-# MIDI routing function
-def midi2port (cmd, ch, note):
-    # NoteOn
-    if cmd == 0x90:
+# How to choose the port for each new note on a channel:
+#
+#    BAL_FIRST       - the first port listed with a free slot, so the
+#                      first port gets the most notes
+#    BAL_ROUNDROBIN  - the next port with a free slot after the one
+#                      used for the last note on the channel
+#    BAL_LEASTLOADED - the port with a free slot that is playing the
+#                      fewest notes (on any channel), or if several
+#                      are, the one that has been sent the fewest
+#    BAL_STEAL       - as BAL_LEASTLOADED, but if there are no free
+#                      slots, the oldest note on the channel is
+#                      stopped and its slot used instead
+#
+# A note that is already playing on the channel is always sent
+# again to the port that is playing it.
+BAL_FIRST       = 0
+BAL_ROUNDROBIN  = 1
+BAL_LEASTLOADED = 2
+BAL_STEAL       = 3
+BALANCE = BAL_LEASTLOADED
+
+# MIDIRT is turned into a set of tables when the balancer starts,
+# so that routing each note is a few lookups rather than searching
+# through all the ports and slots.  Each entry in MIDIRT for a
+# channel becomes a "group" of slots on a port.
+#
+# The slots are kept in bytearrays, with NOTE_NONE marking a free slot
+# or a note that isn't playing, so there can be up to 254 of them.
+NOTE_NONE = 0xFF
+
+def balancerInit():
+    global grpPort, grpBase, grpSize, grpActive, chFirst, chNum, chNext
+    global slotNote, slotGroup, slotAge, freeSlots, note2slot
+    global portActive, portNotes, age, stolenNote, stolenPort
+    groups = []
+    chFirst = bytearray(17)
+    chNum = bytearray(17)
+    for ch in range(1, 17):
+        chFirst[ch] = len(groups)
         for r in MIDIRT:
             if r['ch'] == ch:
                 for p in r['ports']:
-                    for n in range(len(p['playing'])):
-                        if p['playing'][n] == 0:
-                            # There are free playing slots on this port
-                            p['playing'][n] = note
-                            # Only return first free port
-                            return p['port']
+                    groups.append((p['port'], len(p['playing'])))
+        chNum[ch] = len(groups) - chFirst[ch]
+
+    numslots = 0
+    for port, size in groups:
+        numslots += size
+    grpPort = bytearray(len(groups))
+    grpBase = bytearray(len(groups))
+    grpSize = bytearray(len(groups))
+    grpActive = bytearray(len(groups))
+    slotNote = bytearray(numslots)
+    slotGroup = bytearray(numslots)
+    slotAge = [0] * numslots
+    # Free slots for each group are a stack starting at the group's
+    # first slot, with the lowest numbered slot on top.
+    freeSlots = bytearray(numslots)
+    s = 0
+    for g in range(len(groups)):
+        grpPort[g], grpSize[g] = groups[g]
+        grpBase[g] = s
+        for n in range(grpSize[g]):
+            slotNote[s+n] = NOTE_NONE
+            slotGroup[s+n] = g
+            freeSlots[s+n] = s + grpSize[g]-1-n
+        s += grpSize[g]
+
+    # Slot playing each note, indexed by ch*128 + note
+    note2slot = bytearray(17*128)
+    for i in range(len(note2slot)):
+        note2slot[i] = NOTE_NONE
+
+    # Round robin position for each channel
+    chNext = bytearray(17)
+
+    # Notes playing now and NoteOns sent in total for each port
+    portActive = bytearray(NUM_UARTS)
+    portNotes = [0] * NUM_UARTS
+    age = 0
+    stolenNote = -1
+    stolenPort = -1
+
+def chooseGroup(ch):
+    first = chFirst[ch]
+    last = first + chNum[ch]
+    if (BALANCE == BAL_ROUNDROBIN):
+        g = first + chNext[ch]
+        for n in range(first, last):
+            if (grpActive[g] < grpSize[g]):
+                chNext[ch] = g+1-first if (g+1 < last) else 0
+                return g
+            g += 1
+            if (g >= last):
+                g = first
+        return -1
+
+    if (BALANCE >= BAL_LEASTLOADED):
+        best = -1
+        for g in range(first, last):
+            if (grpActive[g] < grpSize[g]):
+                if (best == -1):
+                    best = g
+                else:
+                    p = grpPort[g]
+                    b = grpPort[best]
+                    if (portActive[p] < portActive[b]) or \
+                       ((portActive[p] == portActive[b]) and (portNotes[p] < portNotes[b])):
+                        best = g
+        return best
+
+    for g in range(first, last):
+        if (grpActive[g] < grpSize[g]):
+            return g
+    return -1
+
+# The slot playing the oldest note on a channel.  The slots for
+# a channel's groups are all together, so this is only a search
+# through those, and only happens when they are all in use.
+def oldestSlot(ch):
+    first = chFirst[ch]
+    last = first + chNum[ch] - 1
+    oldest = grpBase[first]
+    for s in range(oldest, grpBase[last]+grpSize[last]):
+        if (slotAge[s] < slotAge[oldest]):
+            oldest = s
+    return oldest
+
+# Stop the note playing in a slot so it can be used for another
+def stealSlot(ch, s):
+    global stolenNote, stolenPort
+    stolenNote = slotNote[s]
+    stolenPort = grpPort[slotGroup[s]]
+    note2slot[ch*128 + stolenNote] = NOTE_NONE
+
+# MIDI routing function.  If a note had to be stopped to make room
+# for a NoteOn, it is left in stolenNote and stolenPort.
+def midi2port (cmd, ch, note):
+    global age, stolenNote
+    stolenNote = -1
+    i = ch*128 + note
+
+    # NoteOn
+    if cmd == 0x90:
+        s = note2slot[i]
+        if (s != NOTE_NONE):
+            # Already playing, so send it to the same port again
+            return grpPort[slotGroup[s]]
+        if (chNum[ch] == 0):
+            return -1
+        g = chooseGroup(ch)
+        if (g != -1):
+            # Take the next free slot in the group
+            s = freeSlots[grpBase[g] + grpSize[g] - grpActive[g] - 1]
+            grpActive[g] += 1
+            portActive[grpPort[g]] += 1
+        elif (BALANCE == BAL_STEAL):
+            s = oldestSlot(ch)
+            g = slotGroup[s]
+            stealSlot(ch, s)
+        else:
+            return -1
+        slotNote[s] = note
+        note2slot[i] = s
+        age += 1
+        slotAge[s] = age
+        portNotes[grpPort[g]] += 1
+        return grpPort[g]
 
     # NoteOff
     elif cmd == 0x80:
-        for r in MIDIRT:
-            if r['ch'] == ch:
-                for p in r['ports']:
-                    for n in range(len(p['playing'])):
-                        if p['playing'][n] == note:
-                            # Found our note, so free the slot
-                            p['playing'][n] = 0
-                            # Only return first matched port
-                            return p['port']
+        s = note2slot[i]
+        if (s == NOTE_NONE):
+            return -1
+        note2slot[i] = NOTE_NONE
+        slotNote[s] = NOTE_NONE
+        # Put the slot back on the group's free stack
+        g = slotGroup[s]
+        portActive[grpPort[g]] -= 1
+        grpActive[g] -= 1
+        freeSlots[grpBase[g] + grpSize[g] - grpActive[g] - 1] = s
+        return grpPort[g]
 
     # Can't route
     return -1
 
+def dumpPorts():
+    for port in range(NUM_UARTS):
+        notes = []
+        for s in range(len(slotNote)):
+            if (grpPort[slotGroup[s]] == port) and (slotNote[s] != NOTE_NONE):
+                notes.append(slotNote[s])
+        print (port, "playing:", portActive[port], notes, "total:", portNotes[port])
+
+balancerInit()
+
 @asm_pio(sideset_init=PIO.OUT_HIGH, out_init=PIO.OUT_HIGH, out_shiftdir=PIO.SHIFT_RIGHT)
 def uart_tx():
     #; An 8n1 UART transmit program.
@@ -121,7 +300,7 @@ for i in range(NUM_UARTS):
         i, uart_tx, freq=8 * UART_BAUD, sideset_base=Pin(PIN_BASE + i), out_base=Pin(PIN_BASE + i)
     )
     sm.active(1)
-    tx_uarts.append(sm)
+    tx_uarts.append(SimpleMIDIPIOTx.SimpleMIDIPIOTx(sm))
 
 # port = PIO port to use (0 to NUM_PORTS-1)
 #  cmd = MIDI command (0x8n-0xEn)
@@ -132,33 +311,39 @@ def pio_midi_send(port, cmd, ch, b1, b2):
     if port >= NUM_PORTS or port < 0:
         return
 
-    sm = tx_uarts[port]
-    
     # Build the first MIDI byte:
     #   0xCn
     #     C = MIDI command (e.g. 8 for NoteOff)
     #     n = MIDI channel (0 to 15)
+    # The transmitter works out how many data bytes to send.
     b0 = cmd + ch-1
-    sm.put(b0)
-    sm.put(b1)
-    if (b2 != -1):
-        sm.put(b2)
+    tx_uarts[port].send(b0, b1, b2)
     #print ("Sent ",hex(b0),b1,b2)
 
 # Basic MIDI handling commands
 def doMidiNoteOn(ch,cmd,note,vel):
     #print(ch,"\tNote On \t", note, "\t", vel)
     port = midi2port (cmd, ch, note)
+    if stolenNote != -1:
+        log.event(EV_STOLEN, stolenPort, cmd+ch-1, stolenNote)
+        pio_midi_send(stolenPort, 0x80, ch, stolenNote, 0)
     if port != -1:
+        log.event(EV_ROUTED, port, cmd+ch-1, note)
         ledpin.value(1)
         pio_midi_send(port, cmd, ch, note, vel)
+    else:
+        log.event(EV_NOPORT, -1, cmd+ch-1, note)
 
 def doMidiNoteOff(ch,cmd,note,vel):
     #print(ch,"\tNote Off\t", note, "\t", vel)
-    port = midi2port (cmd, ch, note)
+    # NB: cmd is 0x90 for a NoteOn with zero velocity
+    port = midi2port (0x80, ch, note)
     if port != -1:
+        log.event(EV_ROUTED, port, cmd+ch-1, note)
         ledpin.value(0)
         pio_midi_send(port, cmd, ch, note, vel)
+    else:
+        log.event(EV_NOPORT, -1, cmd+ch-1, note)
 
 def doMidiThru(ch,cmd,d1,d2):
     #print(ch,"\tThru\t", hex(cmd>>4), "\t", d1, "\t", d2)
@@ -170,15 +355,21 @@ md.cbNoteOn (doMidiNoteOn)
 md.cbNoteOff (doMidiNoteOff)
 md.cbThru (doMidiThru)
 
-count=0
-while True:
+# Each time round the main loop is in poll(), so that this can also
+# be imported and driven from elsewhere, e.g. on a desktop computer
+# using SimpleMIDIHost.py.  It only runs by itself when run directly.
+def poll():
     if (hw_uart.any()):
         data = hw_uart.read(1)
         md.read(data[0])
         if MIDI_THRU:
             hw_uart.write(data)
-        
-    count = count + 1
-    if count > 1000:
-        print (MIDIRT)
-        count = 0
+    for tx in tx_uarts:
+        tx.service()
+
+def main():
+    while True:
+        poll()
+
+if __name__ == "__main__":
+    main()
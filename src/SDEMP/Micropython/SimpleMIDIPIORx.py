@@ -0,0 +1,138 @@
+# Simple MIDI PIO Rx
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# A receive driver for a set of PIO UART state machines, such as the
+# uart_rx program from the Micropython rp2 examples, running on
+# consecutive state machine numbers.
+#
+# Checking each state machine with rx_fifo() and then reading it
+# with get() one byte at a time costs a trip round the Python loop
+# for every byte on every port, and one for every idle port too.
+# Instead this driver:
+#
+#   * Reads the PIO FSTAT registers directly to find out which state
+#     machines have anything waiting, so idle ports are skipped
+#     without calling them at all.
+#   * Empties everything waiting in a state machine's FIFO with one
+#     sm.get() call, into a bytearray that is just the right length
+#     (with each word shifted down to the byte at the top).
+#   * Passes the whole lot to the decoder's feed().
+#
+# The bytearrays (one for each possible number of bytes) are
+# allocated once and shared between all the ports, so nothing is
+# allocated as MIDI is received.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIPIORx
+#
+#    rx_uarts = []
+#    for i in range(4):
+#        sm = rp2.StateMachine(i, uart_rx, freq=8*31250, in_base=Pin(6+i), jmp_pin=Pin(6+i))
+#        sm.active(1)
+#        rx_uarts.append(sm)
+#    pio_rx = SimpleMIDIPIORx.SimpleMIDIPIORx(rx_uarts, 0)
+#
+#    while True:
+#        pio_rx.poll(md)   # md is a list of decoders, one per state machine
+#---------------------
+#
+import machine
+
+# Where the PIO blocks' registers are in the RP2040's memory.
+# FSTAT has a RXEMPTY bit for each of its four state machines.
+PIO_BASE = [0x50200000, 0x50300000]
+PIO_FSTAT = 0x004
+PIO_FSTAT_RXEMPTY = 8
+
+# Words in the RX FIFO of a state machine.  This is 8 if the
+# state machine is created with fifo_join=PIO.JOIN_RX.
+PIO_FIFO_DEPTH = 4
+
+class SimpleMIDIPIORx:
+
+    def __init__(self, sms, first=0, fifo=PIO_FIFO_DEPTH):
+        self.sms = sms
+        self.first = first
+        self.mask = (1 << len(sms)) - 1
+        self.fifo = fifo
+        # bufs[n] is n bytes long
+        self.bufs = []
+        for n in range(fifo+1):
+            self.bufs.append(bytearray(n))
+        self.received = 0
+
+    # Returns a bit for each state machine with something waiting,
+    # bit 0 being the first one.
+    def ready(self):
+        empty = ((machine.mem32[PIO_BASE[0] + PIO_FSTAT] >> PIO_FSTAT_RXEMPTY) & 0x0F) | \
+                ((machine.mem32[PIO_BASE[1] + PIO_FSTAT] >> PIO_FSTAT_RXEMPTY) & 0x0F) << 4
+        return (~empty >> self.first) & self.mask
+
+    # Everything waiting on state machine i, or None if there isn't
+    # anything.  The buffer is reused, so it needs handling before
+    # the next call.
+    def drain(self, i):
+        sm = self.sms[i]
+        n = sm.rx_fifo()
+        if (n > self.fifo):
+            n = self.fifo
+        if (not n):
+            return None
+        buf = self.bufs[n]
+        # Received bytes are in the top 8 bits
+        sm.get(buf, 24)
+        self.received += n
+        return buf
+
+    # Pass everything waiting to the decoders, md[base+i] being the
+    # decoder for state machine i.  Returns the state machines
+    # that had something, as from ready().  This does the same as
+    # drain() for each one, but without a call for each.
+    def poll(self, md, base=0):
+        ready = self.ready()
+        r = ready
+        i = 0
+        sms = self.sms
+        bufs = self.bufs
+        fifo = self.fifo
+        while (r):
+            if (r & 1):
+                sm = sms[i]
+                n = sm.rx_fifo()
+                if (n > fifo):
+                    n = fifo
+                if (n):
+                    buf = bufs[n]
+                    # Received bytes are in the top 8 bits
+                    sm.get(buf, 24)
+                    self.received += n
+                    md[base+i].feed(buf)
+            r >>= 1
+            i += 1
+        return ready
@@ -0,0 +1,179 @@
+# Simple MIDI PIO Transmitter
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# A transmit driver for a PIO UART state machine, such as the uart_tx
+# program from the Micropython rp2 examples.
+#
+# The PIO TX FIFO is only four words deep (one byte per word), so
+# writing a MIDI message a byte at a time with sm.put() will block
+# the main loop as soon as the state machine falls behind.  This
+# driver instead:
+#
+#   * Works out the length of each message from the status byte, so
+#     two-byte messages (Program Change, Channel Pressure) are sent as
+#     two bytes and not three.
+#   * Pushes a whole message into the FIFO in a single sm.put() call
+#     if there is room for it.
+#   * Otherwise adds it to a software queue in front of the FIFO,
+#     which is topped up from service() without ever blocking.
+#
+# If the software queue is full, the whole message is dropped
+# rather than sending part of it, and the drop is counted.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIPIOTx
+#
+#    sm = rp2.StateMachine(0, uart_tx, freq=8*31250, sideset_base=Pin(6), out_base=Pin(6))
+#    sm.active(1)
+#    tx = SimpleMIDIPIOTx.SimpleMIDIPIOTx(sm)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        tx.send(cmd+ch-1, note, vel)
+#
+#    while True:
+#        ... read and decode MIDI ...
+#        tx.service()
+#---------------------
+#
+# The number of data bytes for each status byte is shared with the
+# decoder, so this needs the SimpleMIDIDecoder.py module too.
+#
+import SimpleMIDIDecoder
+
+# Words in the TX FIFO of a state machine.  This is 8 if the
+# state machine is created with fifo_join=PIO.JOIN_TX.
+PIO_FIFO_DEPTH = 4
+
+class SimpleMIDIPIOTx:
+
+    def __init__(self, sm, size=64, fifo=PIO_FIFO_DEPTH):
+        self.sm = sm
+        self.fifo = fifo
+        self.size = size
+        # Software queue, allocated once as a ring buffer
+        self.queue = bytearray(size)
+        self.head = 0
+        self.num = 0
+        self.drops = 0
+        self.highwater = 0
+        # Scratch message and a view of it for each length, so
+        # that a message can be handed to sm.put() without allocating.
+        self.msg = bytearray(3)
+        mv = memoryview(self.msg)
+        self.msgmv = [mv[0:0], mv[0:1], mv[0:2], mv[0:3]]
+
+    # Send a single MIDI message.
+    #   b0 = MIDI status byte, including the channel for voice messages
+    #   b1 = MIDI data byte 1 (if needed)
+    #   b2 = MIDI data byte 2 (if needed, otherwise ignored)
+    # Returns False if the message had to be dropped.
+    def send(self, b0, b1=0, b2=0):
+        n = SimpleMIDIDecoder.MIDI_DATALEN[b0] + 1
+        msg = self.msg
+        msg[0] = b0
+        if (n > 1):
+            msg[1] = b1
+            if (n > 2):
+                msg[2] = b2
+
+        # Nothing waiting and room in the FIFO, so send straight away
+        if (self.num == 0) and (self.sm.tx_fifo() + n <= self.fifo):
+            self.sm.put(self.msgmv[n])
+            return True
+
+        return self.enqueue(msg, n)
+
+    # Send a buffer of already formatted MIDI data (e.g. SysEx).
+    # Returns False if it had to be dropped.
+    def write(self, buf):
+        n = len(buf)
+        if (self.num == 0) and (self.sm.tx_fifo() + n <= self.fifo):
+            self.sm.put(buf)
+            return True
+
+        return self.enqueue(buf, n)
+
+    def enqueue(self, buf, n):
+        if (self.num + n > self.size):
+            self.drops += 1
+            return False
+
+        queue = self.queue
+        size = self.size
+        tail = self.head + self.num
+        for i in range(n):
+            if (tail >= size):
+                tail -= size
+            queue[tail] = buf[i]
+            tail += 1
+        self.num += n
+        if (self.num > self.highwater):
+            self.highwater = self.num
+
+        # Get things moving again if there is space in the FIFO
+        self.service()
+        return True
+
+    # Move as much of the software queue into the FIFO as will fit
+    # without blocking.  Call this regularly from the main loop.
+    # Returns the number of bytes still waiting.
+    def service(self):
+        num = self.num
+        if (num == 0):
+            return 0
+
+        free = self.fifo - self.sm.tx_fifo()
+        if (free > num):
+            free = num
+        if (free > 0):
+            sm = self.sm
+            queue = self.queue
+            head = self.head
+            for i in range(free):
+                sm.put(queue[head])
+                head += 1
+                if (head >= self.size):
+                    head = 0
+            self.head = head
+            self.num = num - free
+        return self.num
+
+    def pending(self):
+        return self.num
+
+    # Number of bytes that can be sent right now without queueing
+    def space(self):
+        if (self.num):
+            return 0
+        return self.fifo - self.sm.tx_fifo()
+
+    # Wait until everything queued has been handed to the state machine
+    def flush(self):
+        while (self.service()):
+            pass
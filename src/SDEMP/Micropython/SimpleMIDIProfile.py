@@ -0,0 +1,268 @@
+# Simple MIDI Profile
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Finding out which MIDI handling allocates memory.
+#
+# Every time a callback allocates some memory (e.g. ustruct.pack()
+# building a new bytes object, making a list or a set, or formatting
+# a string) Micropython gets a little closer to having to stop and
+# run the garbage collector, which can take several milliseconds -
+# long enough to be heard in the middle of a performance.
+#
+# This wraps functions - the decoder's handlers for each type of
+# message, or a project's own send functions - and records, for
+# each "path" through the code:
+#
+#    calls  - how many times it was called
+#    bytes  - how much memory it allocated in total
+#    max    - the most it allocated in one call
+#    gc     - how many times the garbage collector ran during it
+#
+# which can be printed with dump(), or returned using results().
+#
+# On the Pico this uses gc.mem_alloc() before and after each call.
+# If the garbage collector runs during the call the memory in use
+# goes down, so that is counted as a "gc" and the bytes for that
+# call are unknown.  On a desktop computer (e.g. when using
+# SimpleMIDIHost.py) it uses tracemalloc and the gc module's
+# callbacks instead.  Either way, the cost of the measuring itself
+# is worked out when the profile is created and taken off.
+#
+# Calls can be nested (e.g. a wrapped send function called from a
+# wrapped callback) and the outer call includes the inner one, as
+# well as a little extra for measuring it.
+#
+# This is for finding problems, not for leaving in - wrapping each
+# call adds quite a bit of time to it.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIDecoder
+#    import SimpleMIDIProfile
+#
+#    md = SimpleMIDIDecoder.SimpleMIDIDecoder()
+#    md.cbNoteOn (doMidiNoteOn)
+#    md.cbNoteOff (doMidiNoteOff)
+#    md.cbThru (doMidiThru)
+#
+#    prof = SimpleMIDIProfile.SimpleMIDIProfile()
+#    # Before any MIDI is received...
+#    prof.wrapDecoder(md)
+#    midi_send = prof.wrap("midi_send", midi_send)
+#
+#    ...then from the REPL at any point:
+#
+#    >>> prof.dump()
+#---------------------
+#
+import gc
+try:
+    import tracemalloc
+except ImportError:
+    # Micropython
+    tracemalloc = None
+
+# Names for the decoder's handlers for each Voice Category message,
+# in the same order as its msgFns list, i.e. by (status >> 4) - 8.
+MSG_NAMES = ["NoteOff", "NoteOn", "PolyPressure", "CC", "PC", "ChPressure", "PitchBend"]
+
+# The decoder's handlers for everything else,
+# and the number of parameters each has.
+SYS_NAMES = [("SysEx", "SysExFn", 2), ("SysExChunk", "SysExChunkFn", 4),
+             ("Realtime", "RealtimeFn", 2), ("SysCommon", "SysCommonFn", 4)]
+
+# How deep wrapped calls can be nested
+PROF_DEPTH = 8
+
+# Values kept for each path
+PROF_CALLS = 0
+PROF_BYTES = 1
+PROF_MAX   = 2
+PROF_GC    = 3
+
+class SimpleMIDIProfile:
+
+    def __init__(self):
+        self.names = []
+        self.stats = []
+        self.gcs = 0
+        self.depth = 0
+        # Start of each nested call, and for the host the most memory
+        # seen by any calls inside it (see end()).
+        self.starts = [0] * PROF_DEPTH
+        self.peaks = [0] * PROF_DEPTH
+        self.overhead = 0
+        if (tracemalloc):
+            if (not tracemalloc.is_tracing()):
+                tracemalloc.start()
+            gc.callbacks.append(self.gcEvent)
+        # Work out what measuring an empty call costs,
+        # ignoring the first few calls.
+        nothing = self.wrap("", self.nothing)
+        for i in range(20):
+            if (i == 10):
+                self.clear()
+            nothing()
+        s = self.stats.pop()
+        self.names.pop()
+        self.overhead = s[PROF_BYTES] // s[PROF_CALLS]
+
+    def nothing(self):
+        pass
+
+    def gcEvent(self, phase, info):
+        if (phase == "start"):
+            self.gcs += 1
+
+    def begin(self):
+        d = self.depth
+        if (tracemalloc):
+            if (d > 0):
+                # Resetting the peak loses it for the outer call,
+                # so keep a note of it first.
+                p = tracemalloc.get_traced_memory()[1]
+                if (p > self.peaks[d-1]):
+                    self.peaks[d-1] = p
+            self.peaks[d] = 0
+            self.starts[d] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            self.starts[d] = gc.mem_alloc()
+        self.depth = d + 1
+
+    # Returns the bytes allocated since the matching begin(),
+    # or -1 if the garbage collector ran, so it isn't known.
+    def end(self):
+        d = self.depth - 1
+        self.depth = d
+        if (tracemalloc):
+            p = tracemalloc.get_traced_memory()[1]
+            if (self.peaks[d] > p):
+                p = self.peaks[d]
+            if (d > 0) and (p > self.peaks[d-1]):
+                self.peaks[d-1] = p
+            return p - self.starts[d]
+        a = gc.mem_alloc()
+        if (a < self.starts[d]):
+            return -1
+        return a - self.starts[d]
+
+    def record(self, s, nbytes, gcs):
+        s[PROF_CALLS] += 1
+        if (gcs):
+            s[PROF_GC] += gcs
+        if (nbytes < 0):
+            s[PROF_GC] += 1
+            return
+        nbytes -= self.overhead
+        if (nbytes > 0):
+            s[PROF_BYTES] += nbytes
+            if (nbytes > s[PROF_MAX]):
+                s[PROF_MAX] = nbytes
+
+    def path(self, name):
+        if (name in self.names):
+            return self.stats[self.names.index(name)]
+        s = [0, 0, 0, 0]
+        self.names.append(name)
+        self.stats.append(s)
+        return s
+
+    # Returns a function that calls fn, recording what it allocates
+    # against the path called name.  Using the same name more than
+    # once adds them all up together.
+    def wrap(self, name, fn):
+        s = self.path(name)
+        def profiled(*args):
+            gcs = self.gcs
+            self.begin()
+            fn(*args)
+            self.record(s, self.end(), self.gcs - gcs)
+        return profiled
+
+    # Calling a bound method, as the decoder's handlers are, with
+    # *args allocates a new tuple for the arguments, so these pass
+    # on a fixed number of them instead.
+    def wrapHandler(self, name, fn, nargs):
+        s = self.path(name)
+        if (nargs == 2):
+            def profiled(a, b):
+                gcs = self.gcs
+                self.begin()
+                fn(a, b)
+                self.record(s, self.end(), self.gcs - gcs)
+        elif (nargs == 4):
+            def profiled(a, b, c, d):
+                gcs = self.gcs
+                self.begin()
+                fn(a, b, c, d)
+                self.record(s, self.end(), self.gcs - gcs)
+        else:
+            def profiled(a, b, c, d, e):
+                gcs = self.gcs
+                self.begin()
+                fn(a, b, c, d, e)
+                self.record(s, self.end(), self.gcs - gcs)
+        return profiled
+
+    # Wraps the decoder's handlers for each type of message, so that
+    # the callbacks, or the decoder's own default behaviour if there
+    # isn't one, are recorded by message type.  This must be done
+    # before the decoder receives any MIDI.
+    def wrapDecoder(self, md, prefix=""):
+        for i in range(len(MSG_NAMES)):
+            md.msgFns[i] = self.wrapHandler(prefix+MSG_NAMES[i], md.msgFns[i], 5)
+        for name, attr, nargs in SYS_NAMES:
+            setattr(md, attr, self.wrapHandler(prefix+name, getattr(md, attr), nargs))
+
+    def clear(self):
+        for s in self.stats:
+            for i in range(len(s)):
+                s[i] = 0
+
+    def results(self):
+        r = {}
+        for i in range(len(self.names)):
+            s = self.stats[i]
+            if (s[PROF_CALLS]):
+                r[self.names[i]] = {
+                    "calls": s[PROF_CALLS],
+                    "bytes": s[PROF_BYTES],
+                    "bytes_per_call": s[PROF_BYTES] / s[PROF_CALLS],
+                    "max": s[PROF_MAX],
+                    "gc": s[PROF_GC],
+                }
+        return r
+
+    def dump(self):
+        print ("Path\tcalls\tbytes\tper call\tmax\tgc")
+        for i in range(len(self.names)):
+            s = self.stats[i]
+            if (s[PROF_CALLS]):
+                print (self.names[i], "\t", s[PROF_CALLS], "\t", s[PROF_BYTES], "\t",
+                       s[PROF_BYTES] // s[PROF_CALLS], "\t", s[PROF_MAX], "\t", s[PROF_GC])
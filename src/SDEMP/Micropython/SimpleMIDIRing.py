@@ -0,0 +1,124 @@
+# Simple MIDI Ring Buffer
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# A fixed size queue of MIDI events for passing messages from one
+# thread (or core) to another, e.g. from a MIDI receive loop running
+# on the Pico's second core via _thread to the main loop.
+#
+# Each event is three bytes - a status byte and two data bytes - and
+# the events are stored in a bytearray allocated when the ring is
+# created, so adding and removing events never allocates memory.
+#
+# There must only be ONE thread adding events (calling put()) and
+# ONE thread removing them (calling get()).  The "head" index is only
+# ever changed by put() and the "tail" index only by get(), and each
+# is only updated once the event itself has been written or read, so
+# no locks are needed.
+#
+# If the ring is full, put() drops the new event and counts it.
+#
+# Events come out of get() packed into a single number:
+#    (status << 16) | (data1 << 8) | data2
+# which is a "small int" in Micropython so doesn't allocate either.
+# -1 means the ring is empty.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIRing
+#
+#    ring = SimpleMIDIRing.SimpleMIDIRing(32)
+#
+#    # On core 1
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        ring.put(cmd+ch-1, note, vel)
+#
+#    # On core 0
+#    while True:
+#        ev = ring.get()
+#        while (ev != -1):
+#            status = ev >> 16
+#            note = (ev >> 8) & 0xFF
+#            vel = ev & 0xFF
+#            ...
+#            ev = ring.get()
+#---------------------
+#
+class SimpleMIDIRing:
+
+    def __init__(self, size=64):
+        # One slot is always left empty so that a full ring
+        # can be told apart from an empty one.
+        self.size = size + 1
+        self.buf = bytearray(self.size * 3)
+        self.head = 0
+        self.tail = 0
+        self.overflows = 0
+
+    # Add an event.  Returns False if the ring is full.
+    def put(self, b0, b1=0, b2=0):
+        head = self.head
+        nxt = head + 1
+        if (nxt >= self.size):
+            nxt = 0
+        if (nxt == self.tail):
+            self.overflows += 1
+            return False
+
+        buf = self.buf
+        i = head * 3
+        buf[i] = b0
+        buf[i+1] = b1
+        buf[i+2] = b2
+        # Only now is the event visible to get()
+        self.head = nxt
+        return True
+
+    # Remove the oldest event, returned packed into a number,
+    # or -1 if there isn't one.
+    def get(self):
+        tail = self.tail
+        if (tail == self.head):
+            return -1
+
+        buf = self.buf
+        i = tail * 3
+        ev = (buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]
+        tail += 1
+        if (tail >= self.size):
+            tail = 0
+        # Only now can put() reuse the slot
+        self.tail = tail
+        return ev
+
+    # Number of events waiting.  This is only a snapshot as the
+    # other thread could be adding or removing events.
+    def available(self):
+        n = self.head - self.tail
+        if (n < 0):
+            n += self.size
+        return n
@@ -0,0 +1,127 @@
+# Simple MIDI Router
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIRouter
+#
+#    # Routing rules: [MIDI CH, MIDI CMD, source port, destination port]
+#    # NB: -1 for CH, CMD or SRC means "any"
+#    MIDIRT = [
+#        [-1, -1, 0, 1],   # Anything on port 0 to port 1
+#        [6, 0x90, 0, 4],  # NoteOn on CH 6 on port 0 to port 4
+#    ]
+#
+#    router = SimpleMIDIRouter.SimpleMIDIRouter(6, MIDIRT)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel,src):
+#        for dst in router.route(ch, cmd, src):
+#            midi_send(dst, cmd, ch, note, vel)
+#---------------------
+#
+# Rather than walk the list of rules for every message, the rules are
+# "compiled" into a table with an entry for every combination of
+# source port, MIDI command and MIDI channel (16 channels x 8 commands
+# per source).  Each entry is a tuple of the destination ports for
+# that combination, so routing a message is a single table lookup
+# that doesn't allocate any memory.
+#
+# The table is only rebuilt when the rules change, via setRoutes()
+# or addRoute().  If the rules list is changed directly, call
+# compile() afterwards.
+#
+# If no rules match a message, it will go to the default destination
+# if one is set (i.e. it isn't -1).
+#
+class SimpleMIDIRouter:
+
+    def __init__(self, numsrc, rules=None, default=-1):
+        self.numsrc = numsrc
+        self.default = default
+        if (rules):
+            self.rules = rules
+        else:
+            self.rules = []
+        self.compile()
+
+    def setRoutes(self, rules, default=None):
+        # The default route is left alone unless a new one is given
+        self.rules = rules
+        if (default != None):
+            self.default = default
+        self.compile()
+
+    def addRoute(self, ch, cmd, src, dst):
+        self.rules.append([ch, cmd, src, dst])
+        self.compile()
+
+    def compile(self):
+        # Build up the list of destinations for each entry...
+        dsts = []
+        for i in range(self.numsrc*128):
+            dsts.append([])
+
+        for r in self.rules:
+            ch,cmd,src,dst = r
+            if (src == -1):
+                srcs = range(self.numsrc)
+            else:
+                srcs = [src]
+            if (cmd == -1):
+                cmds = range(8)
+            else:
+                cmds = [(cmd >> 4) & 7]
+            if (ch == -1):
+                chs = range(16)
+            else:
+                chs = [ch-1]
+            for s in srcs:
+                for c in cmds:
+                    for h in chs:
+                        d = dsts[(s << 7) + (c << 4) + h]
+                        # Eliminate duplicates
+                        if dst not in d:
+                            d.append(dst)
+
+        # ...then turn them into tuples, filling in the default route
+        # where nothing else matched.
+        if (self.default != -1):
+            defdst = (self.default,)
+        else:
+            defdst = ()
+        self.table = []
+        for d in dsts:
+            if d:
+                self.table.append(tuple(d))
+            else:
+                self.table.append(defdst)
+
+    def route(self, ch, cmd, src):
+        # Return the destination ports for a message based on its
+        # channel (1-16), command (0x80-0xF0) and source port.
+        return self.table[(src << 7) + (cmd & 0x70) + ch - 1]
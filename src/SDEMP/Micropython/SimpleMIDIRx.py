@@ -0,0 +1,273 @@
+# Simple MIDI Rx
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Receives MIDI from hardware UARTs and PIO UART receive state
+# machines in the background, so that bytes aren't lost while the
+# main loop is busy with something slow, such as updating a display.
+#
+# Each input is emptied into its own ring buffer from an interrupt,
+# and the main loop passes whatever has arrived to a decoder using
+# feed() whenever it gets round to it.
+#
+# A PIO state machine's receive FIFO only holds 4 bytes (about 1.3mS
+# of MIDI), so without this, anything that takes longer than that
+# loses data.  PIO inputs are emptied by a timer interrupt every
+# RX_PERIOD milliseconds.
+#
+# Micropython already empties the hardware UARTs into a buffer (set
+# by rxbuf when the UART is created) from an interrupt, so there is
+# little to gain here for a UART on its own.  They are handled so that
+# all the inputs work the same way when there is a mix.  Newer versions
+# of Micropython can interrupt when a UART's input goes quiet
+# (IRQ_RXIDLE) and if so that is used for UART inputs.  If not, the
+# timer empties them instead.  Either way, each input only ever has
+# one interrupt adding to its ring.
+#
+# The rings are allocated when the inputs are added and the interrupt
+# handlers don't allocate any memory.  There is only ever one thing
+# adding to a ring (its interrupt) and one taking out (the main loop),
+# so no locking is needed.  If a ring fills up, further bytes are
+# dropped and counted in overflows.  feed() passes the decoder a
+# memoryview onto the ring, which is a small allocation, but that
+# is in the main loop rather than the interrupt.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIRx
+#
+#    rx = SimpleMIDIRx.SimpleMIDIRx()
+#    UART_IN = rx.addUART(machine.UART(0,31250))
+#    PIO_IN = rx.addPIO(rx_sm)
+#    rx.start()
+#
+#    while True:
+#        rx.feed(UART_IN, md_uart)
+#        rx.feed(PIO_IN, md_pio)
+#        ... something slow ...
+#---------------------
+#
+# Use rx.dump() from the REPL to see how full the rings have got and
+# whether anything has been lost.
+#
+import machine
+
+# Default size of each ring buffer in bytes
+RX_SIZE = 256
+
+# Time between interrupts (mS).  At 31250 baud a byte arrives
+# every 320uS, so this must be less than 1.28mS for PIO inputs.
+RX_PERIOD = 1
+
+# Bytes read from a UART in one go
+RX_STAGE = 32
+
+# Words in a PIO state machine's receive FIFO
+RX_PIO_FIFO = 4
+
+RX_UART = 0
+RX_PIO  = 1
+
+class SimpleMIDIRx:
+
+    def __init__(self, size=RX_SIZE):
+        self.size = size
+        self.types = []
+        self.devs = []
+        self.rings = []
+        self.ringmvs = []
+        self.heads = []
+        self.tails = []
+        self.overflows = []
+        self.highwater = []
+        self.stage = bytearray(RX_STAGE)
+        # piobufs[n] is n bytes long, for emptying a PIO FIFO
+        self.piobufs = []
+        for n in range(RX_PIO_FIFO+1):
+            self.piobufs.append(bytearray(n))
+        self.timer = None
+        self.rxidle = False
+
+    def add(self, type, dev):
+        self.types.append(type)
+        self.devs.append(dev)
+        ring = bytearray(self.size)
+        self.rings.append(ring)
+        self.ringmvs.append(memoryview(ring))
+        self.heads.append(0)
+        self.tails.append(0)
+        self.overflows.append(0)
+        self.highwater.append(0)
+        return len(self.devs)-1
+
+    # Each returns the input number to use with feed()
+    def addUART(self, uart):
+        return self.add(RX_UART, uart)
+
+    def addPIO(self, sm):
+        return self.add(RX_PIO, sm)
+
+    def start(self, period=RX_PERIOD):
+        self.rxidle = hasattr(machine.UART, "IRQ_RXIDLE")
+        timer = False
+        for i in range(len(self.devs)):
+            if (self.types[i] == RX_UART) and (self.rxidle):
+                self.devs[i].irq(handler=self.uartIrq, trigger=machine.UART.IRQ_RXIDLE)
+            else:
+                timer = True
+        if (timer):
+            self.timer = machine.Timer(mode=machine.Timer.PERIODIC, period=period, callback=self.timerIrq)
+
+    def stop(self):
+        if (self.timer):
+            self.timer.deinit()
+            self.timer = None
+        if (self.rxidle):
+            for i in range(len(self.devs)):
+                if (self.types[i] == RX_UART):
+                    self.devs[i].irq(handler=None)
+            self.rxidle = False
+
+    # Timer interrupt handler: empty the PIO inputs, and the
+    # UART inputs too if they don't have their own interrupt.
+    def timerIrq(self, t):
+        for i in range(len(self.devs)):
+            if (self.types[i] == RX_PIO):
+                self.emptyPIO(i)
+            elif (not self.rxidle):
+                self.emptyUART(i)
+
+    # UART interrupt handler: empty the UART that has gone quiet
+    def uartIrq(self, uart):
+        for i in range(len(self.devs)):
+            if (self.devs[i] is uart):
+                self.emptyUART(i)
+
+    # Empty every input, for when there are no interrupts running
+    def irq(self, t=None):
+        for i in range(len(self.devs)):
+            if (self.types[i] == RX_PIO):
+                self.emptyPIO(i)
+            else:
+                self.emptyUART(i)
+
+    def emptyPIO(self, i):
+        size = self.size
+        dev = self.devs[i]
+        ring = self.rings[i]
+        head = self.heads[i]
+        tail = self.tails[i]
+        n = dev.rx_fifo()
+        if (n > RX_PIO_FIFO):
+            n = RX_PIO_FIFO
+        if (n):
+            # Empty the whole FIFO with one get().
+            # Received bytes are in the top 8 bits.
+            buf = self.piobufs[n]
+            dev.get(buf, 24)
+            for s in range(n):
+                nxt = head + 1
+                if (nxt >= size):
+                    nxt = 0
+                if (nxt == tail):
+                    self.overflows[i] += 1
+                else:
+                    ring[head] = buf[s]
+                    head = nxt
+        self.heads[i] = head
+
+    def emptyUART(self, i):
+        size = self.size
+        dev = self.devs[i]
+        ring = self.rings[i]
+        head = self.heads[i]
+        tail = self.tails[i]
+        stage = self.stage
+        n = dev.any()
+        while (n):
+            if (n > RX_STAGE):
+                n = RX_STAGE
+            n = dev.readinto(stage, n)
+            if (not n):
+                break
+            for s in range(n):
+                nxt = head + 1
+                if (nxt >= size):
+                    nxt = 0
+                if (nxt == tail):
+                    self.overflows[i] += 1
+                else:
+                    ring[head] = stage[s]
+                    head = nxt
+            n = dev.any()
+        self.heads[i] = head
+
+    def available(self, i):
+        n = self.heads[i] - self.tails[i]
+        if (n < 0):
+            n += self.size
+        return n
+
+    # Next byte from an input, or -1 if there isn't one
+    def read(self, i):
+        tail = self.tails[i]
+        if (tail == self.heads[i]):
+            return -1
+        mb = self.rings[i][tail]
+        tail += 1
+        if (tail >= self.size):
+            tail = 0
+        self.tails[i] = tail
+        return mb
+
+    # Pass everything received on an input to a decoder's feed().
+    # The ring is passed over as a memoryview, in two parts if it
+    # has wrapped around.  Returns the number of bytes.
+    def feed(self, i, md):
+        head = self.heads[i]
+        tail = self.tails[i]
+        n = head - tail
+        if (n == 0):
+            return 0
+        if (n < 0):
+            n += self.size
+        if (n > self.highwater[i]):
+            self.highwater[i] = n
+        mv = self.ringmvs[i]
+        if (head < tail):
+            md.feed(mv[tail:self.size])
+            # Update as we go, so more can arrive in the meantime
+            self.tails[i] = 0
+            tail = 0
+        md.feed(mv[tail:head])
+        self.tails[i] = head
+        return n
+
+    def dump(self):
+        for i in range(len(self.devs)):
+            print (i, "waiting:", self.available(i), "high water:", self.highwater[i],
+                   "overflows:", self.overflows[i])
@@ -0,0 +1,295 @@
+# Simple MIDI Output Scheduler
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Writing MIDI straight out to a serial port from inside a decoder
+# callback means a burst of data for one slow port holds up routing
+# for all the others, and MIDI clock ends up stuck behind a queue
+# of note data.
+#
+# Instead, each output port gets its own queue:
+#
+#   * Messages are added to a fixed size ring buffer.  If there isn't
+#     room for the whole message it is dropped and counted.
+#   * Realtime bytes (0xF8 to 0xFF) go into a separate small queue
+#     and are sent ahead of any other messages still waiting.  They
+#     are only ever sent between messages though, never in the middle
+#     of one.  The MIDI spec allows that on a DIN port, but USB MIDI
+#     builds its packets from the byte stream and a realtime byte in
+#     the middle of a message would corrupt the packet.
+#   * service() is called from the main loop and only writes as much
+#     to each port as it can take without blocking.  Messages that
+#     will fit in one write are not split across writes.
+#   * If the port's write function returns the number of bytes it
+#     actually wrote, anything it didn't take is kept and sent first
+#     next time.  True or None are taken to mean everything was
+#     written and False that nothing was.
+#
+# How much a port can take is given by an optional "ready" function
+# for the port, which returns the number of bytes that can be written
+# right now.  Without one, up to "chunk" bytes are written each time.
+#
+# Each queue keeps a count of dropped messages and dropped realtime
+# bytes, and the most bytes that have been waiting at once (its
+# "high water" mark), to help with choosing the buffer sizes.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIScheduler
+#
+#    sched = SimpleMIDIScheduler.SimpleMIDIScheduler()
+#    uart = machine.UART(0,31250)
+#    port = sched.addPort(uart.write)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        sched.send(port, bytes([cmd+ch-1, note, vel]))
+#
+#    def doMidiRealtime(cmd,ts):
+#        sched.realtime(port, cmd)
+#
+#    while True:
+#        ... read and decode MIDI ...
+#        sched.service()
+#---------------------
+#
+# A queue's write() can also be used as the write function for a
+# SimpleMIDIEncoder, to get running status on the port as well.
+#
+# Default bytes written per port for each service() if there is no
+# ready function.  This is one full MIDI message.
+OUT_CHUNK = 3
+
+# Most bytes that will be written to a port in one go
+OUT_MAXCHUNK = 32
+
+class SimpleMIDIOutQueue:
+
+    def __init__(self, write, ready=None, size=128, rtsize=16, chunk=OUT_CHUNK):
+        self.out = write
+        self.ready = ready
+        self.chunk = chunk
+        # Ring buffers, allocated once
+        self.size = size
+        self.queue = bytearray(size)
+        self.head = 0
+        self.num = 0
+        self.rtsize = rtsize
+        self.rt = bytearray(rtsize)
+        self.rthead = 0
+        self.rtnum = 0
+        # Length of each message waiting in the queue, so that
+        # service() knows where the message boundaries are.
+        # Every message is at least one byte so this can never
+        # fill up before the queue itself does.
+        self.lens = [0]*size
+        self.lhead = 0
+        self.lnum = 0
+        # Bytes of the current message still to be sent.
+        # Zero means we are between messages.
+        self.left = 0
+        # Counters
+        self.drops = 0
+        self.rtdrops = 0
+        self.highwater = 0
+        # Scratch buffer for writing to the port, with a view
+        # for each length so that writing doesn't allocate.
+        # The first "held" bytes are ones the port didn't take
+        # last time around.
+        self.scratch = bytearray(OUT_MAXCHUNK)
+        mv = memoryview(self.scratch)
+        self.scratchmv = []
+        for i in range(OUT_MAXCHUNK+1):
+            self.scratchmv.append(mv[0:i])
+        self.held = 0
+
+    # Queue a complete MIDI message (or any other buffer of MIDI data).
+    # A single realtime byte goes straight to the realtime queue.
+    # Returns False if it had to be dropped.
+    def write(self, buf):
+        n = len(buf)
+        if (n == 0):
+            return True
+        if (n == 1) and (buf[0] >= 0xF8):
+            return self.realtime(buf[0])
+
+        if (self.num + n > self.size):
+            self.drops += 1
+            return False
+
+        queue = self.queue
+        size = self.size
+        tail = self.head + self.num
+        for i in range(n):
+            if (tail >= size):
+                tail -= size
+            queue[tail] = buf[i]
+            tail += 1
+        self.num += n
+        if (self.num > self.highwater):
+            self.highwater = self.num
+
+        tail = self.lhead + self.lnum
+        if (tail >= size):
+            tail -= size
+        self.lens[tail] = n
+        self.lnum += 1
+        return True
+
+    # Queue a realtime byte, to go out ahead of everything else
+    def realtime(self, mb):
+        if (self.rtnum >= self.rtsize):
+            self.rtdrops += 1
+            return False
+
+        tail = self.rthead + self.rtnum
+        if (tail >= self.rtsize):
+            tail -= self.rtsize
+        self.rt[tail] = mb
+        self.rtnum += 1
+        return True
+
+    # Write out as much as the port will take without blocking.
+    # Returns the number of bytes still waiting.
+    def service(self):
+        if (self.num == 0) and (self.rtnum == 0) and (self.held == 0):
+            return 0
+
+        if (self.ready):
+            n = self.ready()
+        else:
+            n = self.chunk
+        if (n > OUT_MAXCHUNK):
+            n = OUT_MAXCHUNK
+        if (n <= 0):
+            return self.pending()
+
+        # Anything the port didn't take last time is already
+        # at the start of the scratch buffer.
+        scratch = self.scratch
+        cnt = self.held
+        while (cnt < n):
+            if (self.left == 0):
+                # Between messages, so realtime bytes can go first...
+                if (self.rtnum):
+                    rt = self.rt
+                    head = self.rthead
+                    while (self.rtnum) and (cnt < n):
+                        scratch[cnt] = rt[head]
+                        cnt += 1
+                        head += 1
+                        if (head >= self.rtsize):
+                            head = 0
+                        self.rtnum -= 1
+                    self.rthead = head
+                    if (cnt >= n):
+                        break
+
+                # ...then start the next message.  If it would fit
+                # in a write of its own, don't split it.
+                if (self.lnum == 0):
+                    break
+                mlen = self.lens[self.lhead]
+                if (cnt > 0) and (mlen > n - cnt) and (mlen <= n):
+                    break
+                self.left = mlen
+                self.lhead += 1
+                if (self.lhead >= self.size):
+                    self.lhead = 0
+                self.lnum -= 1
+
+            queue = self.queue
+            head = self.head
+            while (self.left) and (cnt < n):
+                scratch[cnt] = queue[head]
+                cnt += 1
+                head += 1
+                if (head >= self.size):
+                    head = 0
+                self.left -= 1
+                self.num -= 1
+            self.head = head
+
+        if (cnt > n):
+            sent = n
+        else:
+            sent = cnt
+        if (sent == 0):
+            return self.pending()
+
+        res = self.out(self.scratchmv[sent])
+        if (res is None) or (res is True):
+            res = sent
+        elif (res is False):
+            res = 0
+
+        # Keep whatever wasn't written for next time
+        if (res < cnt):
+            for i in range(cnt - res):
+                scratch[i] = scratch[res + i]
+            self.held = cnt - res
+        else:
+            self.held = 0
+        return self.pending()
+
+    def pending(self):
+        return self.num + self.rtnum + self.held
+
+class SimpleMIDIScheduler:
+
+    def __init__(self):
+        self.ports = []
+
+    # Add an output port and return its number
+    def addPort(self, write, ready=None, size=128, rtsize=16, chunk=OUT_CHUNK):
+        self.ports.append(SimpleMIDIOutQueue(write, ready, size, rtsize, chunk))
+        return len(self.ports) - 1
+
+    def send(self, port, buf):
+        return self.ports[port].write(buf)
+
+    def realtime(self, port, mb):
+        return self.ports[port].realtime(mb)
+
+    # Give each port a chance to send some data.
+    # Returns the total number of bytes still waiting.
+    def service(self):
+        waiting = 0
+        for p in self.ports:
+            waiting += p.service()
+        return waiting
+
+    def drops(self):
+        cnt = 0
+        for p in self.ports:
+            cnt += p.drops + p.rtdrops
+        return cnt
+
+    def dump(self):
+        for i in range(len(self.ports)):
+            p = self.ports[i]
+            print (i, "waiting:", p.pending(), "high water:", p.highwater,
+                   "dropped:", p.drops, "realtime dropped:", p.rtdrops)
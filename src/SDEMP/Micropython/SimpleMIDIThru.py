@@ -0,0 +1,135 @@
+# Simple MIDI Thru
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Passes MIDI from one port to others as raw bytes.
+#
+# Reading MIDI with a full decoder, or a library that makes an object
+# for each message, only to turn it straight back into bytes to send
+# on, is a lot of work for a router.  Instead this reads whatever is
+# waiting on a port into a buffer, finds where each message starts
+# and ends, and passes each complete message to a function as bytes
+# ready to write out again (e.g. a UART's write()).
+#
+#   * Running status is filled back in, so each message can be sent
+#     on by itself, even if other messages get mixed in with it.
+#   * Channel messages are always passed on.  The status byte says
+#     what type of message it is and its channel, so routing can be
+#     decided without decoding any further.
+#   * Realtime clock, start, continue and stop are passed on if
+#     realtime is True.
+#   * Everything else (SysEx, System Common, Active Sensing, Reset) is
+#     dropped, as these aren't usually wanted when routing.
+#
+# The message is passed as a memoryview onto a buffer that is reused,
+# so nothing is allocated for each message, but it must be written
+# out (or copied) before returning.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIThru
+#
+#    thru = SimpleMIDIThru.SimpleMIDIThru(usb_midi.ports[0], realtime=True)
+#
+#    while True:
+#        thru.poll(uart.write)
+#---------------------
+#
+# Any port with readinto() can be used, e.g. a UART or USB MIDI port,
+# on Micropython or CircuitPython.
+#
+# The length of each message is shared with the decoder, so this
+# needs the SimpleMIDIDecoder.py module too.
+#
+import SimpleMIDIDecoder
+
+# Bytes read from the port in one go
+THRU_SIZE = 64
+
+class SimpleMIDIThru:
+
+    def __init__(self, port, realtime=False, size=THRU_SIZE):
+        self.port = port
+        self.realtime = realtime
+        self.buf = bytearray(size)
+        self.status = 0
+        self.dlen = 0
+        self.dcnt = 0
+        self.msgs = 0
+        # The message being collected and a view of it
+        # for each length, so passing it on doesn't allocate.
+        self.msg = bytearray(3)
+        mv = memoryview(self.msg)
+        self.msgmv = [mv[0:0], mv[0:1], mv[0:2], mv[0:3]]
+        self.rt = bytearray(1)
+        self.rtmv = memoryview(self.rt)
+
+    # Read whatever is waiting and pass on each complete message.
+    # Returns the number of messages passed on.
+    def poll(self, fn):
+        n = self.port.readinto(self.buf)
+        if (not n):
+            return 0
+        return self.parse(self.buf, n, fn)
+
+    # Pass on each complete message in the first n bytes of buf
+    def parse(self, buf, n, fn):
+        msg = self.msg
+        datalen = SimpleMIDIDecoder.MIDI_DATALEN
+        status = self.status
+        dlen = self.dlen
+        dcnt = self.dcnt
+        cnt = 0
+        for i in range(n):
+            mb = buf[i]
+            if (mb < 0x80):
+                if (status):
+                    dcnt += 1
+                    msg[dcnt] = mb
+                    if (dcnt == dlen):
+                        fn(self.msgmv[dlen+1])
+                        cnt += 1
+                        dcnt = 0
+            elif (mb < 0xF0):
+                status = mb
+                msg[0] = mb
+                dlen = datalen[mb]
+                dcnt = 0
+            elif (mb < 0xF8):
+                # SysEx and System Common end running status,
+                # and their data is ignored.
+                status = 0
+            elif (self.realtime) and ((mb == 0xF8) or (mb == 0xFA) or (mb == 0xFB) or (mb == 0xFC)):
+                # Realtime can be in the middle of another message
+                self.rt[0] = mb
+                fn(self.rtmv)
+                cnt += 1
+        self.status = status
+        self.dlen = dlen
+        self.dcnt = dcnt
+        self.msgs += cnt
+        return cnt
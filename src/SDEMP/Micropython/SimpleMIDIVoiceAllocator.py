@@ -0,0 +1,205 @@
+# Simple MIDI Voice Allocator
+# for Micro Python on the Raspberry Pi Pico
+#
+# @diyelectromusic
+# https://diyelectromusic.wordpress.com/
+#
+#      MIT License
+#      
+#      Copyright (c) 2026 diyelectromusic (Kevin)
+#      
+#      Permission is hereby granted, free of charge, to any person obtaining a copy of
+#      this software and associated documentation files (the "Software"), to deal in
+#      the Software without restriction, including without limitation the rights to
+#      use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#      the Software, and to permit persons to whom the Software is furnished to do so,
+#      subject to the following conditions:
+#      
+#      The above copyright notice and this permission notice shall be included in all
+#      copies or substantial portions of the Software.
+#      
+#      THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#      IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#      FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#      COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHERIN
+#      AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+#      WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Decides which voice (e.g. a PIOBeep oscillator) plays each note
+# on a polyphonic synth with a fixed number of voices.
+#
+# Free voices are kept on a stack, so finding one doesn't mean
+# searching through them all, and there is a table of which voice is
+# playing each MIDI note, so a NoteOff goes straight to the right one.
+# The voices that are playing are also kept in the order they were
+# started, so the oldest is always known.
+#
+# When all the voices are in use a new note can either be dropped
+# or "steal" a voice from another note, depending on the policy:
+#
+#    STEAL_NONE     - drop the new note
+#    STEAL_OLDEST   - take over the voice that has been playing longest
+#    STEAL_QUIETEST - take over the voice with the lowest velocity
+#                     (the oldest of those if there are several)
+#
+# A note that is already playing is always retriggered on the voice it
+# is using, so each note is only ever on one voice.
+#
+# noteOn() and noteOff() return the voice to use, or -1 if there
+# isn't one (the note was dropped, or isn't playing).  If a voice was
+# stolen, the note it was playing is left in stolen (otherwise it is
+# -1) in case it needs to be turned off first.
+#
+# Everything is kept in bytearrays allocated when the allocator is
+# created, so playing notes never allocates memory.  The number of
+# notes dropped, voices stolen and notes retriggered are counted.
+#
+# Example Usage:
+#
+#---------------------
+#    import SimpleMIDIVoiceAllocator
+#
+#    voices = SimpleMIDIVoiceAllocator.SimpleMIDIVoiceAllocator(len(osc),
+#                              SimpleMIDIVoiceAllocator.STEAL_OLDEST)
+#
+#    def doMidiNoteOn(ch,cmd,note,vel):
+#        v = voices.noteOn(note, vel)
+#        if (v != -1):
+#            osc[v].note_on(midi2osc[note])
+#
+#    def doMidiNoteOff(ch,cmd,note,vel):
+#        v = voices.noteOff(note)
+#        if (v != -1):
+#            osc[v].note_off()
+#---------------------
+#
+STEAL_NONE     = 0
+STEAL_OLDEST   = 1
+STEAL_QUIETEST = 2
+
+# Marks a free voice, a note not playing, or the end of the
+# list of playing voices.  MIDI notes are 0 to 127, so this
+# can't be mistaken for note 0.
+VOICE_NONE = 0xFF
+
+class SimpleMIDIVoiceAllocator:
+
+    def __init__(self, numvoices, steal=STEAL_OLDEST):
+        self.numvoices = numvoices
+        self.steal = steal
+        # Note and velocity for each voice
+        self.notes = bytearray(numvoices)
+        self.vels = bytearray(numvoices)
+        # Voice playing each MIDI note
+        self.note2voice = bytearray(128)
+        # Stack of free voices
+        self.free = bytearray(numvoices)
+        # Playing voices, linked from oldest to newest
+        self.newer = bytearray(numvoices)
+        self.older = bytearray(numvoices)
+        self.stolen = -1
+        self.drops = 0
+        self.steals = 0
+        self.retriggers = 0
+        self.reset()
+
+    def reset(self):
+        for n in range(128):
+            self.note2voice[n] = VOICE_NONE
+        for v in range(self.numvoices):
+            self.notes[v] = VOICE_NONE
+            self.vels[v] = 0
+            # Free voices are used from voice 0 upwards
+            self.free[v] = self.numvoices-1-v
+        self.numfree = self.numvoices
+        self.oldest = VOICE_NONE
+        self.newest = VOICE_NONE
+
+    # Add a voice to the newest end of the playing list
+    def link(self, v):
+        self.older[v] = self.newest
+        self.newer[v] = VOICE_NONE
+        if (self.newest == VOICE_NONE):
+            self.oldest = v
+        else:
+            self.newer[self.newest] = v
+        self.newest = v
+
+    # Take a voice out of the playing list
+    def unlink(self, v):
+        o = self.older[v]
+        n = self.newer[v]
+        if (o == VOICE_NONE):
+            self.oldest = n
+        else:
+            self.newer[o] = n
+        if (n == VOICE_NONE):
+            self.newest = o
+        else:
+            self.older[n] = o
+
+    def quietest(self):
+        # Oldest first, so the oldest wins if several are as quiet
+        q = self.oldest
+        v = self.newer[q]
+        while (v != VOICE_NONE):
+            if (self.vels[v] < self.vels[q]):
+                q = v
+            v = self.newer[v]
+        return q
+
+    def noteOn(self, note, vel=127):
+        self.stolen = -1
+        v = self.note2voice[note]
+        if (v != VOICE_NONE):
+            # Already playing, so start it again on the same voice
+            self.retriggers += 1
+            self.unlink(v)
+        elif (self.numfree):
+            self.numfree -= 1
+            v = self.free[self.numfree]
+        elif (self.steal == STEAL_NONE):
+            self.drops += 1
+            return -1
+        else:
+            if (self.steal == STEAL_QUIETEST):
+                v = self.quietest()
+            else:
+                v = self.oldest
+            self.unlink(v)
+            self.stolen = self.notes[v]
+            self.note2voice[self.stolen] = VOICE_NONE
+            self.steals += 1
+        self.notes[v] = note
+        self.vels[v] = vel
+        self.note2voice[note] = v
+        self.link(v)
+        return v
+
+    def noteOff(self, note):
+        v = self.note2voice[note]
+        if (v == VOICE_NONE):
+            return -1
+        self.note2voice[note] = VOICE_NONE
+        self.notes[v] = VOICE_NONE
+        self.unlink(v)
+        self.free[self.numfree] = v
+        self.numfree += 1
+        return v
+
+    # Voice playing a note, or -1
+    def voice(self, note):
+        v = self.note2voice[note]
+        if (v == VOICE_NONE):
+            return -1
+        return v
+
+    # Note playing on a voice, or -1
+    def note(self, v):
+        n = self.notes[v]
+        if (n == VOICE_NONE):
+            return -1
+        return n
+
+    def playing(self):
+        return self.numvoices - self.numfree
@@ -26,7 +26,6 @@
 #
 import machine
 import utime
-import ustruct
 
 pin = machine.Pin(25, machine.Pin.OUT)
 uart = machine.UART(1,31250)
@@ -44,19 +44,24 @@
 # OPTIONAL: I have a version of the mcp3008 library that includes a smoothread() function
 #           to average out pot readings over several scans.
 #
-# This also requires the use of the SimpleMIDIDecoder.py library
-# from @diyelecromusic...
+# This also requires the use of the SimpleMIDIDecoder.py,
+# SimpleMIDIEncoder.py, SimpleMIDIEngine.py, SimpleMIDIPIORx.py and
+# SimpleMIDIRing.py libraries from @diyelecromusic (found in the Micropython area)...
+#
+# MIDI is received and decoded on the second core, so that scanning
+# the pots and switches and updating the displays doesn't hold it up.
 #
 # IMPORTANT: Everything in this code assumes:
 #   Num TGs = Num switches = Num Pots = Num displays = 8... etc
 #
 import max7219
 from mcp3008 import MCP3008
+import machine
 from machine import Pin, SPI, UART
-from time import sleep, ticks_ms
+from utime import sleep, ticks_ms
 from rp2 import PIO, StateMachine, asm_pio
-import ustruct
-import SimpleMIDIDecoder
+import SimpleMIDIEncoder
+import SimpleMIDIEngine
 from midirt import MIDIRT, MIDICOMCH
 
 # -----------------------------------------------
@@ -99,14 +104,15 @@ MIDITG = [0,2,3,4,5,6,7,8,9]
 uart0 = UART(0,31250)
 uart1 = UART(1,31250)
 
+# All eight TGs share the one output, so use running status
+# to get as much as possible down it.
+midiOut = SimpleMIDIEncoder.SimpleMIDIEncoder(uart1.write)
+
 # This works on TGs mapped over to "real" MIDI channels.
 def uart_midi_send(cmd, tg, b1, b2):
     midiActivity(tg)
     ch = MIDITG[tg] # Channels 1-16
-    if (b2 == -1):
-        uart1.write(ustruct.pack("bb",cmd+ch-1,b1))
-    else:
-        uart1.write(ustruct.pack("bbb",cmd+ch-1,b1,b2))
+    midiOut.send(cmd+ch-1, b1, b2)
 
 
 # -----------------------------------------------
@@ -161,7 +167,10 @@ def midiSendToCommon (cmd, ch, b1, b2):
 def midiSendToInd (cmd, ch, b1, b2):
     # Only individually send if "common" routing
     # for this TG is not enabled.
+    # NB: TG 0 means the channel isn't routed to a TG.
     tg = MIDIRT[ch]
+    if tg == 0:
+        return
     if not MIDICOMMON[tg]:
         uart_midi_send(cmd, tg, b1, b2)
 
@@ -217,9 +226,60 @@ def doMidiSysEx(data, uart):
         #          work backwards from that...?
         #
         # Something to come back to I think...
-        #print(data)
+        #
+        # NB: data is a memoryview onto the decoder's own SysEx
+        #     buffer, so it can be examined here without copying,
+        #     but use bytes(data) if it needs to be kept.
+        #print(bytes(data))
         pass
 
+# Large dumps (e.g. a 4104 byte DX7 bank) are received in chunks so
+# they can be checked as they arrive without needing a buffer big
+# enough to hold the whole thing.
+#
+# Yamaha bulk dumps have the format:
+#    F0 43 0n ff bh bl ..data.. ck F7
+#
+# where n is the device number and ff the format (0 for a single
+# voice, 9 for a bank of 32), and the data plus the checksum should
+# add up to 0 (mod 128).  Only these are checked, and one with a bad
+# checksum is dropped and counted in sysexerrors.  Any other SysEx
+# (e.g. a parameter change or identity reply) is passed on unchecked.
+#
+# NB: Only a message that fits in one chunk is passed on to
+#     doMidiSysEx.  Anything bigger (e.g. a bank dump) is checked but
+#     not passed on, as there is nowhere to keep all of it.
+#
+sysexsum = 0
+sysexdump = False
+sysexerrors = 0
+def doMidiSysExChunk(data, start, end, uart):
+    global sysexsum, sysexdump, sysexerrors
+    if (uart == 1):
+        first = 0
+        last = len(data)
+        if start:
+            sysexdump = (last > 7) and (data[1] == 0x43) and ((data[2] & 0xF0) == 0x00) and \
+                        ((data[3] == 0) or (data[3] == 9))
+            # Skip the header
+            sysexsum = 0
+            first = 6
+        if (not sysexdump):
+            if start and end:
+                doMidiSysEx(data, uart)
+            return
+        if end and (data[last-1] == 0xF7):
+            # Skip the F7
+            last = last - 1
+        for i in range(first, last):
+            sysexsum += data[i]
+        if end:
+            if ((sysexsum & 0x7F) != 0):
+                sysexerrors += 1
+            elif start:
+                # The whole message fitted in one chunk
+                doMidiSysEx(data, uart)
+
 # NB: This uses TG channels directly, so no additional routing required
 def injectMidiPC(tg,pc):
     midiActivity(tg)
@@ -232,15 +292,22 @@ def injectMidiCC(tg,cc,dd):
     #print(tg, MIDITG[tg], "\tControlChange:\t", cc, dd)
     uart_midi_send(0xB0, tg, cc, dd)
 
-md = []
-for i in range(2):
-    # Set up one MIDI decoder per hardware UARTs
-    md_t = SimpleMIDIDecoder.SimpleMIDIDecoder(i)
-    md_t.cbNoteOn (doMidiNoteOn)
-    md_t.cbNoteOff (doMidiNoteOff)
-    md_t.cbThru (doMidiThru)
-    md_t.cbSysEx (doMidiSysEx)
-    md.append(md_t)
+# Size of the chunks SysEx is received in.  Anything up to
+# this size (e.g. a 163 byte single voice dump) arrives in one go.
+SYSEXCHUNK = 256
+
+# Both hardware UARTs are read and decoded on core 1 and the
+# messages handed over to the main loop on core 0.
+#
+# NB: The SysEx handling for returning data on uart 1 is called
+#     directly by the decoder, so runs on core 1.
+engine = SimpleMIDIEngine.SimpleMIDIEngine()
+engine.addUART(uart0)
+engine.addUART(uart1, sysex=True, sysexmax=SYSEXCHUNK)
+engine.decoder(1).cbSysExChunk (doMidiSysExChunk)
+engine.cbNoteOn (doMidiNoteOn)
+engine.cbNoteOff (doMidiNoteOff)
+engine.cbThru (doMidiThru)
     
 # -----------------------------------------------
 #
@@ -665,12 +732,14 @@ def scanPots():
 #      over several scans and seperate out the sensing
 #      from the displaying.
 
+# Each time round the main loop is in poll(), so that this can also
+# be imported and driven from elsewhere, e.g. on a desktop computer
+# using SimpleMIDIHost.py.  It only runs by itself when run directly,
+# which is also when MIDI handling is started on the second core.
 toggle = False
-while True:
-    if (uart0.any()):
-        md[0].read(uart0.read(1)[0])
-    if (uart1.any()):
-        md[1].read(uart1.read(1)[0])
+def poll():
+    global toggle
+    engine.service()
 
     # Alternate scanning the switches (and outputing LEDS) and pots (and updating the 7-segments)
     if toggle:
@@ -679,3 +748,11 @@ while True:
     else:
         scanPots()
         toggle = True
+
+def main():
+    engine.start()
+    while True:
+        poll()
+
+if __name__ == "__main__":
+    main()